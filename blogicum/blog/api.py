@@ -0,0 +1,244 @@
+"""JSON API только для чтения: посты, категории, профили, комментарии.
+
+Запросы строятся через `.values()` без создания моделей. Параметр
+`?fields=a,b` оставляет в SELECT только нужные колонки (и JOIN только
+нужных таблиц), списки листаются курсорами `?after=` / `?before=`.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db.models import Case, F, When
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import urlencode
+from django.views import View
+
+from .models import Category, Post, User
+from .paginators import InvalidCursor, KeysetPaginator
+
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+JSON_PARAMS = {
+    "ensure_ascii": False,
+    "check_circular": False,
+    "separators": (",", ":"),
+}
+
+POST_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "excerpt": "excerpt",
+    "text": "text",
+    "pub_date": "pub_date",
+    "author": "author__username",
+    "category": "category__slug",
+    "location": "location_name",
+    "image": "image",
+    "comment_count": "comment_count",
+}
+
+
+# Как и в шаблонах, название неопубликованного места не показывается.
+POST_ANNOTATIONS = {
+    "location_name": Case(
+        When(location__is_published=True, then=F("location__name")),
+        default=None,
+    ),
+}
+
+
+def image_url(name):
+    return default_storage.url(name) if name else None
+
+
+class ApiError(Exception):
+    pass
+
+
+class ApiView(View):
+    """Общая часть точек API.
+
+    `fields` — имена полей в ответе и соответствующие им поля модели,
+    `default_fields` — поля ответа без `?fields=`, `annotations` —
+    вычисляемые поля модели: они добавляются в запрос, только если
+    их запросили.
+    """
+
+    fields = {}
+    default_fields = None
+    annotations = {}
+    converters = {"image": image_url}
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            data = super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(
+                {"error": str(error)}, status=400,
+                json_dumps_params=JSON_PARAMS,
+            )
+        if isinstance(data, dict):
+            return JsonResponse(data, json_dumps_params=JSON_PARAMS)
+        return data
+
+    def get_names(self):
+        if "fields" not in self.request.GET:
+            return list(self.default_fields or self.fields)
+        names = [
+            name for name in self.request.GET["fields"].split(",") if name
+        ]
+        unknown = set(names) - set(self.fields)
+        if unknown or not names:
+            raise ApiError(
+                "Неизвестные поля: " + ", ".join(sorted(unknown))
+                if unknown else "Не указано ни одного поля."
+            )
+        return names
+
+    def select(self, queryset, paths):
+        annotations = {
+            path: self.annotations[path] for path in paths
+            if path in self.annotations
+        }
+        return queryset.annotate(**annotations).values(*paths)
+
+    def serialize(self, row, names):
+        item = {}
+        for name in names:
+            value = row[self.fields[name]]
+            if name in self.converters:
+                value = self.converters[name](value)
+            item[name] = value
+        return item
+
+
+class ApiListView(ApiView):
+    """Список с курсорной пагинацией по `ordering`."""
+
+    queryset = None
+    ordering = ("-pub_date", "-id")
+
+    def get_queryset(self):
+        if self.queryset is None:
+            raise ImproperlyConfigured(
+                f"{self.__class__.__name__} не задаёт queryset и не "
+                "переопределяет get_queryset()."
+            )
+        return self.queryset.all()
+
+    def get_page_size(self):
+        try:
+            size = int(self.request.GET.get("limit", PAGE_SIZE))
+        except ValueError:
+            raise ApiError("Параметр limit должен быть числом.")
+        return min(max(size, 1), MAX_PAGE_SIZE)
+
+    def get(self, request, *args, **kwargs):
+        names = self.get_names()
+        paths = {self.fields[name] for name in names}
+        # Поля сортировки нужны для курсоров, даже если их не просили.
+        paths.update(name.lstrip("-") for name in self.ordering)
+        paginator = KeysetPaginator(
+            self.select(self.get_queryset(), paths),
+            self.get_page_size(),
+            self.ordering,
+        )
+        try:
+            page = paginator.page(
+                after=request.GET.get("after"),
+                before=request.GET.get("before"),
+            )
+        except InvalidCursor as error:
+            raise ApiError(str(error))
+        return {
+            "results": [self.serialize(row, names) for row in page],
+            "next": self.page_url("after", page.next_cursor),
+            "previous": self.page_url("before", page.previous_cursor),
+        }
+
+    def page_url(self, direction, cursor):
+        if cursor is None:
+            return None
+        params = {
+            name: value for name, value in self.request.GET.items()
+            if name not in ("after", "before")
+        }
+        params[direction] = cursor
+        return f"{self.request.path}?{urlencode(params)}"
+
+
+class PostListApiView(ApiListView):
+    fields = POST_FIELDS
+    annotations = POST_ANNOTATIONS
+    default_fields = [name for name in POST_FIELDS if name != "text"]
+
+    def get_queryset(self):
+        posts = Post.objects.published()
+        if "category" in self.request.GET:
+            posts = posts.filter(category__slug=self.request.GET["category"])
+        return posts
+
+
+class ProfilePostListApiView(PostListApiView):
+    def get_queryset(self):
+        author = get_object_or_404(User, username=self.kwargs["username"])
+        return author.posts.published()
+
+
+class PostDetailApiView(ApiView):
+    fields = POST_FIELDS
+    annotations = POST_ANNOTATIONS
+
+    def get(self, request, pk):
+        names = self.get_names()
+        row = get_object_or_404(
+            self.select(
+                Post.objects.published(),
+                {self.fields[name] for name in names},
+            ),
+            pk=pk,
+        )
+        return self.serialize(row, names)
+
+
+class CommentListApiView(ApiListView):
+    fields = {
+        "id": "id",
+        "text": "text",
+        "created_at": "created_at",
+        "author": "author__username",
+    }
+    ordering = ("created_at", "id")
+
+    def get_queryset(self):
+        post = get_object_or_404(
+            Post.objects.published().only("id"), pk=self.kwargs["pk"]
+        )
+        return post.comments.all()
+
+
+class CategoryListApiView(ApiListView):
+    fields = {
+        "id": "id",
+        "title": "title",
+        "slug": "slug",
+        "description": "description",
+    }
+    queryset = Category.objects.filter(is_published=True)
+    ordering = ("id",)
+
+
+class ProfileApiView(ApiView):
+    fields = {
+        "username": "username",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "date_joined": "date_joined",
+    }
+
+    def get(self, request, username):
+        names = self.get_names()
+        row = get_object_or_404(
+            User.objects.values(*{self.fields[name] for name in names}),
+            username=username,
+        )
+        return self.serialize(row, names)
@@ -5,3 +5,12 @@ class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog"
     verbose_name = "Блог"
+
+    def ready(self):
+        from django.core import checks
+        from django.db.models.signals import post_migrate
+
+        from . import signals
+        from .checks import check_shared_cache
+        post_migrate.connect(signals.install_search_triggers, sender=self)
+        checks.register(check_shared_cache, checks.Tags.caches)
@@ -0,0 +1,292 @@
+"""Версии кэшируемых данных блога и кэш страниц.
+
+Каждый объект, от которого зависит закэшированный HTML, описывается
+тегом вида `post:1`, `category:2`. У тега есть версия — случайный
+токен в кэше. При изменении объекта версия заменяется новой, и все
+фрагменты и страницы, сохранённые со старой версией, перестают
+использоваться без явного удаления.
+
+Версия начинается со времени её публикации. Страница, данные которой
+прочитаны до фиксации чужой записи, могла бы попасть в кэш уже под
+новой версией этой записи; поэтому запрос запоминает момент начала
+(`time.time_ns()`) и не сохраняет ничего, если какая-то из версий
+опубликована позже (`changed_since()`).
+
+Отдельные теги описывают состав списков: `feed` — ленту,
+`category-posts:<id>` и `profile-posts:<id>` — страницы категории
+и профиля. Они меняются, когда пост появляется в списке или
+пропадает из него.
+"""
+import hashlib
+import re
+import secrets
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+VERSION_KEY = "blog:version:{}"
+PAGE_KEY = "blog:page:{}"
+VALIDATORS_KEY = "blog:validators:{}"
+FEED_TAG = "feed"
+HOLE_MARKER = "<!--page-cache-hole:{}-->"
+HOLE_RE = re.compile(r"<!--page-cache-hole:([\w./-]+)-->")
+# Отметка версий, созданных при чтении вместо вытесненных или ещё
+# не созданных: такая версия не означает изменения данных.
+CREATED_SUFFIX = "-created"
+
+# Версии, изменённые в ещё не зафиксированной транзакции потока.
+_pending = threading.local()
+
+
+def post_tag(post_id):
+    return f"post:{post_id}"
+
+
+def category_tag(category_id):
+    return f"category:{category_id}"
+
+
+def location_tag(location_id):
+    return f"location:{location_id}"
+
+
+def user_tag(user_id):
+    return f"user:{user_id}"
+
+
+def category_posts_tag(category_id):
+    return f"category-posts:{category_id}"
+
+
+def profile_posts_tag(user_id):
+    return f"profile-posts:{user_id}"
+
+
+def post_card_tags(post):
+    """Теги всего, что выводится в карточке поста."""
+    return (
+        post_tag(post.pk),
+        category_tag(post.category_id),
+        location_tag(post.location_id),
+        user_tag(post.author_id),
+    )
+
+
+def new_version(suffix=""):
+    # Токен никогда не повторяется, поэтому даже после вытеснения
+    # версии из кэша старый фрагмент не окажется снова актуальным.
+    return f"{time.time_ns()}-{secrets.token_hex(3)}{suffix}"
+
+
+def version_time_ns(version):
+    return int(version.split("-", 1)[0])
+
+
+def version_timestamp(version):
+    """Время (в секундах) создания версии."""
+    return version_time_ns(version) // 10 ** 9
+
+
+def changed_since(versions, since):
+    """Теги, версии которых опубликованы не раньше `since` (нс).
+
+    Данные, прочитанные после `since`, могли устареть к моменту
+    сохранения, если хотя бы один их тег есть в этом множестве.
+    Время сравнивается между процессами, поэтому они должны работать
+    на одной машине (или с синхронизированными часами).
+    """
+    if since is None:
+        return set()
+    return {
+        tag for tag, version in versions.items()
+        if not version.endswith(CREATED_SUFFIX)
+        and version_time_ns(version) >= since
+    }
+
+
+def pending_versions():
+    """Незафиксированные версии текущей транзакции этого потока.
+
+    После отката транзакции её версии остаются здесь до первого
+    обращения вне транзакции и тогда отбрасываются.
+    """
+    in_transaction = transaction.get_connection().in_atomic_block
+    if not in_transaction or not hasattr(_pending, "versions"):
+        _pending.versions = {}
+    return _pending.versions
+
+
+def get_versions(tags):
+    """Возвращает версии тегов, создавая недостающие."""
+    keys = {VERSION_KEY.format(tag): tag for tag in set(tags)}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, new_version(CREATED_SUFFIX), None)
+        found[key] = cache.get(key)
+    pending = pending_versions()
+    return {
+        tag: pending.get(tag, found[key]) for key, tag in keys.items()
+    }
+
+
+def publish_versions(versions):
+    # Общие версии создаются заново после фиксации: их время не раньше
+    # момента, когда изменённые данные стали видны другим запросам.
+    cache.set_many(
+        {VERSION_KEY.format(tag): new_version() for tag in versions},
+        None,
+    )
+    pending = getattr(_pending, "versions", {})
+    for tag, version in versions.items():
+        if pending.get(tag) == version:
+            del pending[tag]
+
+
+def bump(*tags):
+    """Делает недействительными фрагменты, зависящие от тегов.
+
+    Внутри транзакции новые версии видны только её потоку, а в общий
+    кэш попадают после фиксации: иначе параллельный запрос сохранил бы
+    под новой версией ещё старые данные, а откаченная запись сбросила
+    бы кэш впустую.
+    """
+    versions = {tag: new_version() for tag in tags}
+    if transaction.get_connection().in_atomic_block:
+        pending_versions().update(versions)
+    transaction.on_commit(lambda: publish_versions(versions))
+
+
+def attach_card_versions(posts, since=None):
+    """Проставляет постам `card_version` для кэша карточек.
+
+    Версии всех карточек страницы читаются из кэша одним запросом.
+    Карточки, теги которых изменились после `since` (до чтения постов),
+    получают `card_version = None` и не кэшируются.
+    """
+    posts = list(posts)
+    versions = get_versions(page_posts_tags(posts))
+    changed = changed_since(versions, since)
+    for post in posts:
+        tags = post_card_tags(post)
+        post.card_version = None if changed.intersection(tags) else ".".join(
+            versions[tag] for tag in tags
+        )
+
+
+def page_posts_tags(posts):
+    """Теги всех карточек постов на странице."""
+    return {tag for post in posts for tag in post_card_tags(post)}
+
+
+def page_key(request, absolute=False):
+    """Ключ страницы; `absolute` — для страниц с абсолютными ссылками.
+
+    Такие страницы зависят от схемы и хоста запроса.
+    """
+    path = (
+        request.build_absolute_uri() if absolute
+        else request.get_full_path()
+    ).encode()
+    return PAGE_KEY.format(hashlib.md5(path).hexdigest())
+
+
+def store_page(key, response, tags, timeout, since=None):
+    """Сохраняет тело страницы вместе с версиями её тегов.
+
+    Возвращает None и ничего не сохраняет, если теги изменились после
+    `since` — начала чтения данных страницы.
+    """
+    versions = get_versions(tags)
+    if changed_since(versions, since):
+        return None
+    entry = {
+        "content": response.content,
+        "content_type": response["Content-Type"],
+        "versions": versions,
+    }
+    cache.set(key, entry, timeout)
+    return entry
+
+
+def cached_page(key):
+    """Возвращает сохранённую страницу, если её теги не менялись."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if get_versions(entry["versions"]) != entry["versions"]:
+        return None
+    return entry
+
+
+def fill_holes(content, request):
+    """Подставляет на место «дыр» фрагменты для текущего пользователя."""
+    return HOLE_RE.sub(
+        lambda match: render_to_string(match.group(1), request=request),
+        content.decode(),
+    ).encode()
+
+
+def page_response(entry, request):
+    return HttpResponse(
+        fill_holes(entry["content"], request),
+        content_type=entry["content_type"],
+    )
+
+
+def validators_key(request):
+    # Шапка страницы зависит от пользователя, поэтому валидаторы
+    # у каждого пользователя свои.
+    variant = f"{request.user.pk or ''}:{request.get_full_path()}"
+    return VALIDATORS_KEY.format(hashlib.md5(variant.encode()).hexdigest())
+
+
+def make_validators(key, versions):
+    """Валидаторы (ETag и Last-Modified) по версиям тегов страницы."""
+    digest = hashlib.md5(key.encode())
+    for tag in sorted(versions):
+        digest.update(f"{tag}={versions[tag]};".encode())
+    return {
+        "etag": quote_etag(digest.hexdigest()),
+        "last_modified": max(
+            map(version_timestamp, versions.values()), default=None
+        ),
+    }
+
+
+def store_validators(key, tags, timeout, since=None):
+    """Вычисляет валидаторы по версиям тегов и запоминает их.
+
+    Если теги изменились после `since`, ответ мог быть построен по
+    прежним данным: валидаторов нет, возвращается None.
+    """
+    versions = get_versions(tags)
+    if changed_since(versions, since):
+        return None
+    validators = make_validators(key, versions)
+    cache.set(key, {"versions": versions, **validators}, timeout)
+    return validators
+
+
+def cached_validators(key):
+    """Валидаторы страницы, если её теги с тех пор не менялись."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if get_versions(entry["versions"]) != entry["versions"]:
+        return None
+    return {"etag": entry["etag"], "last_modified": entry["last_modified"]}
+
+
+def set_validators(response, etag, last_modified, vary_on_cookie=True):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    if vary_on_cookie:
+        patch_vary_headers(response, ("Cookie",))
+    return response
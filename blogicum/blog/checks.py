@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Версии тегов (blog/cache.py) должны быть общими для процессов.
+
+    С кэшем в памяти процесса изменение, сделанное другим процессом,
+    админкой или командой, не сбрасывает страницы, карточки, ленты
+    и валидаторы в остальных процессах.
+    """
+    if settings.DEBUG or not isinstance(caches["default"], LocMemCache):
+        return []
+    return [Warning(
+        "Кэш по умолчанию хранится в памяти процесса: изменения из других "
+        "процессов и команд не сбросят закэшированные страницы.",
+        hint="Укажите общий кэш (файловый, базу данных или memcached) "
+             "в CACHES['default'].",
+        id="blog.W001",
+    )]
@@ -0,0 +1,101 @@
+"""Настройка соединений SQLite и повтор записи при блокировке базы.
+
+SQLite допускает одного писателя. В режиме WAL читатели ему не мешают,
+а писатели ждут друг друга `busy_timeout` миллисекунд. Транзакция,
+которая не дождалась блокировки (или не может её ждать: в WAL
+читающая транзакция, отставшая от чужой записи, получает отказ сразу),
+завершается ошибкой «database is locked». `retry_on_lock()` повторяет
+такую транзакцию целиком с нарастающей паузой.
+
+`bulk_insert()` нужен командам массовой загрузки: bulk_create
+заменяет `created_at` временем вставки.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS, OperationalError, connections, transaction,
+)
+
+LOCK_MESSAGES = ("database is locked", "database table is locked")
+
+
+def apply_pragmas(connection):
+    """Выполняет `BLOG_SQLITE_PRAGMAS` для нового соединения с SQLite."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.BLOG_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and any(
+        message in str(error) for message in LOCK_MESSAGES
+    )
+
+
+def retry_delays():
+    """Паузы между попытками: экспонента со случайным разбросом."""
+    delay = settings.BLOG_WRITE_RETRY_DELAY
+    for _ in range(settings.BLOG_WRITE_RETRIES):
+        # Разброс не даёт писателям, столкнувшимся однажды,
+        # повторять попытки одновременно.
+        yield delay * random.uniform(0.5, 1.5)
+        delay *= 2
+
+
+def retry_on_lock(func, using=DEFAULT_DB_ALIAS):
+    """Выполняет `func()` в транзакции, повторяя её при блокировке базы.
+
+    Внутри чужой транзакции `func()` выполняется в точке сохранения
+    без повторов: откатить и начать заново всю транзакцию может
+    только её владелец.
+    """
+    delays = () if connections[using].in_atomic_block else retry_delays()
+    for delay in (*delays, None):
+        try:
+            with transaction.atomic(using=using):
+                return func()
+        except OperationalError as error:
+            if delay is None or not is_lock_error(error):
+                raise
+        time.sleep(delay)
+
+
+def bulk_insert(queryset, objects, batch_size=None):
+    """Вставляет объекты порциями как есть, без `pre_save()` полей.
+
+    В отличие от bulk_create, `created_at` и другие поля с
+    `auto_now_add` не заменяются временем вставки: значения берутся
+    из объектов, их нужно задать самим. Как и при `loaddata`, вставка
+    «сырая» (raw) и не трогает общие объекты полей модели, поэтому
+    безопасна рядом с потоками, обрабатывающими запросы. Сигналы
+    не отправляются. Первичные ключи, не заданные у объектов,
+    им не проставляются.
+    """
+    objects = list(objects)
+    opts = queryset.model._meta
+    connection = connections[queryset.db]
+    with transaction.atomic(using=queryset.db, savepoint=False):
+        for has_pk in (True, False):
+            group = [obj for obj in objects if (obj.pk is not None) == has_pk]
+            if not group:
+                continue
+            fields = [
+                field for field in opts.concrete_fields
+                if has_pk or field is not opts.auto_field
+            ]
+            size = max(connection.ops.bulk_batch_size(fields, group), 1)
+            if batch_size:
+                size = min(size, batch_size)
+            for start in range(0, len(group), size):
+                queryset._insert(
+                    group[start:start + size], fields=fields, raw=True,
+                    using=queryset.db,
+                )
+    for obj in objects:
+        obj._state.adding = False
+        obj._state.db = queryset.db
+    return objects
@@ -0,0 +1,79 @@
+"""Потоковая выгрузка постов и комментариев в JSON Lines и CSV.
+
+Строки читаются порциями по первичному ключу (`id > последний`),
+поэтому каждый запрос использует индекс, а в памяти одновременно
+находится не больше одной порции независимо от размера таблиц.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Post
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Имя колонки выгрузки и поле модели.
+EXPORTS = {
+    "posts": (Post, (
+        ("id", "id"),
+        ("title", "title"),
+        ("text", "text"),
+        ("pub_date", "pub_date"),
+        ("is_published", "is_published"),
+        ("author", "author__username"),
+        ("category", "category__slug"),
+        ("location", "location__name"),
+        ("comment_count", "comment_count"),
+    )),
+    "comments": (Comment, (
+        ("id", "id"),
+        ("post_id", "post_id"),
+        ("author", "author__username"),
+        ("text", "text"),
+        ("created_at", "created_at"),
+    )),
+}
+
+
+def iter_rows(queryset, fields, chunk_size=CHUNK_SIZE):
+    """Кортежи значений `fields` в порядке id, порциями по `chunk_size`.
+
+    Первым полем должен быть `id`.
+    """
+    rows = queryset.order_by("id").values_list(*fields)
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1][0]
+
+
+class _Line:
+    """Файлоподобный объект, из которого csv.writer возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(kind, fmt, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки `kind` ("posts"/"comments") в формате `fmt`."""
+    model, columns = EXPORTS[kind]
+    names = [name for name, _ in columns]
+    rows = iter_rows(
+        model.objects.all(), [field for _, field in columns], chunk_size
+    )
+    if fmt == "csv":
+        writer = csv.writer(_Line())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + "\n"
@@ -0,0 +1,182 @@
+"""RSS- и Atom-ленты: весь блог, категория и автор.
+
+Лента целиком хранится в кэше вместе с версиями своих тегов (как
+страницы в `PageCacheMixin`) и отдаётся с ETag и Last-Modified,
+поэтому повторный опрос агрегатором не обращается к базе. В ленту
+попадает сохранённый анонс поста, а не полный текст. Ссылки в ленте
+абсолютные, поэтому ключ кэша включает схему и хост запроса.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+
+from . import cache
+from .models import Category, Post, User
+
+FEED_SIZE = 20
+
+
+class PostFeed(Feed):
+    """Общая часть лент постов."""
+
+    # Посты ленты текущего запроса; задаются у копии ленты в __call__.
+    posts = None
+
+    def __call__(self, request, *args, **kwargs):
+        key = cache.page_key(request, absolute=True)
+        entry = cache.cached_page(key)
+        if entry is None:
+            since = time.time_ns()
+            try:
+                obj = self.get_object(request, *args, **kwargs)
+            except ObjectDoesNotExist:
+                raise Http404("Лента не найдена.")
+            # Экземпляр ленты общий для всех запросов, поэтому посты
+            # хранятся у копии: по одному списку строится и лента,
+            # и её теги.
+            feed = copy.copy(self)
+            feed.posts = list(self.get_items(obj))
+            generator = feed.get_feed(obj, request)
+            response = HttpResponse(content_type=generator.content_type)
+            generator.write(response, "utf-8")
+            entry = cache.store_page(
+                key, response, self.get_cache_tags(obj, feed.posts),
+                settings.BLOG_FEED_CACHE_TIMEOUT, since,
+            )
+            if entry is None:
+                # Данные изменились во время построения ленты.
+                return response
+        validators = cache.make_validators(key, entry["versions"])
+        response = get_conditional_response(request, **validators)
+        if response is None:
+            response = HttpResponse(
+                entry["content"], content_type=entry["content_type"]
+            )
+        return cache.set_validators(
+            response, **validators, vary_on_cookie=False
+        )
+
+    def get_posts(self, obj):
+        return Post.objects.published()
+
+    def get_list_tags(self, obj):
+        """Теги состава ленты и объекта, которому она посвящена."""
+        return {cache.FEED_TAG}
+
+    def get_cache_tags(self, obj, posts):
+        return {
+            *self.get_list_tags(obj),
+            *(tag for post in posts for tag in (
+                cache.post_tag(post.pk),
+                cache.user_tag(post.author_id),
+                cache.category_tag(post.category_id),
+            )),
+        }
+
+    def items(self, obj):
+        if self.posts is not None:
+            return self.posts
+        return self.get_items(obj)
+
+    def get_items(self, obj):
+        return self.get_posts(obj).order_by(
+            "-pub_date", "-id"
+        ).select_related("author", "category").only(
+            "title", "excerpt", "pub_date", "author__username",
+            "category__title",
+        )[:FEED_SIZE]
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        return post.excerpt
+
+    def item_link(self, post):
+        return reverse("blog:post_detail", args=(post.pk,))
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.username
+
+    def item_categories(self, post):
+        return (post.category.title,)
+
+
+class LatestPostsFeed(PostFeed):
+    title = "Блогикум"
+    description = "Новые публикации Блогикума."
+
+    def link(self):
+        return reverse("blog:index")
+
+
+class CategoryFeed(PostFeed):
+    description = "Новые публикации в категории."
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category, slug=category_slug, is_published=True
+        )
+
+    def get_posts(self, category):
+        return category.posts.published()
+
+    def get_list_tags(self, category):
+        return {
+            cache.category_tag(category.pk),
+            cache.category_posts_tag(category.pk),
+        }
+
+    def title(self, category):
+        return f"Блогикум: {category.title}"
+
+    def link(self, category):
+        return reverse("blog:category_posts", args=(category.slug,))
+
+
+class AuthorFeed(PostFeed):
+    description = "Новые публикации автора."
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def get_posts(self, author):
+        return author.posts.published()
+
+    def get_list_tags(self, author):
+        return {
+            cache.user_tag(author.pk),
+            cache.profile_posts_tag(author.pk),
+        }
+
+    def title(self, author):
+        return f"Блогикум: @{author.username}"
+
+    def link(self, author):
+        return reverse("blog:profile", args=(author.username,))
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class CategoryAtomFeed(CategoryFeed):
+    feed_type = Atom1Feed
+    subtitle = CategoryFeed.description
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+    subtitle = AuthorFeed.description
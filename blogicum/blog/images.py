@@ -0,0 +1,169 @@
+"""Уменьшенные копии изображений постов.
+
+Метаданные (EXIF с координатами съёмки и т.п.) удаляются из
+изображения ещё при загрузке — `strip_metadata()`. Затем для
+`post_images/photo.jpg` создаются перекодированные копии шириной
+из `VARIANT_WIDTHS` (только меньше исходной):
+`post_images/variants/photo.jpg-640w.jpg`. Размеры оригинала и имена
+копий, под которыми их сохранило хранилище, записываются
+в `Post.image_size`. Пока они не заполнены, шаблоны выводят только
+оригинал.
+"""
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from . import cache
+from .models import Post
+
+VARIANT_WIDTHS = (320, 640, 960, 1280)
+VARIANT_DIR = "variants"
+JPEG_QUALITY = 82
+# Качество для повернутого по EXIF оригинала, который приходится
+# перекодировать.
+ORIGINAL_QUALITY = 95
+ORIENTATION_TAG = 0x0112
+STRIPPED_FORMATS = {"JPEG", "PNG", "WEBP"}
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def variant_name(name, width):
+    # Имя оригинала берётся целиком: у `a.png` и `a.jpg` копии разные.
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, VARIANT_DIR, f"{filename}-{width}w.jpg")
+
+
+def strip_metadata(file):
+    """Копия загруженного изображения без метаданных или None.
+
+    JPEG без поворота пересохраняется с исходными таблицами
+    квантования (`quality="keep"`), то есть почти без потерь.
+    Поворот из EXIF применяется к пикселям, иначе после удаления
+    метаданных изображение показывалось бы повёрнутым. Анимации
+    и прочие форматы остаются как есть.
+    """
+    file.seek(0)
+    try:
+        image = Image.open(file)
+        image.load()
+    except (OSError, Image.DecompressionBombError):
+        return None
+    fmt = image.format
+    if fmt not in STRIPPED_FORMATS or getattr(image, "n_frames", 1) > 1:
+        return None
+    options = {"icc_profile": image.info.get("icc_profile")}
+    if image.getexif().get(ORIENTATION_TAG, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+        if fmt == "JPEG":
+            options["quality"] = ORIGINAL_QUALITY
+    elif fmt == "JPEG":
+        options["quality"] = "keep"
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    return ContentFile(buffer.getvalue(), name=file.name)
+
+
+def variant_widths(width):
+    """Ширины копий изображения шириной `width`."""
+    return [variant for variant in VARIANT_WIDTHS if variant < width]
+
+
+def encode_variant(image, width):
+    height = max(1, round(image.height * width / image.width))
+    variant = image.convert("RGB").resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    # Метаданные (EXIF с координатами съёмки и т.п.) не копируются.
+    variant.save(
+        buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True
+    )
+    return buffer.getvalue()
+
+
+def process_image(name, storage=default_storage, force=False):
+    """Создаёт копии изображения; возвращает значение `image_size`.
+
+    Существующие копии не пересоздаются без `force`, поэтому
+    обработку можно безопасно запускать повторно. Хранилище может
+    сохранить копию под другим именем, поэтому записывается то имя,
+    которое оно вернуло.
+    """
+    with storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    variants = {}
+    for width in variant_widths(image.width):
+        target = variant_name(name, width)
+        if storage.exists(target):
+            if not force:
+                variants[str(width)] = target
+                continue
+            storage.delete(target)
+        variants[str(width)] = storage.save(
+            target, ContentFile(encode_variant(image, width))
+        )
+    return {"width": image.width, "height": image.height,
+            "variants": variants}
+
+
+def save_dimensions(post_id, name, image_size):
+    """Записывает размеры, если у поста всё ещё то же изображение."""
+    updated = Post.objects.filter(pk=post_id, image=name).exclude(
+        image_size=image_size
+    ).update(image_size=image_size)
+    if updated:
+        cache.bump(cache.post_tag(post_id))
+    return bool(updated)
+
+
+def process_post_image(post_id, force=False):
+    name = Post.objects.filter(pk=post_id).values_list(
+        "image", flat=True
+    ).first()
+    if not name:
+        return
+    try:
+        image_size = process_image(name, force=force)
+    except (OSError, Image.DecompressionBombError) as error:
+        logger.warning("Не удалось обработать %s: %s", name, error)
+        return
+    save_dimensions(post_id, name, image_size)
+
+
+def _process_in_background(post_id):
+    try:
+        process_post_image(post_id)
+    except Exception:
+        logger.exception("Ошибка обработки изображения поста %s", post_id)
+    finally:
+        # У каждого потока своё соединение с базой.
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BLOG_IMAGE_WORKERS,
+            thread_name_prefix="blog-images",
+        )
+    return _executor
+
+
+def schedule_processing(post_id):
+    """Обрабатывает изображение поста после фиксации транзакции."""
+    if settings.BLOG_IMAGE_BACKGROUND:
+        transaction.on_commit(
+            lambda: get_executor().submit(_process_in_background, post_id)
+        )
+    else:
+        transaction.on_commit(lambda: process_post_image(post_id))
@@ -0,0 +1,214 @@
+"""Замеры запросов к БД и отрисовки шаблонов в пределах одного запроса.
+
+`Recorder` подключается ко всем соединениям через `execute_wrapper`
+и считает запросы, время SQL и повторы одинаковых запросов; время
+шаблонов учитывается обёрткой `Template.render`, которая ничего не
+делает, пока замер не идёт. `STATS` накапливает замеры по
+представлениям в памяти процесса, а `write_query_log()` дописывает
+выполненные запросы в журнал для команды `analyze_query_log`.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+LIST_RE = re.compile(r"\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)")
+ROWS_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+SPACE_RE = re.compile(r"\s+")
+# Сколько самых частых повторов хранить для каждого представления.
+TOP_DUPLICATES = 5
+
+# Идущие замеры: они могут быть вложены (например, команда замеряет
+# запрос, который замеряет и middleware).
+_recorders = ContextVar("blog_recorders", default=())
+_rendering = ContextVar("blog_rendering", default=False)
+_template_render = Template.render
+
+
+def _timed_render(self, context):
+    recorders = _recorders.get()
+    if not recorders or _rendering.get():
+        return _template_render(self, context)
+    # Вложенные шаблоны ({% include %}) входят во время внешнего.
+    token = _rendering.set(True)
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for recorder in recorders:
+            recorder.template_time += elapsed
+        _rendering.reset(token)
+
+
+def fingerprint(sql):
+    """Запрос без литералов: одинаковый для запросов одной формы.
+
+    Значения строк и чисел заменяются на `?`, списки параметров
+    любой длины (`IN (...)`, `VALUES (...), (...)`) — на `(...)`.
+    """
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    sql = ROWS_RE.sub("(...)", LIST_RE.sub("(...)", sql))
+    return SPACE_RE.sub(" ", sql).strip()
+
+
+def install_template_timer():
+    Template.render = _timed_render
+
+
+class Recorder:
+    """Счётчики одного запроса; время — в секундах.
+
+    С `keep_queries=True` сохраняет и сами запросы в `log`:
+    текст, параметры, время и признак `executemany`.
+    """
+
+    def __init__(self, keep_queries=False):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.fingerprints = Counter()
+        self.log = [] if keep_queries else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.sql_time += elapsed
+            self.fingerprints[fingerprint(sql)] += 1
+            if self.log is not None:
+                self.log.append((sql, params, elapsed, many))
+
+    @property
+    def duplicates(self):
+        """Повторные выполнения одинаковых запросов (признак N+1)."""
+        return sum(count - 1 for count in self.fingerprints.values())
+
+
+@contextmanager
+def record(recorder=None):
+    """Собирает в `recorder` запросы и отрисовку шаблонов внутри блока."""
+    recorder = recorder or Recorder()
+    install_template_timer()
+    token = _recorders.set((*_recorders.get(), recorder))
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            yield recorder
+    finally:
+        _recorders.reset(token)
+
+
+class ViewStats:
+    """Замеры, накопленные по именам представлений."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view_name, recorder, duration, size):
+        with self._lock:
+            entry = self._views.setdefault(view_name, {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "duplicates": 0,
+                "sql_time": 0.0,
+                "template_time": 0.0,
+                "time": 0.0,
+                "size": 0,
+                "repeated": Counter(),
+            })
+            entry["requests"] += 1
+            entry["queries"] += recorder.queries
+            entry["max_queries"] = max(
+                entry["max_queries"], recorder.queries
+            )
+            entry["duplicates"] += recorder.duplicates
+            entry["sql_time"] += recorder.sql_time
+            entry["template_time"] += recorder.template_time
+            entry["time"] += duration
+            entry["size"] += size
+            for sql, count in recorder.fingerprints.items():
+                if count > 1:
+                    entry["repeated"][sql] += count - 1
+
+    def snapshot(self):
+        """Средние значения по представлениям, самые долгие по SQL первыми.
+
+        Время — в миллисекундах на запрос, размер — в байтах.
+        """
+        with self._lock:
+            views = {
+                name: dict(entry, repeated=entry["repeated"].most_common(
+                    TOP_DUPLICATES
+                ))
+                for name, entry in self._views.items()
+            }
+        result = {}
+        for name, entry in sorted(
+                views.items(), key=lambda item: -item[1]["sql_time"]):
+            requests = entry["requests"]
+            result[name] = {
+                "requests": requests,
+                "queries": entry["queries"] / requests,
+                "max_queries": entry["max_queries"],
+                "duplicates": entry["duplicates"] / requests,
+                "sql_ms": entry["sql_time"] / requests * 1000,
+                "template_ms": entry["template_time"] / requests * 1000,
+                "total_ms": entry["time"] / requests * 1000,
+                "size": entry["size"] / requests,
+                "repeated": [
+                    {"sql": sql, "count": count}
+                    for sql, count in entry["repeated"]
+                ],
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+STATS = ViewStats()
+
+
+def write_query_log(path, view_name, recorder):
+    """Дописывает запросы из `recorder.log` в журнал (JSON Lines).
+
+    Значения параметров в журнал не пишутся: среди них данные сессий,
+    хэши паролей и адреса почты. Сохраняется SQL с местами для
+    параметров и их число — этого достаточно для плана запроса.
+    """
+    now = timezone.now().isoformat()
+    lines = "".join(
+        json.dumps({
+            "time": now,
+            "view": view_name,
+            "fingerprint": fingerprint(sql),
+            "duration_ms": elapsed * 1000,
+            "sql": sql,
+            # У executemany наборов параметров много, план по нему
+            # не строится.
+            "param_count": None if many else len(params or ()),
+        }, ensure_ascii=False) + "\n"
+        for sql, params, elapsed, many in recorder.log
+    )
+    # Одна запись в файл, открытый на дозапись, не перемешивается
+    # с записями других процессов.
+    with open(path, "a", encoding="utf-8") as log:
+        log.write(lines)
@@ -0,0 +1,128 @@
+import json
+import statistics
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from blog.management.commands.check_query_plans import problems_in_plan
+
+TOP = 20
+TOP_VIEWS = 3
+
+
+def aggregate(lines, view=None):
+    """Записи журнала, сгруппированные по отпечаткам запросов."""
+    groups = {}
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            raise CommandError(f"Строка {number}: некорректный JSON.")
+        if view and entry["view"] != view:
+            continue
+        group = groups.setdefault(entry["fingerprint"], {
+            "durations": [],
+            "views": Counter(),
+            "example": entry,
+        })
+        group["durations"].append(entry["duration_ms"])
+        group["views"][entry["view"]] += 1
+        # Для плана берётся самый медленный пример.
+        if entry["duration_ms"] > group["example"]["duration_ms"]:
+            group["example"] = entry
+    return groups
+
+
+def p95(durations):
+    if len(durations) < 2:
+        return durations[0]
+    return statistics.quantiles(durations, n=20, method="inclusive")[18]
+
+
+def explain_plan(entry):
+    """План запроса из журнала или None, если его не получить.
+
+    Значений параметров в журнале нет, вместо них подставляется NULL:
+    выбор индексов в SQLite от значений обычно не зависит.
+    """
+    if connection.vendor != "sqlite" or entry["param_count"] is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"EXPLAIN QUERY PLAN {entry['sql']}",
+                [None] * entry["param_count"],
+            )
+            return [row[-1] for row in cursor.fetchall()]
+    except DatabaseError:
+        # Схема могла измениться с момента записи в журнал.
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Сводка журнала SQL-запросов (BLOG_QUERY_LOG): отпечатки "
+        "запросов по убыванию суммарного времени с числом выполнений, "
+        "p95, представлениями и планом EXPLAIN QUERY PLAN."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?",
+            help="Файл журнала; по умолчанию BLOG_QUERY_LOG.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=TOP,
+            help="Сколько отпечатков показать.",
+        )
+        parser.add_argument(
+            "--view", help="Только запросы этого представления.",
+        )
+        parser.add_argument(
+            "--no-explain", action="store_false", dest="explain",
+            help="Не выполнять EXPLAIN QUERY PLAN.",
+        )
+
+    def handle(self, *args, path, top, view, explain, **options):
+        path = path or settings.BLOG_QUERY_LOG
+        try:
+            with open(path, encoding="utf-8") as log:
+                groups = aggregate(log, view)
+        except FileNotFoundError:
+            raise CommandError(f"Журнал {path} не найден.")
+        if not groups:
+            self.stdout.write("Журнал пуст.")
+            return
+        total = sum(sum(group["durations"]) for group in groups.values())
+        ranked = sorted(
+            groups.items(), key=lambda item: -sum(item[1]["durations"])
+        )
+        for rank, (sql, group) in enumerate(ranked[:top], 1):
+            durations = group["durations"]
+            spent = sum(durations)
+            views = ", ".join(
+                f"{name} ({count})"
+                for name, count in group["views"].most_common(TOP_VIEWS)
+            )
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{rank}. {spent:.1f} мс ({spent / max(total, 1e-9):.0%}), "
+                f"запросов: {len(durations)}, p95 {p95(durations):.2f} мс"
+            ))
+            self.stdout.write(f"   Представления: {views}")
+            self.stdout.write(f"   {sql}")
+            plan = explain and explain_plan(group["example"])
+            if plan:
+                problems = problems_in_plan(plan)
+                for detail in plan:
+                    style = (
+                        self.style.ERROR if detail in problems
+                        else self.style.SQL_KEYWORD
+                    )
+                    self.stdout.write(style(f"     {detail}"))
+        self.stdout.write(
+            f"Отпечатков: {len(groups)}, суммарно {total:.1f} мс."
+        )
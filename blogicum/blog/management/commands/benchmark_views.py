@@ -0,0 +1,494 @@
+import json
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import instrumentation, profiling
+from blog.models import Comment, Post, User
+from blog.paginators import KeysetPaginator
+from blog.views import COMMENT_ORDERING, NUM_ON_MAIN
+
+ITERATIONS = 30
+WARMUP = 3
+# Глубина «дальних» страниц списков, в объектах.
+DEPTH = 1000
+THRESHOLD = 0.2
+# Разница меньше этой считается шумом, даже если превышает порог.
+TOLERANCE_MS = 1.0
+# Адрес не из INTERNAL_IPS, чтобы debug_toolbar не встраивался в ответы.
+REMOTE_ADDR = "192.0.2.1"
+COLUMNS = ("p50_ms", "p95_ms", "p99_ms", "queries", "sql_ms", "template_ms")
+
+
+class Case:
+    """Один замеряемый запрос: маршрут, роль клиента и параметры."""
+
+    def __init__(self, name, route, role, path, method="get", data=None,
+                 repeat=None):
+        self.name = name
+        self.route = route
+        self.role = role
+        self.path = path
+        self.method = method
+        self.data = data or {}
+        # Полные выгрузки слишком долгие, их замеряют один раз.
+        self.repeat = repeat
+
+    @property
+    def writes(self):
+        return self.method != "get"
+
+
+def encode_cursor(queryset, ordering, depth):
+    """Курсор на объект с номером `depth` или None, если его нет."""
+    fields = [name.lstrip("-") for name in ordering]
+    row = queryset.order_by(*ordering).values(*fields)[depth:depth + 1]
+    row = next(iter(row), None)
+    if row is None:
+        return None
+    return KeysetPaginator(queryset, 1, ordering).encode_cursor(row)
+
+
+def deep_cases(name, route, role, path, queryset, ordering, depth):
+    """Дальняя страница списка: номером (OFFSET) и курсором."""
+    cursor = encode_cursor(queryset, ordering, depth)
+    if cursor is None:
+        return []
+    return [
+        Case(f"{name}, стр. {depth // NUM_ON_MAIN + 1}", route, role,
+             f"{path}?page={depth // NUM_ON_MAIN + 1}"),
+        Case(f"{name}, курсор {depth}", route, role,
+             f"{path}?after={cursor}"),
+    ]
+
+
+class Snapshot:
+    """Строки, которые меняют запросы на запись, до замера.
+
+    `restore()` удаляет созданные запросом посты и комментарии
+    и возвращает изменённые и удалённые объекты `instances`.
+    """
+
+    models = (Comment, Post)
+
+    def __init__(self, instances):
+        self.copies = [
+            type(instance).objects.get(pk=instance.pk)
+            for instance in instances
+        ]
+        self.last_pks = {
+            model: model.objects.aggregate(last=Max("pk"))["last"] or 0
+            for model in self.models
+        }
+
+    def restore(self):
+        for model in self.models:
+            model.objects.filter(pk__gt=self.last_pks[model]).delete()
+        for copy in self.copies:
+            objects = type(copy).objects.filter(pk=copy.pk)
+            if objects.exists():
+                copy.save()
+                continue
+            # Удалённый объект вставляется заново через save(), чтобы
+            # сработали сигналы (счётчик комментариев, версии кэша);
+            # дату создания, заменённую при вставке, возвращает update().
+            created_at = copy.created_at
+            copy.save(force_insert=True)
+            objects.update(created_at=created_at)
+            copy.created_at = created_at
+
+
+def delete_objects(objects):
+    """Удаляет созданные для замера объекты в обратном порядке."""
+    for instance in reversed(objects):
+        instance.delete()
+
+
+def pick_objects():
+    """Самые тяжёлые объекты базы: популярный автор, пост и т. п.
+
+    Объекты, созданные для замера, перечислены в `created`; если
+    подготовка не удалась, они удаляются сразу.
+    """
+    post = Post.objects.published().select_related(
+        "author", "category"
+    ).order_by("-comment_count", "id").first()
+    if post is None:
+        raise CommandError(
+            "В базе нет опубликованных постов; заполните её командой "
+            "generate_dataset."
+        )
+    top = Post.objects.values("author").annotate(
+        total=Count("id")
+    ).order_by("-total").first()
+    author = User.objects.get(pk=top["author"])
+    created = []
+    try:
+        reader = User.objects.exclude(
+            pk__in=(author.pk, post.author_id)
+        ).order_by("pk").first()
+        if reader is None:
+            reader = User.objects.create(username="benchmark-reader")
+            created.append(reader)
+        staff = User.objects.filter(is_staff=True).order_by("pk").first()
+        if staff is None:
+            staff = User.objects.create(
+                username="benchmark-staff", is_staff=True
+            )
+            created.append(staff)
+        comment = Comment.objects.create(
+            post=post, author=reader, text="Комментарий для замера."
+        )
+        created.append(comment)
+        # Правка и удаление поста замеряются на отдельном посте:
+        # удаление забрало бы с собой комментарии настоящего.
+        own_post = Post.objects.create(
+            title="Пост для замера", text="Текст для замера.",
+            author=author, category=post.category,
+        )
+        created.append(own_post)
+        client = Client(REMOTE_ADDR=REMOTE_ADDR)
+        client.force_login(staff)
+        try:
+            capture = client.get(
+                reverse("blog:post_detail", args=[post.pk]),
+                {profiling.PROFILE_PARAM: "cpu"},
+            )["X-Profile-Id"]
+        finally:
+            client.logout()
+    except BaseException:
+        delete_objects(created)
+        raise
+    return {
+        "post": post,
+        "author": author,
+        "reader": reader,
+        "staff": staff,
+        "comment": comment,
+        "capture": capture,
+        "own_post": own_post,
+        "created": created,
+    }
+
+
+def build_cases(objects, depth=DEPTH):
+    """Запросы ко всем маршрутам `blog` и `pages`."""
+    post = objects["post"]
+    own_post = objects["own_post"]
+    author = post.author
+    hot = objects["author"]
+    comment = objects["comment"]
+    category = post.category
+    detail = reverse("blog:post_detail", args=[post.pk])
+    comments = reverse("blog:post_comments", args=[post.pk])
+    index = reverse("blog:index")
+    category_url = reverse("blog:category_posts", args=[category.slug])
+    profile = reverse("blog:profile", args=[hot.username])
+    edit_post = reverse("blog:edit_post", args=[own_post.pk])
+    delete_post = reverse("blog:delete_post", args=[own_post.pk])
+    edit_comment = reverse(
+        "blog:edit_comment", args=[post.pk, comment.pk]
+    )
+    delete_comment = reverse(
+        "blog:delete_comment", args=[post.pk, comment.pk]
+    )
+    post_form = {
+        "title": "Замер",
+        "text": "Текст для замера.",
+        "pub_date": timezone.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "category": category.pk,
+        "is_published": "on",
+    }
+    word = (re.findall(r"\w+", post.title) or ["a"])[0].lower()
+    ordering = ("-pub_date", "-id")
+    cases = [
+        Case("О проекте", "pages:about", None, reverse("pages:about")),
+        Case("Правила", "pages:rules", None, reverse("pages:rules")),
+        Case("Лента", "blog:index", None, index),
+        Case("Лента (автор)", "blog:index", "author", index),
+        *deep_cases("Лента", "blog:index", None, index,
+                    Post.objects.published(), ordering, depth),
+        Case("Категория", "blog:category_posts", None, category_url),
+        *deep_cases("Категория", "blog:category_posts", None, category_url,
+                    category.posts.published(), ordering, depth),
+        Case("Профиль", "blog:profile", None, profile),
+        Case("Профиль (автор)", "blog:profile", "hot", profile),
+        Case("Профиль (читатель)", "blog:profile", "reader", profile),
+        *deep_cases("Профиль", "blog:profile", None, profile,
+                    hot.posts.published(), ordering, depth),
+        Case("Профиль: редактирование", "blog:edit_profile", "hot",
+             reverse("blog:edit_profile")),
+        Case("Пост", "blog:post_detail", None, detail),
+        Case("Пост (автор)", "blog:post_detail", "author", detail),
+        Case("Пост (читатель)", "blog:post_detail", "reader", detail),
+        Case("Комментарии", "blog:post_comments", None, comments),
+        Case("Поиск", "blog:search", None,
+             f"{reverse('blog:search')}?q={word}"),
+        Case("Новый пост: форма", "blog:create_post", "hot",
+             reverse("blog:create_post")),
+        Case("Новый пост", "blog:create_post", "hot",
+             reverse("blog:create_post"), "post", post_form),
+        Case("Правка поста: форма", "blog:edit_post", "hot", edit_post),
+        Case("Правка поста (читатель)", "blog:edit_post", "reader",
+             edit_post),
+        Case("Правка поста", "blog:edit_post", "hot", edit_post, "post",
+             post_form),
+        Case("Удаление поста: форма", "blog:delete_post", "hot",
+             delete_post),
+        Case("Удаление поста", "blog:delete_post", "hot", delete_post,
+             "post"),
+        Case("Комментарий", "blog:add_comment", "reader",
+             reverse("blog:add_comment", args=[post.pk]), "post",
+             {"text": "Комментарий для замера."}),
+        Case("Правка комментария: форма", "blog:edit_comment", "reader",
+             edit_comment),
+        Case("Правка комментария (автор поста)", "blog:edit_comment",
+             "author", edit_comment),
+        Case("Правка комментария", "blog:edit_comment", "reader",
+             edit_comment, "post", {"text": "Исправленный комментарий."}),
+        Case("Удаление комментария: форма", "blog:delete_comment",
+             "reader", delete_comment),
+        Case("Удаление комментария", "blog:delete_comment", "reader",
+             delete_comment, "post"),
+        Case("Выгрузка постов", "blog:export", "staff",
+             reverse("blog:export", args=["posts"]), repeat=1),
+        Case("Выгрузка комментариев", "blog:export", "staff",
+             reverse("blog:export", args=["comments"]), repeat=1),
+        Case("Статистика запросов", "blog:query_stats", "staff",
+             reverse("blog:query_stats")),
+        Case("Пост (профилирование)", "blog:post_detail", "staff",
+             f"{detail}?{profiling.PROFILE_PARAM}=all"),
+        Case("Профилирование: замеры", "blog:profiling", "staff",
+             reverse("blog:profiling")),
+        Case("Профилирование: замер", "blog:profiling_detail", "staff",
+             reverse("blog:profiling_detail", args=[objects["capture"]])),
+        Case("Профилирование: дамп", "blog:profiling_download", "staff",
+             reverse("blog:profiling_download", args=[objects["capture"]])),
+        Case("RSS", "blog:feed_rss", None, reverse("blog:feed_rss")),
+        Case("Atom", "blog:feed_atom", None, reverse("blog:feed_atom")),
+        Case("RSS категории", "blog:category_feed_rss", None,
+             reverse("blog:category_feed_rss", args=[category.slug])),
+        Case("Atom категории", "blog:category_feed_atom", None,
+             reverse("blog:category_feed_atom", args=[category.slug])),
+        Case("RSS автора", "blog:profile_feed_rss", None,
+             reverse("blog:profile_feed_rss", args=[hot.username])),
+        Case("Atom автора", "blog:profile_feed_atom", None,
+             reverse("blog:profile_feed_atom", args=[hot.username])),
+        Case("API: посты", "blog:api_posts", None,
+             reverse("blog:api_posts")),
+        Case("API: пост", "blog:api_post", None,
+             reverse("blog:api_post", args=[post.pk])),
+        Case("API: комментарии", "blog:api_post_comments", None,
+             reverse("blog:api_post_comments", args=[post.pk])),
+        Case("API: категории", "blog:api_categories", None,
+             reverse("blog:api_categories")),
+        Case("API: профиль", "blog:api_profile", None,
+             reverse("blog:api_profile", args=[hot.username])),
+        Case("API: посты автора", "blog:api_profile_posts", None,
+             reverse("blog:api_profile_posts", args=[hot.username])),
+    ]
+    cursor = encode_cursor(post.comments.all(), COMMENT_ORDERING, depth)
+    if cursor is not None:
+        cases.append(Case(f"Комментарии, курсор {depth}",
+                          "blog:post_comments", None,
+                          f"{comments}?after={cursor}"))
+    cursor = encode_cursor(Post.objects.published(), ordering, depth)
+    if cursor is not None:
+        cases.append(Case(f"API: посты, курсор {depth}", "blog:api_posts",
+                          None, f"{reverse('blog:api_posts')}?after={cursor}"))
+    users = {"author": author, "hot": hot, "reader": objects["reader"],
+             "staff": objects["staff"]}
+    return cases, users
+
+
+def percentile(quantiles, samples, index):
+    return quantiles[index] if quantiles else samples[0]
+
+
+def summarize(samples, queries, sql_times, template_times):
+    quantiles = (
+        statistics.quantiles(samples, n=100, method="inclusive")
+        if len(samples) > 1 else None
+    )
+    return {
+        "p50_ms": percentile(quantiles, samples, 49) * 1000,
+        "p95_ms": percentile(quantiles, samples, 94) * 1000,
+        "p99_ms": percentile(quantiles, samples, 98) * 1000,
+        "queries": max(queries),
+        "sql_ms": statistics.median(sql_times) * 1000,
+        "template_ms": statistics.median(template_times) * 1000,
+    }
+
+
+def format_row(result):
+    return "".join(
+        f"{result[column]:>13}" if column == "queries"
+        else f"{result[column]:>13.1f}"
+        for column in COLUMNS
+    )
+
+
+def find_regressions(results, baseline, threshold):
+    """Случаи, ставшие медленнее базовых или с лишними запросами."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: запросов {base['queries']} → {result['queries']}"
+            )
+        limit = base["p95_ms"] * (1 + threshold)
+        if (result["p95_ms"] > limit
+                and result["p95_ms"] - base["p95_ms"] > TOLERANCE_MS):
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']:.1f} → "
+                f"{result['p95_ms']:.1f} мс"
+            )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет все страницы blog и pages тестовым клиентом на текущей "
+        "базе (её можно заполнить командой generate_dataset): "
+        "перцентили времени ответа, число и время SQL-запросов, время "
+        "шаблонов. Сравнивает результат с сохранённым базовым и "
+        "завершается с ошибкой при регрессии. Запросы на запись, как "
+        "и на сайте, фиксируют свои транзакции; после каждого из них "
+        "изменения отменяются, а по окончании удаляются объекты, "
+        "созданные для замера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=ITERATIONS)
+        parser.add_argument("--warmup", type=int, default=WARMUP)
+        parser.add_argument(
+            "--depth", type=int, default=DEPTH,
+            help="Номер объекта, с которого начинаются дальние страницы.",
+        )
+        parser.add_argument(
+            "--only", help="Регулярное выражение для имён случаев.",
+        )
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Очищать кэш перед каждым запросом.",
+        )
+        parser.add_argument("--save", help="Сохранить результат в JSON.")
+        parser.add_argument("--baseline", help="Базовый результат (JSON).")
+        parser.add_argument(
+            "--threshold", type=float, default=THRESHOLD,
+            help="Допустимый рост p95 относительно базового, доля.",
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(
+                "DEBUG включён: замеры включают накладные расходы "
+                "отладочного режима."
+            )
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        # Замеры профилировщика пишутся во временный каталог.
+        with tempfile.TemporaryDirectory() as profiles, override_settings(
+            ALLOWED_HOSTS=hosts, BLOG_PROFILE_DIR=profiles
+        ):
+            objects = pick_objects()
+            try:
+                results = self.run(objects, options)
+            finally:
+                delete_objects(objects["created"])
+        if options["save"]:
+            Path(options["save"]).write_text(
+                json.dumps(results, ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
+        if options["baseline"]:
+            baseline = json.loads(
+                Path(options["baseline"]).read_text(encoding="utf-8")
+            )
+            regressions = find_regressions(
+                results, baseline, options["threshold"]
+            )
+            if regressions:
+                raise CommandError(
+                    "Регрессии относительно базового замера:\n"
+                    + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("Регрессий нет."))
+
+    def run(self, objects, options):
+        cases, users = build_cases(objects, options["depth"])
+        if options["only"]:
+            pattern = re.compile(options["only"])
+            cases = [case for case in cases if pattern.search(case.name)]
+        # Запросы на запись меняют только эти объекты.
+        self.touched = (objects["own_post"], objects["comment"])
+        clients = {None: Client(REMOTE_ADDR=REMOTE_ADDR)}
+        for role, user in users.items():
+            clients[role] = Client(REMOTE_ADDR=REMOTE_ADDR)
+            clients[role].force_login(user)
+        try:
+            return self.measure_cases(cases, clients, options)
+        finally:
+            for client in clients.values():
+                client.logout()
+
+    def measure_cases(self, cases, clients, options):
+        width = max(len(case.name) for case in cases)
+        self.stdout.write(
+            "случай".ljust(width) + "  код"
+            + "".join(f"{column:>13}" for column in COLUMNS)
+        )
+        results = {}
+        for case in cases:
+            status, result = self.measure(case, clients[case.role], options)
+            results[case.name] = result
+            self.stdout.write(
+                case.name.ljust(width) + f"  {status}" + format_row(result)
+            )
+        return results
+
+    def measure(self, case, client, options):
+        runs = case.repeat or options["warmup"] + options["iterations"]
+        warmup = 0 if case.repeat else options["warmup"]
+        samples, queries, sql_times, template_times = [], [], [], []
+        for iteration in range(runs):
+            if options["cold"]:
+                cache.clear()
+            if case.writes:
+                snapshot = Snapshot(self.touched)
+            with instrumentation.record() as recorder:
+                started = time.perf_counter()
+                response = getattr(client, case.method)(case.path, case.data)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                elapsed = time.perf_counter() - started
+            if case.writes:
+                # Каждый запрос на запись начинает с одних и тех же
+                # данных: удаление не должно ломать следующий замер.
+                snapshot.restore()
+            if response.status_code >= 500:
+                raise CommandError(
+                    f"{case.name}: ответ {response.status_code}"
+                )
+            if iteration < warmup:
+                continue
+            samples.append(elapsed)
+            queries.append(recorder.queries)
+            sql_times.append(recorder.sql_time)
+            template_times.append(recorder.template_time)
+        return response.status_code, summarize(
+            samples, queries, sql_times, template_times
+        )
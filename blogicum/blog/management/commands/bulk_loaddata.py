@@ -0,0 +1,272 @@
+import json
+import os
+import re
+import tempfile
+import time
+from graphlib import CycleError, TopologicalSorter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from blog import cache
+from blog.db import bulk_insert
+from blog.models import (
+    Category, Comment, Location, Post, User, make_excerpt,
+)
+from blog.signals import bump_post_lists
+
+BATCH_SIZE = 1000
+READ_SIZE = 1 << 20
+SEPARATORS_RE = re.compile(r"[\s,]*")
+
+
+def read_chunks(file, read_size):
+    while True:
+        chunk = file.read(read_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_json_array(file, read_size=READ_SIZE):
+    """Объекты JSON-массива из файла, разобранные по одному.
+
+    В памяти держится только непрочитанный остаток буфера, а не весь
+    файл, как в `loaddata`.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, opened = "", 0, False
+    for chunk in read_chunks(file, read_size):
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            position = SEPARATORS_RE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if not opened:
+                if buffer[position] != "[":
+                    raise DeserializationError("Ожидался JSON-массив.")
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Объект не поместился в буфер целиком: дочитываем.
+                break
+            yield obj
+    raise DeserializationError("Файл фикстуры оборван или повреждён.")
+
+
+def dependency_order(models):
+    """Модели в порядке, при котором ссылки по FK уже загружены."""
+    graph = TopologicalSorter()
+    for model in models:
+        graph.add(model, *(
+            field.related_model
+            for field in model._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in models
+            and field.related_model is not model
+        ))
+    try:
+        return list(graph.static_order())
+    except CycleError as error:
+        raise CommandError(f"Циклическая зависимость моделей: {error.args[1]}")
+
+
+def prepare_posts(posts):
+    for post in posts:
+        post.excerpt = make_excerpt(post.text)
+
+
+def refresh_posts(posts):
+    # Массовая вставка не вызывает Post.save() и сигналы.
+    pks = [post.pk for post in posts]
+    Post.objects.filter(pk__in=pks).refresh_visibility()
+    cache.bump(*map(cache.post_tag, pks))
+    bump_post_lists(
+        (post.category_id for post in posts),
+        (post.author_id for post in posts),
+    )
+
+
+def refresh_comments(comments):
+    post_ids = {comment.post_id for comment in comments}
+    Post.objects.filter(pk__in=post_ids).refresh_comment_count()
+    cache.bump(*map(cache.post_tag, post_ids))
+
+
+def refresh_categories(categories):
+    pks = [category.pk for category in categories]
+    # Видимость уже загруженных постов зависит от категории.
+    Post.objects.filter(category__in=pks).refresh_visibility()
+    cache.bump(*map(cache.category_tag, pks))
+    bump_post_lists(pks, Post.objects.filter(
+        category__in=pks
+    ).values_list("author_id", flat=True).distinct())
+
+
+# Что вычислить в объектах перед сохранением порции.
+BEFORE_BATCH = {
+    Post: prepare_posts,
+}
+
+# Что пересчитать и какие кэши сбросить после загрузки порции.
+AFTER_BATCH = {
+    Post: refresh_posts,
+    Comment: refresh_comments,
+    Category: refresh_categories,
+    Location: lambda objs: cache.bump(
+        *(cache.location_tag(obj.pk) for obj in objs)),
+    User: lambda objs: cache.bump(*(cache.user_tag(obj.pk) for obj in objs)),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает большие фикстуры в формате dumpdata (JSON): файл "
+        "разбирается потоково, модели загружаются в порядке зависимостей "
+        "по FK, объекты вставляются порциями в транзакциях."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixtures", nargs="+", help="Файлы фикстур.")
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Количество объектов в одной транзакции.",
+        )
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS,
+            help="База данных для загрузки.",
+        )
+
+    def handle(self, *args, fixtures, batch_size, database, **options):
+        self.using = database
+        self.batch_size = batch_size
+        started = time.monotonic()
+        with tempfile.TemporaryDirectory(prefix="bulk_loaddata-") as spool:
+            # Первый проход раскладывает объекты по файлам моделей,
+            # чтобы затем загружать их в порядке зависимостей.
+            spools, read_bytes = self.spool(fixtures, spool)
+            loaded = 0
+            for model in dependency_order(set(spools)):
+                loaded += self.load_model(model, spools[model])
+        self.reset_sequences(list(spools))
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено объектов: {loaded} за {elapsed:.1f} с "
+            f"({loaded / elapsed:.0f} объектов/с, "
+            f"{read_bytes / elapsed / 2 ** 20:.1f} МБ/с)."
+        ))
+
+    def spool(self, fixtures, directory):
+        files, spools, read_bytes = {}, {}, 0
+        try:
+            for fixture in fixtures:
+                read_bytes += os.path.getsize(fixture)
+                with open(fixture, encoding="utf-8") as source:
+                    for obj in iter_json_array(source):
+                        try:
+                            model = apps.get_model(obj["model"])
+                        except (KeyError, LookupError, ValueError) as error:
+                            raise CommandError(
+                                f"{fixture}: неизвестная модель {error}"
+                            )
+                        if model not in files:
+                            spools[model] = os.path.join(
+                                directory, f"{model._meta.label_lower}.jsonl"
+                            )
+                            files[model] = open(
+                                spools[model], "w", encoding="utf-8"
+                            )
+                        files[model].write(json.dumps(obj) + "\n")
+        finally:
+            for file in files.values():
+                file.close()
+        return spools, read_bytes
+
+    def load_model(self, model, path):
+        started = time.monotonic()
+        loaded = 0
+        with open(path, encoding="utf-8") as source:
+            batch = []
+            for line in source:
+                batch.append(json.loads(line))
+                if len(batch) == self.batch_size:
+                    loaded += self.save_batch(model, batch)
+                    batch = []
+            if batch:
+                loaded += self.save_batch(model, batch)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"{model._meta.label}: {loaded} за {elapsed:.2f} с "
+            f"({loaded / elapsed:.0f} объектов/с)"
+        )
+        return loaded
+
+    def save_batch(self, model, batch):
+        objects = list(Deserializer(
+            batch, using=self.using, ignorenonexistent=True
+        ))
+        instances = [obj.object for obj in objects]
+        now = timezone.now()
+        for instance in instances:
+            if getattr(instance, "created_at", now) is None:
+                instance.created_at = now
+        if model in BEFORE_BATCH:
+            BEFORE_BATCH[model](instances)
+        manager = model._base_manager.using(self.using)
+        with transaction.atomic(using=self.using):
+            # Как и loaddata, существующие объекты обновляются.
+            existing = set(manager.filter(
+                pk__in=[obj.pk for obj in instances]
+            ).values_list("pk", flat=True))
+            # Даты создания из фикстуры сохраняются как есть.
+            bulk_insert(
+                manager, [obj for obj in instances if obj.pk not in existing]
+            )
+            fields = [
+                field.name for field in model._meta.concrete_fields
+                if not field.primary_key
+            ]
+            if existing and fields:
+                manager.bulk_update(
+                    [obj for obj in instances if obj.pk in existing], fields
+                )
+            self.save_m2m(model, objects)
+            if model in AFTER_BATCH:
+                AFTER_BATCH[model](instances)
+        return len(instances)
+
+    def save_m2m(self, model, objects):
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+            source = field.m2m_field_name() + "_id"
+            target = field.m2m_reverse_field_name() + "_id"
+            loaded = [obj for obj in objects if field.name in obj.m2m_data]
+            if not loaded:
+                continue
+            through._base_manager.using(self.using).filter(**{
+                f"{source}__in": [obj.object.pk for obj in loaded]
+            }).delete()
+            through._base_manager.using(self.using).bulk_create(
+                through(**{source: obj.object.pk, target: related})
+                for obj in loaded
+                for related in obj.m2m_data[field.name]
+            )
+
+    def reset_sequences(self, models):
+        connection = connections[self.using]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
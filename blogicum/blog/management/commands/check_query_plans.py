@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from blog.models import Category, Post, User
+from blog.views import COMMENT_ORDERING, NUM_ON_MAIN
+
+TABLE_SCAN = "SCAN"
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def hot_querysets():
+    """Запросы страниц ленты, категории, профиля и поста."""
+    category = Category(pk=Category.objects.values_list(
+        "pk", flat=True).first() or 0)
+    author = User(pk=User.objects.values_list("pk", flat=True).first() or 0)
+    post = Post(pk=Post.objects.values_list("pk", flat=True).first() or 0)
+    return {
+        "Лента": Post.objects.published().annotated(),
+        "Категория": category.posts.published().annotated(),
+        "Профиль (автор)": author.posts.annotated(),
+        "Профиль (читатель)": author.posts.annotated().published(),
+        "Комментарии поста": post.comments.select_related(
+            "author"
+        ).order_by(*COMMENT_ORDERING),
+    }
+
+
+def problems_in_plan(plan):
+    """Возвращает строки плана с полным сканированием или сортировкой."""
+    problems = []
+    for detail in plan:
+        if detail.startswith(TEMP_SORT):
+            problems.append(detail)
+        elif detail.startswith(TABLE_SCAN) and "INDEX" not in detail:
+            problems.append(detail)
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет EXPLAIN QUERY PLAN для основных запросов блога и "
+        "завершается с ошибкой, если какой-то из них сканирует таблицу "
+        "целиком или сортирует результат во временном B-дереве."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Команда поддерживает только SQLite.")
+        failed = []
+        for name, queryset in hot_querysets().items():
+            sql, params = queryset[:NUM_ON_MAIN].query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            problems = problems_in_plan(plan)
+            style = self.style.ERROR if problems else self.style.SUCCESS
+            self.stdout.write(style(name))
+            for detail in plan:
+                self.stdout.write(f"    {detail}")
+            if problems:
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                "Неэффективный план запроса: " + ", ".join(failed)
+            )
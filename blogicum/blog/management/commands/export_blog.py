@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает посты или комментарии в JSON Lines или CSV, читая "
+        "таблицу порциями, без загрузки её в память целиком."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(export.EXPORTS))
+        parser.add_argument(
+            "--format", dest="fmt", choices=sorted(export.FORMATS),
+            default="jsonl",
+        )
+        parser.add_argument(
+            "--output", "-o",
+            help="Файл выгрузки; по умолчанию — стандартный вывод.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=export.CHUNK_SIZE,
+            help="Количество строк в одном запросе к базе.",
+        )
+
+    def handle(self, *args, kind, fmt, output, chunk_size, **options):
+        started = time.monotonic()
+        lines = export.export_lines(kind, fmt, chunk_size)
+        if output:
+            with open(output, "w", encoding="utf-8", newline="") as file:
+                count = self.write(file, lines)
+        else:
+            count = self.write(self.stdout, lines)
+        # Итог пишется в stderr, чтобы не смешиваться с выгрузкой.
+        self.stderr.write(
+            f"Выгружено строк: {count} "
+            f"за {time.monotonic() - started:.1f} с."
+        )
+
+    def write(self, file, lines):
+        count = 0
+        for line in lines:
+            file.write(line)
+            count += 1
+        return count
@@ -0,0 +1,365 @@
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog import search
+from blog.db import bulk_insert
+from blog.models import (
+    EXCERPT_LENGTH, Category, Comment, Location, Post, User, make_excerpt,
+)
+from blog.signals import bump_post_lists
+
+BATCH_SIZE = 20000
+# Пароль, с которым нельзя войти (см. make_password(None)).
+UNUSABLE_PASSWORD = "!generated"
+WORDS = (
+    "день утро вечер город дом дорога река лес море горы небо солнце "
+    "дождь снег ветер кот собака друг семья работа отпуск поезд книга "
+    "кино музыка кофе чай завтрак ужин рецепт сад огород прогулка "
+    "велосипед машина метро парк улица площадь музей выставка концерт "
+    "новый старый большой маленький тихий шумный тёплый холодный ясный "
+    "долгий короткий смешной грустный странный обычный любимый важный "
+    "сегодня вчера завтра снова наконец вдруг опять почти совсем очень "
+    "смотреть читать писать гулять думать ехать готовить слушать ждать"
+).split()
+
+# Доли по умолчанию.
+HIDDEN_CATEGORIES = 0.1
+UNPUBLISHED_POSTS = 0.03
+SCHEDULED_POSTS = 0.02
+POSTS_WITHOUT_LOCATION = 0.3
+HISTORY_DAYS = 3 * 365
+# Показатель степенного закона: чем больше, тем сильнее перекос.
+ZIPF_EXPONENT = 1.1
+
+
+def zipf_cum_weights(count, rng, exponent=ZIPF_EXPONENT):
+    """Накопленные веса для выбора с перекосом в пользу «горячих».
+
+    Веса убывают как 1 / ранг^exponent; ранги перемешаны, чтобы
+    популярные объекты не шли подряд по id.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return array("d", accumulate(weights))
+
+
+def sentence(rng, words):
+    return " ".join(rng.choices(WORDS, k=words)).capitalize()
+
+
+@contextmanager
+def loading_pragmas():
+    """Настройки SQLite для массовой вставки, по окончании — прежние.
+
+    Журнал в памяти и отказ от fsync ускоряют загрузку в разы,
+    но при сбое во время загрузки база может быть повреждена.
+    Внутри транзакции SQLite не меняет эти настройки, и загрузка
+    идёт с текущими.
+    """
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+    pragmas = {
+        "synchronous": "OFF",
+        "journal_mode": "MEMORY",
+        "temp_store": "MEMORY",
+        "cache_size": "-262144",
+    }
+    with connection.cursor() as cursor:
+        saved = {}
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}")
+            saved[name] = cursor.fetchone()[0]
+            cursor.execute(f"PRAGMA {name} = {value}")
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими данными с перекосом: популярные "
+        "авторы и посты, отложенные публикации, скрытые категории. "
+        "При одинаковых --seed и --now данные совпадают."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--locations", type=int, default=5000)
+        parser.add_argument("--posts", type=int, default=2000000)
+        parser.add_argument("--comments", type=int, default=20000000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--now",
+            help="Момент, относительно которого считаются даты (ISO); "
+                 "по умолчанию — начало текущего часа.",
+        )
+        parser.add_argument(
+            "--prefix", default="user",
+            help="Префикс имён пользователей и slug категорий.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Количество строк в одном bulk_create и транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = options["prefix"]
+        self.now = self.parse_now(options["now"])
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise CommandError(
+                f"Пользователи с префиксом «{self.prefix}» уже есть; "
+                "укажите другой --prefix."
+            )
+        if options["posts"] and not (
+            options["users"] and options["categories"]
+        ):
+            raise CommandError("Для постов нужны пользователи и категории.")
+        started = time.monotonic()
+        search.drop_triggers()
+        try:
+            with loading_pragmas():
+                users = self.create_users(options["users"])
+                categories = self.create_categories(options["categories"])
+                locations = self.create_locations(options["locations"])
+                posts = self.create_posts(
+                    options["posts"], users, categories, locations
+                )
+                self.create_comments(options["comments"], posts, users)
+        finally:
+            search.install_triggers()
+        self.step("Поисковый индекс", lambda: search.rebuild_index(
+            self.batch_size
+        ))
+        bump_post_lists(categories["ids"], users["ids"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово за {time.monotonic() - started:.0f} с."
+        ))
+
+    def parse_now(self, value):
+        if value is None:
+            return timezone.now().replace(minute=0, second=0, microsecond=0)
+        now = datetime.fromisoformat(value)
+        if timezone.is_naive(now):
+            now = timezone.make_aware(now, timezone.utc)
+        return now
+
+    def step(self, name, function):
+        started = time.monotonic()
+        count = function()
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"{name}: {count} за {elapsed:.1f} с ({count / elapsed:.0f}/с)"
+        )
+        return count
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+
+    def insert(self, model, objects):
+        """Вставляет объекты порциями, каждую в своей транзакции."""
+        count = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                count += self.flush(model, batch)
+                batch = []
+        if batch:
+            count += self.flush(model, batch)
+        return count
+
+    def flush(self, model, batch):
+        with transaction.atomic():
+            # Даты создания заданы у объектов и сохраняются как есть.
+            bulk_insert(model.objects, batch, self.batch_size)
+        return len(batch)
+
+    def past(self, days):
+        return self.now - timedelta(seconds=self.rng.uniform(0, days * 86400))
+
+    def create_users(self, count):
+        first_id = self.next_id(User)
+        ids = range(first_id, first_id + count)
+        users = (
+            User(
+                id=user_id,
+                username=f"{self.prefix}{user_id}",
+                password=UNUSABLE_PASSWORD,
+                date_joined=self.past(HISTORY_DAYS),
+            )
+            for user_id in ids
+        )
+        self.step("Пользователи", lambda: self.insert(User, users))
+        return {"ids": ids, "weights": zipf_cum_weights(count, self.rng)}
+
+    def create_categories(self, count):
+        first_id = self.next_id(Category)
+        ids = range(first_id, first_id + count)
+        published = {
+            category_id: self.rng.random() >= HIDDEN_CATEGORIES
+            for category_id in ids
+        }
+        categories = (
+            Category(
+                id=category_id,
+                title=sentence(self.rng, 2),
+                description=sentence(self.rng, 12),
+                slug=f"{self.prefix}-category-{category_id}",
+                is_published=published[category_id],
+                created_at=self.past(HISTORY_DAYS),
+            )
+            for category_id in ids
+        )
+        self.step("Категории", lambda: self.insert(Category, categories))
+        return {
+            "ids": ids,
+            "published": published,
+            "weights": zipf_cum_weights(count, self.rng, exponent=0.8),
+        }
+
+    def create_locations(self, count):
+        first_id = self.next_id(Location)
+        ids = range(first_id, first_id + count)
+        locations = (
+            Location(
+                id=location_id,
+                name=sentence(self.rng, 2),
+                is_published=self.rng.random() >= HIDDEN_CATEGORIES,
+                created_at=self.past(HISTORY_DAYS),
+            )
+            for location_id in ids
+        )
+        self.step("Места", lambda: self.insert(Location, locations))
+        return {"ids": ids}
+
+    def create_posts(self, count, users, categories, locations):
+        first_id = self.next_id(Post)
+        ids = range(first_id, first_id + count)
+        # Время публикации каждого поста нужно комментариям, а видимость —
+        # чтобы комментарии доставались только видимым постам.
+        pub_dates = array("d")
+        visible = array("b")
+        posts = (
+            self.make_post(
+                post_id, users, categories, locations, pub_dates, visible
+            )
+            for post_id in ids
+        )
+        self.step("Посты", lambda: self.insert(Post, posts))
+        commented = [offset for offset, flag in enumerate(visible) if flag]
+        return {
+            "ids": ids,
+            "pub_dates": pub_dates,
+            "commented": commented,
+            "weights": zipf_cum_weights(len(commented), self.rng),
+        }
+
+    def make_post(
+            self, post_id, users, categories, locations, pub_dates, visible):
+        rng = self.rng
+        author_id, = rng.choices(users["ids"], cum_weights=users["weights"])
+        category_id, = rng.choices(
+            categories["ids"], cum_weights=categories["weights"]
+        )
+        if rng.random() < SCHEDULED_POSTS:
+            pub_date = self.now + timedelta(seconds=rng.uniform(1, 30 * 86400))
+        else:
+            pub_date = self.past(HISTORY_DAYS)
+        is_published = rng.random() >= UNPUBLISHED_POSTS
+        is_visible = (
+            is_published
+            and pub_date <= self.now
+            and categories["published"][category_id]
+        )
+        text = "\n\n".join(
+            sentence(rng, max(3, int(rng.lognormvariate(3, 0.6))))
+            for _ in range(rng.randint(1, 6))
+        )
+        pub_dates.append(pub_date.timestamp())
+        visible.append(is_visible)
+        return Post(
+            id=post_id,
+            title=sentence(rng, rng.randint(2, 8))[:256],
+            text=text,
+            # Анонсу хватает начала текста: в словах нет комбинируемых
+            # символов, и после сжатия пробелов оно длиннее анонса.
+            excerpt=make_excerpt(text[:EXCERPT_LENGTH * 2]),
+            pub_date=pub_date,
+            created_at=min(pub_date, self.now),
+            author_id=author_id,
+            category_id=category_id,
+            location_id=(
+                None if not locations["ids"]
+                or rng.random() < POSTS_WITHOUT_LOCATION
+                else rng.choice(locations["ids"])
+            ),
+            is_published=is_published,
+            is_visible=is_visible,
+        )
+
+    def create_comments(self, count, posts, users):
+        if not posts["commented"]:
+            return
+        # Сначала распределяем комментарии по постам, затем вставляем
+        # их пост за постом, чтобы даты шли после публикации.
+        per_post = array("q", [0]) * len(posts["ids"])
+        remaining = count
+        while remaining:
+            chunk = min(remaining, self.batch_size)
+            for offset in self.rng.choices(
+                posts["commented"], cum_weights=posts["weights"], k=chunk
+            ):
+                per_post[offset] += 1
+            remaining -= chunk
+        first_id = self.next_id(Comment)
+        comments = self.make_comments(first_id, posts, per_post, users)
+        self.step("Комментарии", lambda: self.insert(Comment, comments))
+        self.step("Счётчики комментариев", lambda: self.count_comments(
+            posts["ids"]
+        ))
+
+    def make_comments(self, comment_id, posts, per_post, users):
+        rng = self.rng
+        now = self.now.timestamp()
+        for offset, total in enumerate(per_post):
+            if not total:
+                continue
+            pub_date = posts["pub_dates"][offset]
+            authors = rng.choices(
+                users["ids"], cum_weights=users["weights"], k=total
+            )
+            for author_id in authors:
+                yield Comment(
+                    id=comment_id,
+                    post_id=posts["ids"][offset],
+                    author_id=author_id,
+                    text=sentence(rng, rng.randint(3, 40)),
+                    created_at=datetime.fromtimestamp(
+                        rng.uniform(pub_date, now), timezone.utc
+                    ),
+                )
+                comment_id += 1
+
+    def count_comments(self, ids):
+        for start in range(0, len(ids), self.batch_size):
+            chunk = ids[start:start + self.batch_size]
+            with transaction.atomic():
+                Post.objects.filter(
+                    id__gte=chunk[0], id__lte=chunk[-1]
+                ).refresh_comment_count()
+        return len(ids)
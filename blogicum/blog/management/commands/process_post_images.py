@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from blog import images
+from blog.models import Post
+
+WORKERS = 4
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт уменьшенные копии изображений всех постов и записывает "
+        "их размеры. Готовые копии пропускаются, поэтому команду можно "
+        "запускать повторно."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=WORKERS,
+            help="Количество потоков обработки.",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Пересоздать уже существующие копии.",
+        )
+
+    def handle(self, *args, workers, force, **options):
+        posts = Post.objects.exclude(image="").order_by("id").values_list(
+            "id", "image"
+        )
+
+        def process(row):
+            post_id, name = row
+            try:
+                return post_id, name, images.process_image(name, force=force)
+            except (OSError, Image.DecompressionBombError) as error:
+                return post_id, name, error
+
+        started = time.monotonic()
+        processed = updated = failed = 0
+        # Изображения обрабатываются в пуле, а база обновляется
+        # в основном потоке. Посты читаются порциями по id.
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                chunk = list(posts.filter(id__gt=last_id)[:workers * 8])
+                if not chunk:
+                    break
+                last_id = chunk[-1][0]
+                for post_id, name, result in pool.map(process, chunk):
+                    if isinstance(result, Exception):
+                        failed += 1
+                        self.stderr.write(f"{name}: {result}")
+                        continue
+                    processed += 1
+                    updated += images.save_dimensions(post_id, name, result)
+        self.stdout.write(self.style.SUCCESS(
+            f"Обработано изображений: {processed}, обновлено постов: "
+            f"{updated}, ошибок: {failed} "
+            f"за {time.monotonic() - started:.1f} с."
+        ))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import cache
+from blog.models import Post
+from blog.signals import bump_post_lists
+
+
+class Command(BaseCommand):
+    help = (
+        "Открывает отложенные посты, время публикации которых наступило. "
+        "Запускается по расписанию (cron) или с --interval как служба."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Повторять проверку каждые N секунд.",
+        )
+
+    def handle(self, *args, interval, **options):
+        while True:
+            published = self.publish_due_posts()
+            if published:
+                self.stdout.write(f"Опубликовано постов: {published}")
+            if not interval:
+                break
+            time.sleep(interval)
+
+    def publish_due_posts(self):
+        with transaction.atomic():
+            due = list(Post.objects.due_for_publication().values_list(
+                "id", "category_id", "author_id"
+            ))
+            if not due:
+                return 0
+            post_ids, category_ids, author_ids = zip(*due)
+            Post.objects.filter(id__in=post_ids).refresh_visibility()
+        cache.bump(*map(cache.post_tag, post_ids))
+        bump_post_lists(category_ids, author_ids)
+        return len(post_ids)
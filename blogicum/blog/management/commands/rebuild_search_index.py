@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from blog import search
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс постов порциями."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Количество постов, индексируемых в одной транзакции.",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if not search.search_available(connection):
+            raise CommandError("Поиск поддерживается только на SQLite.")
+        search.install_triggers(connection)
+        started = time.monotonic()
+        indexed = search.rebuild_index(
+            batch_size,
+            progress=lambda done: self.stdout.write(
+                f"Проиндексировано: {done}"
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Индекс перестроен: {indexed} постов "
+            f"за {time.monotonic() - started:.1f} с."
+        ))
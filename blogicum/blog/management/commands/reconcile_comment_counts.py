@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import cache
+from blog.models import Post
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет Post.comment_count с фактическим количеством комментариев "
+        "и исправляет расхождения порциями."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=CHUNK_SIZE,
+            help="Количество постов, обрабатываемых в одной транзакции.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Только показать расхождения, ничего не исправляя.",
+        )
+
+    def handle(self, *args, chunk_size, dry_run, **options):
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    Post.objects.filter(id__gt=last_id)
+                    .order_by("id")
+                    .with_actual_comment_count()
+                    .values_list("id", "comment_count", "actual_comment_count")
+                    [:chunk_size]
+                )
+                if not chunk:
+                    break
+                drifted = []
+                for post_id, stored, actual in chunk:
+                    if stored != actual:
+                        drifted.append(post_id)
+                        self.stdout.write(
+                            f"Пост {post_id}: {stored} -> {actual}"
+                        )
+                if drifted and not dry_run:
+                    Post.objects.filter(id__in=drifted).refresh_comment_count()
+                    cache.bump(*map(cache.post_tag, drifted))
+                fixed += len(drifted)
+            checked += len(chunk)
+            last_id = chunk[-1][0]
+        verb = "Найдено" if dry_run else "Исправлено"
+        self.stdout.write(self.style.SUCCESS(
+            f"Проверено постов: {checked}. {verb} расхождений: {fixed}."
+        ))
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.warmup import warm_up
+from blogicum.startup import StartupTimer
+
+IMPORTTIME_PREFIX = "import time:"
+IMPORTTIME_SCRIPT = "import django; django.setup()"
+
+
+def parse_importtime(lines):
+    """Собственное время импорта (мкс) по пакетам верхнего уровня.
+
+    Складывается собственное время модулей: суммарное время
+    вложенных импортов посчитало бы их несколько раз.
+    """
+    packages = Counter()
+    for line in lines:
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        self_us, _, name = line[len(IMPORTTIME_PREFIX):].split("|")
+        if not self_us.strip().isdigit():
+            # Строка заголовка.
+            continue
+        packages[name.strip().split(".")[0]] += int(self_us)
+    return packages
+
+
+def measure_imports():
+    """Запускает django.setup() в отдельном процессе с -X importtime."""
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "blogicum.settings")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORTTIME_SCRIPT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(
+            "Не удалось выполнить django.setup():\n" + result.stderr[-2000:]
+        )
+    return parse_importtime(result.stderr.splitlines())
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогревает процесс: разбирает шаблоны, строит резолвер адресов "
+        "и метаданные моделей, открывает соединения с БД и заполняет "
+        "кэш ленты, лент RSS/Atom и категорий. Печатает время шагов, "
+        "а с --imports — время импорта пакетов при запуске."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--skip-pages", action="store_true",
+            help="Не запрашивать страницы для заполнения кэша.",
+        )
+        parser.add_argument(
+            "--imports", type=int, default=0, metavar="N",
+            help="Показать N пакетов с наибольшим временем импорта.",
+        )
+
+    def handle(self, *args, **options):
+        timer = StartupTimer()
+        warm_up(timer, pages=not options["skip_pages"])
+        for name, duration, detail in timer.steps:
+            self.stdout.write(
+                f"{name:<20} {duration * 1000:>9.1f} мс  {detail}"
+            )
+        self.stdout.write(f"{'итого':<20} {timer.total * 1000:>9.1f} мс")
+        if options["imports"] > 0:
+            self.write_imports(measure_imports(), options["imports"])
+
+    def write_imports(self, packages, top):
+        total = sum(packages.values())
+        self.stdout.write("")
+        self.stdout.write(
+            f"Импорт при django.setup(): {total / 1000:.1f} мс"
+        )
+        for name, self_us in packages.most_common(top):
+            self.stdout.write(
+                f"{name:<30} {self_us / 1000:>9.1f} мс "
+                f"{self_us / total:>6.1%}"
+            )
@@ -1,19 +1,69 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
 class PostQuerySet(models.QuerySet):
     def published(self):
-        """Возвращает опубликованные посты."""
+        """Возвращает опубликованные посты.
+
+        Видимость хранится в `Post.is_visible`: её пересчитывают при
+        сохранении поста и его категории, а отложенные посты открывает
+        команда `publish_scheduled_posts`.
+        """
+        return self.filter(is_visible=True)
+
+    def due_for_publication(self):
+        """Скрытые посты, которые уже должны быть видны."""
         return self.filter(
+            is_visible=False,
             is_published=True,
             category__is_published=True,
-            pub_date__lte=timezone.now()
+            pub_date__lte=timezone.now(),
         )
 
+    def refresh_visibility(self):
+        """Пересчитывает `is_visible` постов одним UPDATE."""
+        categories = self.model._meta.get_field("category").related_model
+        return self.update(is_visible=models.Case(
+            models.When(
+                is_published=True,
+                pub_date__lte=timezone.now(),
+                category__in=categories.objects.filter(is_published=True),
+                then=models.Value(True),
+            ),
+            default=models.Value(False),
+        ))
+
+    def visible_to(self, user):
+        """Опубликованные посты, а автору — ещё и все его собственные."""
+        if not user.is_authenticated:
+            return self.published()
+        return self.published() | self.filter(author=user)
+
     def annotated(self):
-        return self.annotate(
-            comment_count=models.Count('comments')
-        ).order_by('-pub_date').select_related(
+        # Количество комментариев хранится в `Post.comment_count`,
+        # поэтому агрегировать таблицу комментариев не нужно.
+        return self.order_by('-pub_date', '-id').select_related(
             'category', 'author', 'location',
         )
+
+    def refresh_comment_count(self):
+        """Пересчитывает `comment_count` постов одним UPDATE.
+
+        Количество считается подзапросом внутри UPDATE, поэтому
+        комментарии, добавленные во время пересчёта, не теряются.
+        """
+        comments = self.model._meta.get_field("comments").related_model
+        counts = comments.objects.filter(
+            post=models.OuterRef("pk")
+        ).order_by().values("post").annotate(
+            total=models.Count("pk")
+        ).values("total")
+        return self.update(comment_count=Coalesce(
+            models.Subquery(counts, output_field=models.IntegerField()), 0
+        ))
+
+    def with_actual_comment_count(self):
+        """Возвращает посты с фактическим количеством комментариев."""
+        return self.annotate(actual_comment_count=models.Count('comments'))
@@ -0,0 +1,86 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+
+from . import instrumentation, profiling
+
+
+class QueryStatsMiddleware:
+    """Выборочные замеры SQL и шаблонов по представлениям.
+
+    Для доли запросов `BLOG_QUERY_STATS_RATE` (или доли из
+    `BLOG_QUERY_STATS_VIEW_RATES` для отдельного представления)
+    считает запросы к БД, их время, повторы одинаковых запросов,
+    время шаблонов и размер ответа. Замеры копятся в
+    `instrumentation.STATS` и попадают в заголовок `Server-Timing`.
+    Для доли `BLOG_QUERY_LOG_RATE` запросы к БД дописываются
+    в журнал `BLOG_QUERY_LOG`. Остальные запросы проходят без замера.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        recording = getattr(request, "_query_stats", None)
+        if recording is None:
+            return response
+        stack, recorder, started, stats = recording
+        stack.close()
+        duration = time.perf_counter() - started
+        view_name = request.resolver_match.view_name
+        if recorder.log:
+            instrumentation.write_query_log(
+                settings.BLOG_QUERY_LOG, view_name, recorder
+            )
+        if not stats:
+            return response
+        size = 0 if response.streaming else len(response.content)
+        instrumentation.STATS.add(view_name, recorder, duration, size)
+        response["Server-Timing"] = ", ".join((
+            f'sql;dur={recorder.sql_time * 1000:.1f};'
+            f'desc="{recorder.queries} queries"',
+            f"tpl;dur={recorder.template_time * 1000:.1f}",
+            f"total;dur={duration * 1000:.1f}",
+        ))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Доля выбирается после разрешения адреса, чтобы её можно было
+        # задать для отдельного представления.
+        rate = getattr(settings, "BLOG_QUERY_STATS_VIEW_RATES", {}).get(
+            request.resolver_match.view_name,
+            getattr(settings, "BLOG_QUERY_STATS_RATE", 0),
+        )
+        stats = bool(rate) and random.random() < rate
+        rate = getattr(settings, "BLOG_QUERY_LOG_RATE", 0)
+        log = bool(rate) and random.random() < rate
+        if not (stats or log):
+            return None
+        stack = ExitStack()
+        recorder = stack.enter_context(instrumentation.record(
+            instrumentation.Recorder(keep_queries=log)
+        ))
+        request._query_stats = (stack, recorder, time.perf_counter(), stats)
+        return None
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос сотрудника по `?_profile=` или `X-Profile`.
+
+    Для остальных запросов — одна проверка наличия параметра.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (profiling.PROFILE_PARAM not in request.GET
+                and profiling.PROFILE_HEADER not in request.META):
+            return self.get_response(request)
+        kinds = profiling.requested_kinds(request)
+        if not kinds or not request.user.is_staff:
+            return self.get_response(request)
+        return profiling.run_profiled(request, self.get_response, kinds)
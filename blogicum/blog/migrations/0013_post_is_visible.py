@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 16:54
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_is_visible(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Category = apps.get_model('blog', 'Category')
+    Post.objects.update(is_visible=models.Case(
+        models.When(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__in=Category.objects.filter(is_published=True),
+            then=models.Value(True),
+        ),
+        default=models.Value(False),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_comment_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_feed_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Пост опубликован, его категория опубликована и время публикации наступило.', verbose_name='Виден читателям'),
+        ),
+        migrations.RunPython(fill_is_visible, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['-pub_date', '-id'], name='post_visible_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_size',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Размеры фото'),
+        ),
+    ]
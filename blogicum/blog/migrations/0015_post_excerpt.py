@@ -0,0 +1,38 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:02
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+
+def fill_excerpt(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    last_id = 0
+    while True:
+        posts = list(
+            Post.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'text')[:BATCH_SIZE]
+        )
+        if not posts:
+            break
+        for post in posts:
+            post.excerpt = Truncator(' '.join(post.text.split())).chars(280)
+        Post.objects.bulk_update(posts, ['excerpt'])
+        last_id = posts[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_image_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=280, verbose_name='Анонс'),
+        ),
+        migrations.RunPython(fill_excerpt, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,100 @@
+import time
+from functools import wraps
+
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.db import models
+from django.http import Http404
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
 
+from . import cache, db
+from .cache import attach_card_versions
 from .models import Comment
+from .paginators import InvalidCursor, KeysetPaginator
+
+
+def memoize_per_request(method):
+    """Кэширует результат метода представления до конца запроса.
+
+    Значение хранится на объекте запроса, поэтому объект из URL
+    (категория, профиль, пост) загружается один раз, сколько бы раз
+    его ни запрашивали `get_queryset` и `get_context_data`.
+    Аргументы метода должны быть хешируемыми.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        memo = self.request.__dict__.setdefault("_blog_memo", {})
+        key = (method.__qualname__, args, frozenset(kwargs.items()))
+        if key not in memo:
+            memo[key] = method(self, *args, **kwargs)
+        return memo[key]
+    return wrapper
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
+    """Пускает к объекту только его автора.
+
+    Объект загружается один раз: проверка доступа и само
+    представление используют один и тот же экземпляр. Для проверки
+    достаточно `author_id`, автор из базы не загружается. Если
+    представлению нужны не все поля, их можно перечислить
+    в `object_fields`.
+    """
+
+    object_fields = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.object_fields:
+            queryset = queryset.only(*self.object_fields)
+        return queryset
+
+    @memoize_per_request
+    def get_object(self, queryset=None):
+        return super().get_object(queryset)
+
+    def test_func(self):
+        return self.get_object().author_id == self.request.user.pk
+
+
+class StaffRequiredMixin(UserPassesTestMixin):
+    """Пускает только сотрудников (`is_staff`)."""
 
     def test_func(self):
-        obj = self.get_object()
-        return obj.author == self.request.user
+        return self.request.user.is_staff
+
+
+class RetryOnLockMixin:
+    """Сохраняет форму создания в транзакции, повторяя её при блокировке.
+
+    Перед каждой попыткой объект снова считается новым: после отката
+    у него мог остаться `pk` от вставки, которой больше нет.
+    Загруженный файл записывается в хранилище первой попыткой,
+    следующие используют его же; если сохранить объект так и не
+    удалось, файл удаляется.
+    """
+
+    def form_valid(self, form):
+        def save():
+            form.instance.pk = None
+            form.instance._state.adding = True
+            return super(RetryOnLockMixin, self).form_valid(form)
+
+        uploads = [
+            field.attname for field in form.instance._meta.concrete_fields
+            if isinstance(field, models.FileField)
+            and getattr(form.instance, field.attname)
+            and not getattr(form.instance, field.attname)._committed
+        ]
+        try:
+            return db.retry_on_lock(save)
+        except Exception:
+            for name in uploads:
+                file = getattr(form.instance, name)
+                if file and file._committed:
+                    file.delete(save=False)
+            raise
 
 
 class CommentEditMixin:
@@ -18,3 +104,166 @@ class CommentEditMixin:
 
     def get_success_url(self):
         return reverse("blog:post_detail", kwargs={"pk": self.kwargs["pk"]})
+
+
+class KeysetPaginationMixin:
+    """Курсорная пагинация списка постов по `(pub_date, id)`.
+
+    Включается настройкой `BLOG_CURSOR_PAGINATION` либо наличием
+    в запросе параметров `?after=` / `?before=`; иначе работает
+    обычная постраничная пагинация `ListView`.
+    """
+
+    keyset_ordering = ("-pub_date", "-id")
+
+    def get_keyset_paginator(self, queryset, page_size):
+        return KeysetPaginator(queryset, page_size, self.keyset_ordering)
+
+    def use_keyset_pagination(self):
+        params = self.request.GET
+        return (
+            getattr(settings, "BLOG_CURSOR_PAGINATION", False)
+            or "after" in params
+            or "before" in params
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_keyset_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.get_keyset_paginator(queryset, page_size)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+            )
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class CacheTagsMixin:
+    """Теги объектов, от которых зависит отрисованная страница.
+
+    Представление перечисляет теги в `get_cache_tags()`; они
+    собираются перед рендером и используются кэшем страниц
+    и валидаторами условных запросов; момент начала запроса
+    `versions_since` — ещё и кэшем карточек.
+    """
+
+    cache_tags = ()
+    versions_since = None
+
+    def dispatch(self, request, *args, **kwargs):
+        # Начало чтения данных страницы: с версиями, опубликованными
+        # позже, страница может оказаться устаревшей.
+        self.versions_since = time.time_ns()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_cache_tags(self, context):
+        return ()
+
+    def render_to_response(self, context, **response_kwargs):
+        self.cache_tags = self.get_cache_tags(context)
+        return super().render_to_response(context, **response_kwargs)
+
+
+class PostCardCacheMixin(CacheTagsMixin):
+    """Проставляет постам страницы версии для кэша карточек."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        attach_card_versions(context["page_obj"], self.versions_since)
+        context["post_card_cache_timeout"] = settings.POST_CARD_CACHE_TIMEOUT
+        return context
+
+
+class PageCacheMixin(CacheTagsMixin):
+    """Кэш целых страниц для анонимных посетителей.
+
+    Страница сохраняется вместе с версиями тегов из `get_cache_tags()`
+    и отдаётся из кэша, пока ни один из тегов не изменился. Шапка
+    с данными пользователя подключается через `{% page_cache_hole %}`
+    и дорисовывается при каждой отдаче, поэтому при
+    `page_cache_for_authenticated = True` тем же телом страницы
+    пользуются и авторизованные посетители.
+    """
+
+    page_cache_for_authenticated = False
+
+    def page_cache_enabled(self):
+        if self.request.method not in ("GET", "HEAD"):
+            return False
+        if not settings.BLOG_PAGE_CACHE_TIMEOUT:
+            return False
+        return (
+            self.page_cache_for_authenticated
+            or not self.request.user.is_authenticated
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        self.page_cache = self.page_cache_enabled()
+        if not self.page_cache:
+            return super().dispatch(request, *args, **kwargs)
+        key = cache.page_key(request)
+        entry = cache.cached_page(key)
+        if entry is not None:
+            return cache.page_response(entry, request)
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and hasattr(response, "render"):
+            response.add_post_render_callback(
+                lambda response: self.store_page(key, response)
+            )
+        return response
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.page_cache:
+            context["page_cache_holes"] = True
+        return super().render_to_response(context, **response_kwargs)
+
+    def store_page(self, key, response):
+        cache.store_page(
+            key, response, self.cache_tags,
+            settings.BLOG_PAGE_CACHE_TIMEOUT, self.versions_since,
+        )
+        response.content = cache.fill_holes(response.content, self.request)
+
+
+class ConditionalGetMixin(CacheTagsMixin):
+    """ETag и Last-Modified по версиям тегов страницы.
+
+    После рендера валидаторы запоминаются в кэше вместе с версиями
+    тегов. Повторный запрос с `If-None-Match`/`If-Modified-Since`
+    сверяет только эти версии и при совпадении получает 304 без
+    обращения к базе и отрисовки шаблонов. Last-Modified — время
+    последнего изменения любого из объектов страницы. Ответ, теги
+    которого изменились во время отрисовки, валидаторов не получает.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        key = cache.validators_key(request)
+        validators = cache.cached_validators(key)
+        if validators is not None:
+            response = get_conditional_response(request, **validators)
+            if response is not None:
+                return cache.set_validators(response, **validators)
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if hasattr(response, "render") and not response.is_rendered:
+            response.add_post_render_callback(
+                lambda response: self.store_validators(key, response)
+            )
+        elif validators is not None:
+            # Страница из кэша страниц: валидаторы уже известны.
+            cache.set_validators(response, **validators)
+        return response
+
+    def store_validators(self, key, response):
+        validators = cache.store_validators(
+            key, self.cache_tags,
+            settings.BLOG_CONDITIONAL_GET_TIMEOUT, self.versions_since,
+        )
+        if validators is not None:
+            cache.set_validators(response, **validators)
@@ -1,12 +1,14 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
+from django.utils.text import Truncator
 
 from .managers import PostQuerySet
 
 User = get_user_model()
 
 MAX_LENGTH = 256
+EXCERPT_LENGTH = 280
 
 
 class PublishedModel(models.Model):
@@ -50,11 +52,19 @@ class Location(PublishedModel):
         return self.name
 
 
+def make_excerpt(text):
+    return Truncator(" ".join(text.split())).chars(EXCERPT_LENGTH)
+
+
 class Post(PublishedModel):
     title = models.CharField(
         "Заголовок", max_length=MAX_LENGTH, default="Untitled Post"
     )
     text = models.TextField("Текст", default="No content")
+    # Начало текста для лент и списков, чтобы не читать текст целиком.
+    excerpt = models.CharField(
+        "Анонс", max_length=EXCERPT_LENGTH, blank=True, editable=False
+    )
     pub_date = models.DateTimeField(
         "Дата и время публикации",
         default=timezone.now,
@@ -78,6 +88,20 @@ class Post(PublishedModel):
         on_delete=models.SET_NULL,
     )
     image = models.ImageField("Фото", upload_to="post_images", blank=True)
+    # Размеры оригинала и имена копий: {"width": ..., "height": ...,
+    # "variants": {"640": имя, ...}}. Заполняются после создания
+    # уменьшенных копий (см. blog/images.py).
+    image_size = models.JSONField(
+        "Размеры фото", default=dict, blank=True, editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        "Количество комментариев", default=0, editable=False
+    )
+    is_visible = models.BooleanField(
+        "Виден читателям", default=False, editable=False,
+        help_text="Пост опубликован, его категория опубликована "
+                  "и время публикации наступило.",
+    )
 
     objects = PostQuerySet.as_manager()
 
@@ -88,10 +112,47 @@ class Post(PublishedModel):
         # порядке убывания
         default_related_name = "posts"  # Установленное общее имя
         # для всех связанных объектов
+        indexes = (
+            # Лента: опубликованные посты, новые сверху.
+            models.Index(
+                fields=("-pub_date", "-id"),
+                condition=models.Q(is_visible=True),
+                name="post_visible_feed_idx",
+            ),
+            # Страница профиля автора.
+            models.Index(
+                fields=("author", "-pub_date", "-id"),
+                name="post_author_feed_idx",
+            ),
+            # Страница категории.
+            models.Index(
+                fields=("category", "-pub_date", "-id"),
+                name="post_category_feed_idx",
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.is_visible = self.is_visible_now()
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields, "is_visible", "excerpt"
+            }
+        super().save(*args, **kwargs)
+
+    def is_visible_now(self):
+        """Должен ли пост сейчас быть виден читателям."""
+        return bool(
+            self.is_published
+            and self.category_id is not None
+            and self.category.is_published
+            and self.pub_date <= timezone.now()
+        )
+
 
 class Comment(models.Model):
     text = models.TextField(
@@ -111,3 +172,10 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = (
+            # Комментарии поста в порядке написания.
+            models.Index(
+                fields=("post", "created_at", "id"),
+                name="comment_post_created_idx",
+            ),
+        )
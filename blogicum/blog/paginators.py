@@ -0,0 +1,151 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class KeysetPage(Sequence):
+    """Страница курсорной пагинации.
+
+    Повторяет интерфейс `django.core.paginator.Page` в той мере,
+    в какой он нужен шаблонам, но без номеров страниц: вместо них
+    страница отдаёт непрозрачные курсоры на соседние страницы.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class KeysetPaginator:
+    """Пагинация по ключу сортировки вместо OFFSET.
+
+    Страница выбирается условием «строго после/до курсора» по полям
+    сортировки, поэтому стоимость запроса не зависит от глубины
+    страницы, а общее количество объектов (COUNT) не считается.
+    Последнее поле сортировки должно быть уникальным.
+    """
+
+    def __init__(self, queryset, per_page, ordering=("-pub_date", "-id")):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(name.lstrip("-") for name in self.ordering)
+        self.descending = tuple(name.startswith("-") for name in self.ordering)
+
+    def page(self, after=None, before=None):
+        if after and before:
+            raise InvalidCursor("Укажите только один из курсоров.")
+        queryset = self.queryset.order_by(*self.ordering)
+        if before:
+            reverse = [
+                name if desc else f"-{name}"
+                for name, desc in zip(self.fields, self.descending)
+            ]
+            queryset = self.seek(
+                queryset, self.decode_cursor(before), forward=False
+            ).order_by(*reverse)
+            rows = list(queryset[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(rows, self, True, has_previous)
+        if after:
+            queryset = self.seek(
+                queryset, self.decode_cursor(after), forward=True
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(rows[:self.per_page], self, has_next, bool(after))
+
+    def seek(self, queryset, values, forward):
+        """Оставляет строки строго после (или до) курсора."""
+        return queryset.filter(self._seek(values, forward))
+
+    def _seek(self, values, forward):
+        """Лексикографическое условие `(f1, f2, ...) > / < курсор`."""
+        condition = Q()
+        for index, name in enumerate(self.fields):
+            ahead = forward != self.descending[index]
+            lookup = "gt" if ahead else "lt"
+            step = Q(**{f"{name}__{lookup}": values[index]})
+            for prev in range(index):
+                step &= Q(**{self.fields[prev]: values[prev]})
+            condition |= step
+        return condition
+
+    def _value(self, obj, name):
+        if isinstance(obj, dict):
+            return obj[name]
+        return getattr(obj, name)
+
+    def encode_cursor(self, obj):
+        values = []
+        for name in self.fields:
+            value = self._value(obj, name)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, ValueError, UnicodeError):
+            raise InvalidCursor("Некорректный курсор.")
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor("Некорректный курсор.")
+        try:
+            return [
+                self.to_python(name, value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise InvalidCursor("Некорректный курсор.")
+
+    def to_python(self, name, value):
+        return self.queryset.model._meta.get_field(name).to_python(value)
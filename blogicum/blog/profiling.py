@@ -0,0 +1,156 @@
+"""Профилирование отдельных запросов сотрудников по требованию.
+
+Запрос с параметром `?_profile=cpu|memory|all` или заголовком
+`X-Profile` выполняется под cProfile и/или tracemalloc. Результат
+(дамп pstats и крупнейшие выделения памяти) сохраняется в каталог
+`BLOG_PROFILE_DIR` и доступен на странице `blog:profiling`.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import secrets
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_PARAM = "_profile"
+PROFILE_HEADER = "HTTP_X_PROFILE"
+KINDS = ("cpu", "memory")
+CAPTURE_ID_RE = re.compile(r"\d{8}-\d{12}-[0-9a-f]{6}")
+# Глубина стека, которую запоминает tracemalloc.
+TRACE_FRAMES = 10
+TOP_ALLOCATIONS = 30
+TOP_FUNCTIONS = 60
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def profile_dir():
+    return Path(settings.BLOG_PROFILE_DIR)
+
+
+def requested_kinds(request):
+    """Что профилировать по параметру или заголовку запроса."""
+    value = request.GET.get(PROFILE_PARAM, request.META.get(PROFILE_HEADER))
+    if value is None:
+        return ()
+    if value in ("", "1", "all"):
+        return KINDS
+    names = {name.strip() for name in value.split(",")}
+    return tuple(kind for kind in KINDS if kind in names)
+
+
+def run_profiled(request, get_response, kinds):
+    """Выполняет запрос под профилировщиками и сохраняет результат."""
+    profiler = cProfile.Profile() if "cpu" in kinds else None
+    # tracemalloc общий на процесс: параллельный запрос его не получит.
+    tracing = "memory" in kinds and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        if profiler:
+            profiler.disable()
+        duration = time.perf_counter() - started
+        snapshot = peak = None
+        if tracing:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    capture_id = save_capture(request, response, duration, profiler,
+                              snapshot, peak)
+    response["X-Profile-Id"] = capture_id
+    return response
+
+
+def top_allocations(snapshot):
+    statistics = snapshot.filter_traces(IGNORED_FRAMES).statistics("lineno")
+    return [
+        {"place": str(stat.traceback[0]), "size": stat.size,
+         "count": stat.count}
+        for stat in statistics[:TOP_ALLOCATIONS]
+    ]
+
+
+def save_capture(request, response, duration, profiler, snapshot, peak):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    now = timezone.now()
+    capture_id = f"{now:%Y%m%d-%H%M%S%f}-{secrets.token_hex(3)}"
+    if profiler:
+        profiler.dump_stats(directory / f"{capture_id}.prof")
+    match = request.resolver_match
+    meta = {
+        "id": capture_id,
+        "time": now.isoformat(),
+        "path": request.get_full_path(),
+        "view": match.view_name if match else None,
+        "user": request.user.get_username(),
+        "status": response.status_code,
+        "duration_ms": duration * 1000,
+        "cpu": profiler is not None,
+        "peak_memory": peak,
+        "allocations": top_allocations(snapshot) if snapshot else None,
+    }
+    (directory / f"{capture_id}.json").write_text(
+        json.dumps(meta, ensure_ascii=False), encoding="utf-8"
+    )
+    remove_old_captures(directory)
+    return capture_id
+
+
+def remove_old_captures(directory):
+    keep = getattr(settings, "BLOG_PROFILE_KEEP", 100)
+    for meta in sorted(directory.glob("*.json"), reverse=True)[keep:]:
+        for path in (meta, meta.with_suffix(".prof")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def list_captures():
+    """Сохранённые замеры, новые первыми."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    return [
+        json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted(directory.glob("*.json"), reverse=True)
+    ]
+
+
+def load_capture(capture_id):
+    """Описание замера или None, если такого нет."""
+    if not CAPTURE_ID_RE.fullmatch(capture_id):
+        return None
+    path = profile_dir() / f"{capture_id}.json"
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def stats_path(capture_id):
+    return profile_dir() / f"{capture_id}.prof"
+
+
+def stats_report(capture_id, sort="cumulative"):
+    """Текстовая таблица pstats с самыми затратными функциями."""
+    stream = io.StringIO()
+    stats = pstats.Stats(str(stats_path(capture_id)), stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(TOP_FUNCTIONS)
+    return stream.getvalue()
@@ -0,0 +1,174 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс `blog_post_fts` — виртуальная таблица FTS5 с внешним
+содержимым (`content='blog_post'`): сам текст хранится только
+в `blog_post`, а индекс обновляют триггеры на вставку, изменение
+и удаление постов.
+"""
+import re
+
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .paginators import KeysetPaginator
+
+FTS_TABLE = "blog_post_fts"
+# Вес заголовка в bm25 выше, чем у текста.
+RANK_SQL = f"bm25({FTS_TABLE}, 10.0, 1.0)"
+SNIPPET_OPEN = "\x02"
+SNIPPET_CLOSE = "\x03"
+SNIPPET_SQL = f"snippet({FTS_TABLE}, -1, char(2), char(3), '…', 16)"
+TOKEN_RE = re.compile(r"\w+")
+
+TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blog_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blog_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, text ON blog_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+
+
+def search_available(using=connection):
+    return using.vendor == "sqlite"
+
+
+def install_triggers(using=connection):
+    """Создаёт триггеры индекса, если их нет.
+
+    На SQLite Django пересоздаёт таблицу при изменении её схемы,
+    и триггеры исчезают вместе со старой таблицей, поэтому они
+    восстанавливаются после каждой миграции.
+    """
+    if not search_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE],
+        )
+        if cursor.fetchone() is None:
+            return
+        for statement in TRIGGERS:
+            cursor.execute(statement)
+
+
+def drop_triggers(using=connection):
+    """Удаляет триггеры индекса перед массовой загрузкой постов.
+
+    После загрузки индекс перестраивается `rebuild_index()`,
+    а триггеры возвращает `install_triggers()`.
+    """
+    if not search_available(using):
+        return
+    with using.cursor() as cursor:
+        for suffix in ("ai", "ad", "au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+
+
+def rebuild_index(batch_size, progress=None):
+    """Заполняет индекс заново порциями по `batch_size` постов."""
+    indexed = last_id = 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+        )
+        while True:
+            with transaction.atomic():
+                cursor.execute(
+                    "SELECT count(*), max(id) FROM (SELECT id FROM blog_post "
+                    "WHERE id > %s ORDER BY id LIMIT %s)",
+                    [last_id, batch_size],
+                )
+                count, batch_last_id = cursor.fetchone()
+                if not count:
+                    break
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}(rowid, title, text) "
+                    "SELECT id, title, text FROM blog_post "
+                    "WHERE id > %s AND id <= %s",
+                    [last_id, batch_last_id],
+                )
+            indexed += count
+            last_id = batch_last_id
+            if progress:
+                progress(indexed)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+    return indexed
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово ищется как префикс, все слова обязательны.
+    """
+    return " ".join(f'"{token}"*' for token in TOKEN_RE.findall(query))
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет найденные слова тегом <mark>."""
+    return mark_safe(escape(snippet).replace(
+        SNIPPET_OPEN, "<mark>"
+    ).replace(SNIPPET_CLOSE, "</mark>"))
+
+
+def search_posts(queryset, query):
+    """Посты из `queryset`, найденные по запросу, с рангом и фрагментом.
+
+    Видимость определяется переданным `queryset`, поэтому поиск
+    соблюдает те же правила, что и остальные страницы.
+    """
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE}.rowid = blog_post.id",
+            f"{FTS_TABLE} MATCH %s",
+        ],
+        params=[match_expression(query)],
+        select={"rank": RANK_SQL, "snippet": SNIPPET_SQL},
+    )
+
+
+class SearchPaginator(KeysetPaginator):
+    """Курсорная пагинация результатов поиска по `(rank, id)`."""
+
+    def __init__(self, queryset, per_page):
+        super().__init__(queryset, per_page, ordering=("rank", "id"))
+
+    def seek(self, queryset, values, forward):
+        rank, post_id = values
+        sign = ">" if forward else "<"
+        return queryset.extra(
+            where=[
+                f"({RANK_SQL} {sign} %s OR "
+                f"({RANK_SQL} = %s AND blog_post.id {sign} %s))"
+            ],
+            params=[rank, rank, post_id],
+        )
+
+    def to_python(self, name, value):
+        if name == "rank":
+            return float(value)
+        return super().to_python(name, value)
@@ -0,0 +1,151 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import cache, db, images, search
+from .models import Category, Comment, Location, Post, User, make_excerpt
+
+
+POST_MEMBERSHIP_FIELDS = (
+    "category_id", "author_id", "is_visible", "pub_date",
+)
+
+
+def post_membership(post):
+    """Поля поста, от которых зависит его место в списках."""
+    return tuple(getattr(post, field) for field in POST_MEMBERSHIP_FIELDS)
+
+
+def bump_post_lists(category_ids=(), author_ids=()):
+    """Сбрасывает ленту и страницы категорий и профилей."""
+    cache.bump(
+        cache.FEED_TAG,
+        *map(cache.category_posts_tag, set(category_ids) - {None}),
+        *map(cache.profile_posts_tag, set(author_ids)),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Увеличивает счётчик комментариев поста при создании комментария."""
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F("comment_count") + 1
+        )
+    cache.bump(cache.post_tag(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшает счётчик при удалении, в том числе каскадном и из админки."""
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F("comment_count") - 1
+    )
+    cache.bump(cache.post_tag(instance.post_id))
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_membership(sender, instance, raw=False, **kwargs):
+    instance._old_membership = None
+    instance._image_changed = False
+    if raw:
+        # loaddata сохраняет пост без Post.save(), а в старых дампах
+        # нет вычисляемых полей.
+        instance.is_visible = instance.is_visible_now()
+        instance.excerpt = make_excerpt(instance.text)
+        return
+    old_image = None
+    if not instance._state.adding:
+        old = Post.objects.filter(pk=instance.pk).values_list(
+            *POST_MEMBERSHIP_FIELDS, "image"
+        ).first()
+        if old is not None:
+            instance._old_membership, old_image = old[:-1], old[-1]
+    if (instance.image.name or None) != (old_image or None):
+        # Размеры старого изображения больше не актуальны.
+        instance.image_size = {}
+        instance._image_changed = bool(instance.image)
+    if instance.image and not instance.image._committed:
+        stripped = images.strip_metadata(instance.image)
+        if stripped is not None:
+            instance.image = stripped
+
+
+@receiver(post_save, sender=Post)
+def bump_post_version(sender, instance, **kwargs):
+    if getattr(instance, "_image_changed", False):
+        images.schedule_processing(instance.pk)
+    cache.bump(cache.post_tag(instance.pk))
+    old = getattr(instance, "_old_membership", None)
+    new = post_membership(instance)
+    if old != new:
+        old = old or new
+        bump_post_lists((old[0], new[0]), (old[1], new[1]))
+
+
+@receiver(post_delete, sender=Post)
+def bump_deleted_post_version(sender, instance, **kwargs):
+    cache.bump(cache.post_tag(instance.pk))
+    bump_post_lists((instance.category_id,), (instance.author_id,))
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_visibility(sender, instance, raw=False, **kwargs):
+    instance._was_published = None
+    if not raw and not instance._state.adding:
+        instance._was_published = Category.objects.filter(
+            pk=instance.pk
+        ).values_list("is_published", flat=True).first()
+
+
+def category_authors(category):
+    return Post.objects.filter(category=category).values_list(
+        "author_id", flat=True
+    ).distinct()
+
+
+@receiver(post_save, sender=Category)
+def bump_category_version(sender, instance, **kwargs):
+    cache.bump(cache.category_tag(instance.pk))
+    was_published = getattr(instance, "_was_published", None)
+    if was_published is not None and was_published != instance.is_published:
+        Post.objects.filter(category=instance).refresh_visibility()
+        bump_post_lists((instance.pk,), category_authors(instance))
+
+
+@receiver(pre_delete, sender=Category)
+def bump_deleted_category_version(sender, instance, **kwargs):
+    # Посты категории останутся без неё (SET_NULL), поэтому списки,
+    # в которых они были, нужно сбросить до удаления.
+    cache.bump(cache.category_tag(instance.pk))
+    Post.objects.filter(category=instance).update(is_visible=False)
+    bump_post_lists((instance.pk,), category_authors(instance))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def bump_location_version(sender, instance, **kwargs):
+    cache.bump(cache.location_tag(instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_version(sender, instance, **kwargs):
+    cache.bump(cache.user_tag(instance.pk))
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    db.apply_pragmas(connection)
+
+
+def install_search_triggers(sender, using, **kwargs):
+    """Восстанавливает триггеры поискового индекса после миграций."""
+    search.install_triggers(connections[using])
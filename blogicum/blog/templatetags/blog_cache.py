@@ -0,0 +1,20 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.cache import HOLE_MARKER
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_cache_hole(context, template_name):
+    """Подключает шаблон, который нельзя кэшировать в составе страницы.
+
+    Если страница рендерится для кэша (`page_cache_holes` в контексте),
+    вместо шаблона выводится метка; при отдаче страницы её заменяет
+    фрагмент, отрисованный для текущего пользователя.
+    """
+    if context.get("page_cache_holes"):
+        return mark_safe(HOLE_MARKER.format(template_name))
+    included = context.template.engine.get_template(template_name)
+    return included.render(context)
@@ -0,0 +1,20 @@
+from django import template
+from django.core.files.storage import default_storage
+
+
+register = template.Library()
+
+
+@register.filter
+def image_srcset(post):
+    """Значение `srcset` для изображения поста: копии и оригинал."""
+    original = post.image_size.get("width")
+    if not original:
+        return ""
+    variants = post.image_size.get("variants", {})
+    candidates = [
+        f"{default_storage.url(variants[width])} {width}w"
+        for width in sorted(variants, key=int)
+    ]
+    candidates.append(f"{post.image.url} {original}w")
+    return ", ".join(candidates)
@@ -1,11 +1,25 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = "blog"
 
 urlpatterns = [
     path("", views.MaintListView.as_view(), name="index"),
+    path("feed/rss/", feeds.LatestPostsFeed(), name="feed_rss"),
+    path("feed/atom/", feeds.LatestPostsAtomFeed(), name="feed_atom"),
+    path(
+        "category/<slug:category_slug>/feed/rss/", feeds.CategoryFeed(),
+        name="category_feed_rss"),
+    path(
+        "category/<slug:category_slug>/feed/atom/", feeds.CategoryAtomFeed(),
+        name="category_feed_atom"),
+    path(
+        "profile/<str:username>/feed/rss/", feeds.AuthorFeed(),
+        name="profile_feed_rss"),
+    path(
+        "profile/<str:username>/feed/atom/", feeds.AuthorAtomFeed(),
+        name="profile_feed_atom"),
     path(
         "category/<slug:category_slug>/", views.PostCategoryListView.as_view(),
         name="category_posts"),
@@ -14,6 +28,35 @@ urlpatterns = [
     path(
         "profile/<str:username>/", views.ProfileListView.as_view(),
         name="profile"),
+    path("search/", views.PostSearchView.as_view(), name="search"),
+    path("export/<str:kind>/", views.ExportView.as_view(), name="export"),
+    path("stats/", views.QueryStatsView.as_view(), name="query_stats"),
+    path(
+        "profiling/", views.ProfilingListView.as_view(), name="profiling"),
+    path(
+        "profiling/<str:capture_id>/", views.ProfilingDetailView.as_view(),
+        name="profiling_detail"),
+    path(
+        "profiling/<str:capture_id>/download/",
+        views.ProfilingDownloadView.as_view(),
+        name="profiling_download"),
+    path("api/posts/", api.PostListApiView.as_view(), name="api_posts"),
+    path(
+        "api/posts/<int:pk>/", api.PostDetailApiView.as_view(),
+        name="api_post"),
+    path(
+        "api/posts/<int:pk>/comments/", api.CommentListApiView.as_view(),
+        name="api_post_comments"),
+    path(
+        "api/categories/", api.CategoryListApiView.as_view(),
+        name="api_categories"),
+    path(
+        "api/profiles/<str:username>/", api.ProfileApiView.as_view(),
+        name="api_profile"),
+    path(
+        "api/profiles/<str:username>/posts/",
+        api.ProfilePostListApiView.as_view(),
+        name="api_profile_posts"),
     path("posts/<int:pk>/", views.PostDetailView.as_view(),
          name="post_detail"),
     path("posts/create/", views.PostCreateView.as_view(), name="create_post"),
@@ -27,6 +70,11 @@ urlpatterns = [
         views.PostDeleteView.as_view(),
         name="delete_post",
     ),
+    path(
+        "posts/<int:pk>/comments/",
+        views.PostCommentsView.as_view(),
+        name="post_comments",
+    ),
     path(
         "posts/<int:pk>/comment/",
         views.CommentCreateView.as_view(),
@@ -1,29 +1,63 @@
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect
-from django.utils.timezone import now
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
 from django.views.generic import (
     DetailView,
     DeleteView,
     CreateView,
     ListView,
-    UpdateView
+    TemplateView,
+    UpdateView,
+    View,
 )
 
+from . import cache, export, instrumentation, profiling, search
 from .forms import CommentForm, PostForm, UserProfileForm
 from blog.models import Category, Comment, Post, User
-from . mixins import CommentEditMixin, OnlyAuthorMixin
+from .paginators import KeysetPaginator
+from . mixins import (
+    CommentEditMixin,
+    KeysetPaginationMixin,
+    OnlyAuthorMixin,
+    ConditionalGetMixin,
+    PageCacheMixin,
+    PostCardCacheMixin,
+    RetryOnLockMixin,
+    StaffRequiredMixin,
+    memoize_per_request,
+)
 
 NUM_ON_MAIN = 10
+NUM_COMMENTS = 20
+COMMENT_ORDERING = ("created_at", "id")
+
 
+def post_comments(post):
+    return post.comments.select_related("author")
 
-class MaintListView(ListView):
+
+class MaintListView(
+    ConditionalGetMixin,
+    PageCacheMixin,
+    PostCardCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """Класс отвечающий за отображение постов на главной странице"""
 
     model = Post
     template_name = "blog/index.html"
     paginate_by = NUM_ON_MAIN  # Количество постов на странице
+    page_cache_for_authenticated = True
+
+    def get_cache_tags(self, context):
+        return {cache.FEED_TAG, *cache.page_posts_tags(context["page_obj"])}
 
     def get_queryset(self):
         """
@@ -33,12 +67,19 @@ class MaintListView(ListView):
         return self.model.objects.published().annotated()
 
 
-class ProfileListView(ListView):
+class ProfileListView(
+    ConditionalGetMixin,
+    PageCacheMixin,
+    PostCardCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     model = User
     template_name = "blog/profile.html"
     context_object_name = "profile"
     paginate_by = NUM_ON_MAIN
 
+    @memoize_per_request
     def get_user(self):
         username = self.kwargs["username"]
         return get_object_or_404(User, username=username)
@@ -55,6 +96,14 @@ class ProfileListView(ListView):
         context["profile"] = self.get_user()
         return context
 
+    def get_cache_tags(self, context):
+        user_id = self.get_user().pk
+        return {
+            cache.user_tag(user_id),
+            cache.profile_posts_tag(user_id),
+            *cache.page_posts_tags(context["page_obj"]),
+        }
+
 
 class EditProfileView(LoginRequiredMixin, UpdateView):
     model = User
@@ -69,7 +118,7 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
         return reverse("blog:profile", kwargs={"username": username})
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(RetryOnLockMixin, LoginRequiredMixin, CreateView):
     """Создание поста, назначение автора и вывод usename."""
 
     model = Post
@@ -85,35 +134,85 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         return reverse("blog:profile", kwargs={"username": username})
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ConditionalGetMixin, PageCacheMixin, DetailView):
     model = Post
     template_name = "blog/detail.html"
 
+    def get_queryset(self):
+        return Post.objects.visible_to(self.request.user).select_related(
+            "category", "location", "author"
+        )
+
+    @memoize_per_request
+    def get_object(self, queryset=None):
+        # Пост загружается один раз за запрос вместе со связанными
+        # объектами.
+        return super().get_object(queryset)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form"] = CommentForm()
-        context["comments"] = (
-            self.get_object().comments.select_related("author")
+        # Сразу выводится только первая страница комментариев,
+        # остальные подгружаются через PostCommentsView.
+        paginator = KeysetPaginator(
+            post_comments(self.object), NUM_COMMENTS, COMMENT_ORDERING
         )
+        context["comments_page"] = paginator.page()
+        context["comments"] = context["comments_page"].object_list
         return context
 
-    def get_object(self, queryset=None):
-        post = super().get_object()
-        if post.author == self.request.user:
-            return post
+    def get_cache_tags(self, context):
+        return {
+            *cache.post_card_tags(self.object),
+            *(cache.user_tag(comment.author_id)
+              for comment in context["comments"]),
+        }
+
+
+class PostCommentsView(
+    ConditionalGetMixin,
+    PageCacheMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
+    """Следующие страницы комментариев поста фрагментом HTML."""
+
+    template_name = "includes/comment_list.html"
+    paginate_by = NUM_COMMENTS
+    keyset_ordering = COMMENT_ORDERING
+
+    def use_keyset_pagination(self):
+        return True
+
+    @memoize_per_request
+    def get_post(self):
         return get_object_or_404(
-            Post,
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=now(),
-            id=self.kwargs["pk"],
+            Post.objects.visible_to(self.request.user).only("id"),
+            pk=self.kwargs["pk"],
         )
 
+    def get_queryset(self):
+        return post_comments(self.get_post())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["post"] = self.get_post()
+        context["comments_page"] = context["page_obj"]
+        return context
+
+    def get_cache_tags(self, context):
+        return {
+            cache.post_tag(context["post"].pk),
+            *(cache.user_tag(comment.author_id)
+              for comment in context["page_obj"]),
+        }
+
 
 class PostCategoryListView(MaintListView):
     model = Category
     template_name = "blog/category.html"
 
+    @memoize_per_request
     def current_category(self):
         return get_object_or_404(
             Category, slug=self.kwargs["category_slug"], is_published=True)
@@ -127,16 +226,58 @@ class PostCategoryListView(MaintListView):
         context["category"] = self.current_category()
         return context
 
+    def get_cache_tags(self, context):
+        category_id = self.current_category().pk
+        return {
+            cache.category_tag(category_id),
+            cache.category_posts_tag(category_id),
+            *cache.page_posts_tags(context["page_obj"]),
+        }
+
+
+class PostSearchView(KeysetPaginationMixin, ListView):
+    """Полнотекстовый поиск по опубликованным постам."""
+
+    template_name = "blog/search.html"
+    paginate_by = NUM_ON_MAIN
+
+    def get_keyset_paginator(self, queryset, page_size):
+        return search.SearchPaginator(queryset, page_size)
+
+    def use_keyset_pagination(self):
+        return True
+
+    def get_query(self):
+        return self.request.GET.get("q", "").strip()
+
+    def get_queryset(self):
+        query = self.get_query()
+        posts = search.search_posts(
+            Post.objects.published().select_related("author", "category"),
+            query,
+        )
+        if not search.match_expression(query) or not search.search_available():
+            # Пустой запрос FTS5 считает ошибкой синтаксиса.
+            return posts.none()
+        return posts
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for post in context["page_obj"]:
+            post.snippet_html = search.highlight(post.snippet)
+        query = self.get_query()
+        context["query"] = query
+        context["page_query"] = f"{urlencode({'q': query})}&"
+        return context
+
 
 class PostUpdateView(OnlyAuthorMixin, LoginRequiredMixin, UpdateView):
     model = Post
     form_class = PostForm
     template_name = "blog/create.html"
 
-    def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
-            return redirect("blog:post_detail", pk=self.kwargs["pk"])
-        return super().dispatch(request, *args, **kwargs)
+    def handle_no_permission(self):
+        return redirect("blog:post_detail", pk=self.kwargs["pk"])
 
     def get_success_url(self):
         return reverse("blog:post_detail", kwargs={"pk": self.object.pk})
@@ -146,40 +287,28 @@ class PostDeleteView(LoginRequiredMixin, OnlyAuthorMixin, DeleteView):
     model = Post
     template_name = "blog/create.html"
     success_url = reverse_lazy("blog:index")
-    queryset = Post.objects.select_related("author", "location", "category")
-
-    def delete(self, request, *args, **kwargs):
-        post = get_object_or_404(Post, pk=self.kwargs["pk"])
-        if self.request.user != post.author:
-            return redirect("blog:index")
+    object_fields = ("id", "author_id", "category_id")
 
-        return super().delete(request, *args, **kwargs)
 
-
-class CommentCreateView(CommentEditMixin, LoginRequiredMixin, CreateView):
+class CommentCreateView(
+    RetryOnLockMixin, CommentEditMixin, LoginRequiredMixin, CreateView
+):
     model = Comment
     form_class = CommentForm
 
     def form_valid(self, form):
         form.instance.post = get_object_or_404(Post, pk=self.kwargs["pk"])
         form.instance.author = self.request.user
+        # Комментарий и счётчик в посте сохраняются в одной транзакции
+        # (её открывает RetryOnLockMixin).
         return super().form_valid(form)
 
 
 class CommentUpdateView(OnlyAuthorMixin, CommentEditMixin, UpdateView):
     form_class = CommentForm
 
-    def dispatch(self, request, *args, **kwargs):
-        comment = get_object_or_404(
-            Comment, pk=self.kwargs["comment_pk"]
-        )
-        if (
-            self.request.user
-            != comment.author
-        ):
-            return redirect("blog:post_detail", pk=self.kwargs["pk"])
-
-        return super().dispatch(request, *args, **kwargs)
+    def handle_no_permission(self):
+        return redirect("blog:post_detail", pk=self.kwargs["pk"])
 
     def get_success_url(self):
         return reverse("blog:post_detail", kwargs={"pk": self.kwargs["pk"]})
@@ -189,15 +318,96 @@ class CommentDeleteView(CommentEditMixin, OnlyAuthorMixin, DeleteView):
     model = Comment
     pk_url_kwarg = "comment_pk"
     template_name = "blog/comment.html"
-
-    def delete(self, request, *args, **kwargs):
-        comment = get_object_or_404(Comment, pk=self.kwargs["comment_pk"])
-        if self.request.user != comment.author:
-            return redirect("blog:post_detail", pk=self.kwargs["pk"])
-        return super().delete(request, *args, **kwargs)
+    object_fields = ("id", "post_id", "author_id", "text")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Удаляем объект формы из контекста
         context.pop("form", None)
         return context
+
+
+class ExportView(StaffRequiredMixin, View):
+    """Потоковая выгрузка постов или комментариев для сотрудников."""
+
+    def get(self, request, kind):
+        fmt = request.GET.get("format", "jsonl")
+        if kind not in export.EXPORTS or fmt not in export.FORMATS:
+            raise Http404
+        response = StreamingHttpResponse(
+            export.export_lines(kind, fmt), content_type=export.FORMATS[fmt]
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{kind}.{fmt}"'
+        )
+        return response
+
+
+class QueryStatsView(StaffRequiredMixin, View):
+    """Накопленные в процессе замеры SQL и шаблонов по представлениям.
+
+    POST сбрасывает накопленные значения.
+    """
+
+    def get(self, request):
+        return JsonResponse({
+            "rate": getattr(settings, "BLOG_QUERY_STATS_RATE", 0),
+            "view_rates": getattr(
+                settings, "BLOG_QUERY_STATS_VIEW_RATES", {}
+            ),
+            "views": instrumentation.STATS.snapshot(),
+        }, json_dumps_params={"ensure_ascii": False})
+
+    def post(self, request):
+        instrumentation.STATS.reset()
+        return redirect("blog:query_stats")
+
+
+class ProfilingListView(StaffRequiredMixin, TemplateView):
+    """Сохранённые замеры профилировщика."""
+
+    template_name = "blog/profiling.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["captures"] = profiling.list_captures()
+        return context
+
+
+class ProfilingDetailView(StaffRequiredMixin, TemplateView):
+    """Один замер: функции из pstats и крупнейшие выделения памяти."""
+
+    template_name = "blog/profiling_detail.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        capture = profiling.load_capture(self.kwargs["capture_id"])
+        if capture is None:
+            raise Http404
+        sort = self.request.GET.get("sort", profiling.SORT_KEYS[0])
+        if sort not in profiling.SORT_KEYS:
+            sort = profiling.SORT_KEYS[0]
+        context.update(
+            capture=capture,
+            sort=sort,
+            sort_keys=profiling.SORT_KEYS,
+            stats=(
+                profiling.stats_report(capture["id"], sort)
+                if capture["cpu"] else None
+            ),
+        )
+        return context
+
+
+class ProfilingDownloadView(StaffRequiredMixin, View):
+    """Дамп pstats для просмотра в snakeviz, pstats и т. п."""
+
+    def get(self, request, capture_id):
+        capture = profiling.load_capture(capture_id)
+        if capture is None or not capture["cpu"]:
+            raise Http404
+        return FileResponse(
+            open(profiling.stats_path(capture_id), "rb"),
+            as_attachment=True,
+            filename=f"{capture_id}.prof",
+        )
@@ -0,0 +1,139 @@
+"""Прогрев процесса: шаблоны, адреса, модели, соединения и кэш.
+
+Первые запросы нового процесса медленные: шаблоны ещё не разобраны,
+резолвер адресов и метаданные моделей не построены, соединения
+с БД не открыты, кэш страниц пуст. `warm_up()` делает это заранее —
+при запуске процесса (`BLOG_WARMUP_ON_START`) или командой `warm_up`.
+"""
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import (
+    TemplateDoesNotExist, TemplateSyntaxError, engines,
+)
+from django.urls import get_resolver, resolve, reverse
+
+# Сколько категорий прогревать, начиная с первых по id.
+WARMUP_CATEGORIES = 20
+
+
+def template_dirs(engine):
+    """Каталоги, из которых загрузчики движка читают шаблоны."""
+    dirs = {}
+    for loader in engine.engine.template_loaders:
+        if hasattr(loader, "get_dirs"):
+            dirs.update(dict.fromkeys(map(Path, loader.get_dirs())))
+    return list(dirs)
+
+
+def compile_templates():
+    """Разбирает все шаблоны; с кэширующим загрузчиком они остаются в нём.
+
+    Возвращает число разобранных шаблонов и число пропущенных файлов.
+    """
+    compiled = skipped = 0
+    for engine in engines.all():
+        if not hasattr(engine, "engine"):
+            # Не DjangoTemplates: загрузчики устроены иначе.
+            continue
+        for directory in template_dirs(engine):
+            for path in directory.rglob("*"):
+                if not path.is_file():
+                    continue
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                except (TemplateDoesNotExist, TemplateSyntaxError,
+                        UnicodeDecodeError):
+                    skipped += 1
+                else:
+                    compiled += 1
+    return compiled, skipped
+
+
+def prime_urls():
+    """Строит резолвер и словари обратного поиска всех пространств имён."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for _, nested in resolver.namespace_dict.values():
+        nested.reverse_dict
+    resolve(reverse("blog:index"))
+    return len(resolver.reverse_dict) + sum(
+        len(nested.reverse_dict)
+        for _, nested in resolver.namespace_dict.values()
+    )
+
+
+def prime_models():
+    models = apps.get_models()
+    for model in models:
+        model._meta.get_fields()
+    return len(models)
+
+
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def warm_pages():
+    """Запрашивает ленту, первые страницы категорий и ленты RSS/Atom.
+
+    Страницы и карточки постов попадают в кэш этого процесса (или
+    в общий кэш, если он общий). Ленты с абсолютными ссылками
+    кэшируются по хосту, поэтому запрашиваются только с адресом
+    `BLOG_PUBLIC_URL`. Возвращает коды ответов по адресам.
+    """
+    from django.test import Client
+
+    from .models import Category
+
+    public = urlsplit(settings.BLOG_PUBLIC_URL)
+    host = public.netloc or next(
+        (host for host in settings.ALLOWED_HOSTS if host[:1] not in ".*"),
+        "localhost",
+    )
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    paths = [
+        reverse("blog:index"),
+        *(
+            reverse("blog:category_posts", args=[slug])
+            for slug in Category.objects.filter(
+                is_published=True
+            ).order_by("id").values_list("slug", flat=True)[
+                :WARMUP_CATEGORIES
+            ]
+        ),
+    ]
+    if public.netloc:
+        paths += [reverse("blog:feed_rss"), reverse("blog:feed_atom")]
+    secure = public.scheme == "https"
+    return {
+        path: client.get(path, secure=secure).status_code for path in paths
+    }
+
+
+def warm_up(timer, pages=True):
+    """Выполняет шаги прогрева, записывая их длительность в `timer`."""
+    with timer.step("шаблоны") as details:
+        compiled, skipped = compile_templates()
+        details.append(f"{compiled} шт.")
+        if skipped:
+            details.append(f"пропущено {skipped}")
+    with timer.step("адреса") as details:
+        details.append(f"{prime_urls()} шт.")
+    with timer.step("модели") as details:
+        details.append(f"{prime_models()} шт.")
+    with timer.step("соединения с БД") as details:
+        details.append(f"{open_connections()} шт.")
+    if not pages:
+        return
+    with timer.step("кэш страниц") as details:
+        statuses = warm_pages()
+        details.append(f"{len(statuses)} стр.")
+        failed = [path for path, status in statuses.items() if status >= 500]
+        if failed:
+            details.append("ошибки: " + ", ".join(failed))
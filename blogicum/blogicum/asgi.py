@@ -7,10 +7,34 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
-import os
+import time
 
-from django.core.asgi import get_asgi_application
+started = time.perf_counter()
+
+import os  # noqa: E402
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+
+from blogicum.startup import StartupTimer, logger  # noqa: E402
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blogicum.settings")
 
-application = get_asgi_application()
+timer = StartupTimer()
+timer.add("импорт", time.perf_counter() - started)
+# То же, что get_asgi_application(), но по шагам.
+with timer.step("django.setup"):
+    django.setup(set_prefix=False)
+with timer.step("middleware"):
+    application = ASGIHandler()
+
+if settings.BLOG_WARMUP_ON_START:
+    try:
+        from blog.warmup import warm_up
+
+        warm_up(timer)
+    except Exception:
+        logger.exception("Не удалось прогреть процесс")
+
+timer.log("ASGI-приложение")
@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -7,13 +10,27 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
+# Профиль настроек: "development" (по умолчанию) или "production".
+# В production отключены DEBUG и debug_toolbar, шаблоны кэшируются
+# после первой загрузки, соединения с БД не закрываются после запроса.
+PROFILE = os.environ.get("BLOGICUM_PROFILE", "development")
+if PROFILE not in ("development", "production"):
+    raise ValueError(f"Неизвестный профиль настроек: {PROFILE}")
+PRODUCTION = PROFILE == "production"
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = (
-    "django-insecure-a4h80j-s$h&rhas)qsvaz^13e+9&fb(b(#1@atc%9!5g3pq9+7"
+# В production ключ обязателен: ключ из репозитория известен всем.
+if PRODUCTION and not os.environ.get("DJANGO_SECRET_KEY"):
+    raise ImproperlyConfigured(
+        "В профиле production задайте переменную DJANGO_SECRET_KEY."
+    )
+SECRET_KEY = os.environ.get(
+    "DJANGO_SECRET_KEY",
+    "django-insecure-a4h80j-s$h&rhas)qsvaz^13e+9&fb(b(#1@atc%9!5g3pq9+7",
 )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
 INTERNAL_IPS = ['127.0.0.1', ]
 
@@ -29,8 +46,13 @@ ALLOWED_HOSTS = [
     # Когда проект будет опубликован и станет доступен для пользователей,
     # в этот список нужно будет добавить и адреса домена, где он будет размещён,
     # например 'acme.not' и 'www.acme.not'
+    *filter(None, os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")),
 ]
 
+# Курсорная пагинация ленты (?after=/?before=) вместо ?page=N:
+# стоимость страницы не зависит от её глубины и не требует COUNT(*).
+BLOG_CURSOR_PAGINATION = False
+
 LOGIN_REDIRECT_URL = "blog:index"
 LOGIN_URL = 'login'
 
@@ -47,7 +69,6 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "debug_toolbar",
     "django_bootstrap5",
     "pages.apps.PagesConfig",
     "blog.apps.BlogConfig",
@@ -61,9 +82,14 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    "blog.middleware.ProfilingMiddleware",
+    "blog.middleware.QueryStatsMiddleware",
 ]
 
+if not PRODUCTION:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "blogicum.urls"
 TEMPLATES_DIR = BASE_DIR / "templates"
 
@@ -71,10 +97,9 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
-        "APP_DIRS": True,
+        "APP_DIRS": not PRODUCTION,
         "OPTIONS": {
             "context_processors": [
-                "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
@@ -83,6 +108,19 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    # Шаблоны читаются и разбираются один раз на процесс.
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [(
+        "django.template.loaders.cached.Loader", [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ],
+    )]
+else:
+    TEMPLATES[0]["OPTIONS"]["context_processors"].insert(
+        0, "django.template.context_processors.debug"
+    )
+
 WSGI_APPLICATION = "blogicum.wsgi.application"
 
 
@@ -92,10 +130,96 @@ WSGI_APPLICATION = "blogicum.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("DJANGO_SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        # В production соединение переиспользуется между запросами.
+        "CONN_MAX_AGE": int(os.environ.get(
+            "DJANGO_CONN_MAX_AGE", 600 if PRODUCTION else 0
+        )),
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite (см. blog.db).
+# В режиме WAL чтение не ждёт записи; synchronous=NORMAL в WAL
+# не теряет целостность, но последние транзакции могут пропасть при
+# отключении питания. cache_size в КиБ, если отрицательный.
+BLOG_SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "cache_size": -64000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "memory",
+}
+
+# Сколько раз повторять создание поста или комментария, если база
+# заблокирована, и первая пауза перед повтором (секунды, удваивается).
+BLOG_WRITE_RETRIES = 5
+BLOG_WRITE_RETRY_DELAY = 0.05
+
+# Версии тегов кэша (blog/cache.py) должны быть общими для всех
+# процессов, админки и команд, поэтому в production кэш файловый.
+if PRODUCTION:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("DJANGO_CACHE_DIR", BASE_DIR / "cache"),
+            "OPTIONS": {"MAX_ENTRIES": 50000},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Время жизни закэшированной карточки поста; актуальность
+# обеспечивают версии в ключе фрагмента (см. blog/cache.py).
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кэш страниц для анонимных посетителей (секунды, 0 — выключен).
+# При DEBUG выключен, чтобы при разработке изменения были видны сразу.
+BLOG_PAGE_CACHE_TIMEOUT = 0 if DEBUG else 60 * 10
+
+# Сколько хранить ETag/Last-Modified страниц для условных запросов:
+# не дольше, чем сами страницы в кэше.
+BLOG_CONDITIONAL_GET_TIMEOUT = 60 * 10
+
+# Кэш RSS/Atom-лент. Ленты не зависят от пользователя и сбрасываются
+# по тегам, поэтому кэш включён и при DEBUG.
+BLOG_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Уменьшенные копии изображений постов создаются после сохранения
+# поста в фоновых потоках (False — сразу после фиксации транзакции).
+BLOG_IMAGE_BACKGROUND = True
+BLOG_IMAGE_WORKERS = 2
+
+# Доля запросов, для которых собираются замеры SQL и шаблонов
+# (см. blog.middleware.QueryStatsMiddleware), и доли для отдельных
+# представлений, например {"blog:index": 0.1}.
+BLOG_QUERY_STATS_RATE = 1 if DEBUG else 0.01
+BLOG_QUERY_STATS_VIEW_RATES = {}
+
+# Доля запросов, SQL которых дописывается в журнал для команды
+# analyze_query_log. В журнал пишутся отпечаток, SQL с местами для
+# параметров и их число; значения параметров не сохраняются.
+BLOG_QUERY_LOG_RATE = 0
+BLOG_QUERY_LOG = BASE_DIR / "query_log.jsonl"
+
+# Замеры профилировщика (?_profile= для сотрудников) и сколько
+# последних из них хранить.
+BLOG_PROFILE_DIR = BASE_DIR / "profiles"
+BLOG_PROFILE_KEEP = 100
+
+# Прогревать шаблоны, адреса, соединения и кэш страниц при загрузке
+# WSGI/ASGI-приложения (см. blog.warmup).
+BLOG_WARMUP_ON_START = PRODUCTION
+# Адрес сайта для посетителей, например "https://blogicum.example".
+# Ленты RSS/Atom содержат абсолютные ссылки и кэшируются по хосту,
+# поэтому прогреваются, только если он задан (хост должен быть
+# в DJANGO_ALLOWED_HOSTS).
+BLOG_PUBLIC_URL = os.environ.get("DJANGO_PUBLIC_URL", "")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -142,3 +266,15 @@ STATIC_URL = "/static/"
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # Время запуска процесса (см. wsgi.py и asgi.py).
+        "blogicum.startup": {"handlers": ["console"], "level": "INFO"},
+    },
+}
@@ -0,0 +1,48 @@
+"""Замер времени запуска процесса по шагам (см. wsgi.py и asgi.py)."""
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("blogicum.startup")
+
+
+class StartupTimer:
+    """Длительности шагов запуска; время — в секундах."""
+
+    def __init__(self):
+        self.steps = []
+
+    def add(self, name, duration, detail=""):
+        self.steps.append((name, duration, detail))
+
+    @contextmanager
+    def step(self, name):
+        """Замеряет блок; в `as` можно записать подробности шага."""
+        started = time.perf_counter()
+        details = []
+        try:
+            yield details
+        finally:
+            self.add(
+                name, time.perf_counter() - started, ", ".join(details)
+            )
+
+    @property
+    def total(self):
+        return sum(duration for _, duration, _ in self.steps)
+
+    def summary(self):
+        return "; ".join(
+            f"{name} {duration * 1000:.0f} мс"
+            + (f" ({detail})" if detail else "")
+            for name, duration, detail in self.steps
+        )
+
+    def log(self, application):
+        from django.conf import settings
+
+        logger.info(
+            "%s (профиль %s) загружено за %.0f мс: %s",
+            application, settings.PROFILE, self.total * 1000,
+            self.summary(),
+        )
@@ -26,7 +26,7 @@ urlpatterns = [
 ]
 
 
-if settings.DEBUG:
+if "debug_toolbar" in settings.INSTALLED_APPS:
     import debug_toolbar
     # Добавить к списку urlpatterns список адресов
     # из приложения debug_toolbar:
@@ -7,10 +7,34 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 """
 
-import os
+import time
 
-from django.core.wsgi import get_wsgi_application
+started = time.perf_counter()
+
+import os  # noqa: E402
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+
+from blogicum.startup import StartupTimer, logger  # noqa: E402
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blogicum.settings")
 
-application = get_wsgi_application()
+timer = StartupTimer()
+timer.add("импорт", time.perf_counter() - started)
+# То же, что get_wsgi_application(), но по шагам.
+with timer.step("django.setup"):
+    django.setup(set_prefix=False)
+with timer.step("middleware"):
+    application = WSGIHandler()
+
+if settings.BLOG_WARMUP_ON_START:
+    try:
+        from blog.warmup import warm_up
+
+        warm_up(timer)
+    except Exception:
+        logger.exception("Не удалось прогреть процесс")
+
+timer.log("WSGI-приложение")
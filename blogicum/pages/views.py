@@ -1,13 +1,17 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
+from blog.mixins import PageCacheMixin
 
-class AboutTemplateView(TemplateView):
+
+class AboutTemplateView(PageCacheMixin, TemplateView):
     template_name = 'pages/about.html'
+    page_cache_for_authenticated = True
 
 
-class RulesTemplateView(TemplateView):
+class RulesTemplateView(PageCacheMixin, TemplateView):
     template_name = 'pages/rules.html'
+    page_cache_for_authenticated = True
 
 
 def page_not_found(request, exception):
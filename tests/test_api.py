@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from blog.api import ApiListView
+from conftest import N_PER_PAGE
+
+
+@pytest.mark.django_db
+def test_api_posts_cursor_pagination(
+        client, many_posts_with_published_locations,
+        django_assert_num_queries):
+    posts = many_posts_with_published_locations
+    expected = [
+        post.id for post in
+        sorted(posts, key=lambda p: (p.pub_date, p.id), reverse=True)
+    ]
+    seen, url = [], "/api/posts/"
+    while url:
+        with django_assert_num_queries(1):
+            data = client.get(url).json()
+        seen.extend(item["id"] for item in data["results"])
+        url = data["next"]
+    assert seen == expected, (
+        "Убедитесь, что `/api/posts/` выдаёт опубликованные посты"
+        " «от новых к старым» с курсорной пагинацией, по одному запросу"
+        " к базе на страницу."
+    )
+    assert len(client.get("/api/posts/").json()["results"]) == N_PER_PAGE
+
+
+@pytest.mark.django_db
+def test_api_sparse_fieldsets(
+        client, post_with_published_location, django_assert_num_queries):
+    post = post_with_published_location
+    with django_assert_num_queries(1) as context:
+        data = client.get("/api/posts/", {"fields": "id,title"}).json()
+    assert data["results"] == [{"id": post.id, "title": post.title}]
+    sql = context.captured_queries[0]["sql"]
+    assert "JOIN" not in sql and '"text"' not in sql, (
+        "Убедитесь, что `?fields=` сокращает список колонок в запросе."
+    )
+
+    data = client.get(
+        f"/api/posts/{post.id}/", {"fields": "author,category,image"}
+    ).json()
+    assert data == {
+        "author": post.author.username,
+        "category": post.category.slug,
+        "image": post.image.url,
+    }
+    response = client.get("/api/posts/", {"fields": "id,password"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_api_visibility(
+        client, another_user, mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post, author=another_user)
+    comments = client.get(f"/api/posts/{post.id}/comments/").json()
+    assert len(comments["results"]) == 2
+    profile = client.get(f"/api/profiles/{post.author.username}/").json()
+    assert profile["username"] == post.author.username
+    assert "password" not in profile
+
+    post.is_published = False
+    post.save()
+    for url in (
+        f"/api/posts/{post.id}/",
+        f"/api/posts/{post.id}/comments/",
+    ):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            f"Убедитесь, что `{url}` не отдаёт скрытые посты."
+        )
+    assert client.get("/api/posts/").json()["results"] == []
+    assert client.get(
+        f"/api/profiles/{post.author.username}/posts/"
+    ).json()["results"] == []
+    categories = client.get("/api/categories/").json()["results"]
+    assert [c["slug"] for c in categories] == [post.category.slug]
+
+
+@pytest.mark.django_db
+def test_api_hides_unpublished_location(
+        client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/api/posts/{post.id}/"
+    params = {"fields": "id,location"}
+    assert client.get(url, params).json()["location"] == post.location.name
+    post.location.is_published = False
+    post.location.save()
+    assert client.get(url, params).json()["location"] is None, (
+        "Убедитесь, что API, как и страницы блога, не показывает "
+        "название неопубликованного места."
+    )
+    results = client.get("/api/posts/", params).json()["results"]
+    assert results == [{"id": post.id, "location": None}]
+
+
+def test_api_list_view_requires_queryset(rf):
+    view = ApiListView()
+    view.setup(rf.get("/"))
+    with pytest.raises(ImproperlyConfigured):
+        view.get_queryset()
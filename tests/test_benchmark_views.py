@@ -0,0 +1,138 @@
+import io
+import json
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from blog import db
+from blog.management.commands.benchmark_views import (
+    build_cases, pick_objects,
+)
+from blog.models import Comment, Post, User
+from blog.urls import urlpatterns as blog_urls
+from blog.views import NUM_ON_MAIN
+from pages.urls import urlpatterns as pages_urls
+
+
+@pytest.fixture
+def benchmark_data(mixer, user, another_user, published_category):
+    posts = mixer.cycle(NUM_ON_MAIN + 3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    mixer.cycle(5).blend("blog.Comment", post=posts[0], author=another_user)
+    return posts
+
+
+@pytest.mark.django_db
+def test_benchmark_covers_every_route(benchmark_data, tmp_path):
+    result = tmp_path / "benchmark.json"
+    call_command(
+        "benchmark_views", iterations=2, warmup=0, depth=2,
+        save=str(result), stdout=io.StringIO(),
+    )
+    results = json.loads(result.read_text(encoding="utf-8"))
+    assert all(
+        set(case) == {"p50_ms", "p95_ms", "p99_ms", "queries", "sql_ms",
+                      "template_ms"}
+        for case in results.values()
+    )
+    assert results["Лента"]["queries"] > 0
+    assert results["Лента"]["template_ms"] > 0
+
+    with override_settings(BLOG_PROFILE_DIR=tmp_path):
+        cases, _ = build_cases(pick_objects(), depth=2)
+    routes = {f"blog:{pattern.name}" for pattern in blog_urls} | {
+        f"pages:{pattern.name}" for pattern in pages_urls
+    }
+    assert routes <= {case.route for case in cases}, (
+        "Убедитесь, что замеряются все маршруты blog и pages."
+    )
+    assert {case.name for case in cases} <= set(results)
+
+
+@pytest.mark.django_db
+def test_benchmark_fails_on_regression(benchmark_data, tmp_path):
+    baseline = tmp_path / "baseline.json"
+    call_command(
+        "benchmark_views", iterations=2, warmup=0, only="^Лента$",
+        save=str(baseline), stdout=io.StringIO(),
+    )
+    call_command(
+        "benchmark_views", iterations=2, warmup=0, only="^Лента$",
+        baseline=str(baseline), threshold=100,
+        stdout=io.StringIO(),
+    )
+    data = json.loads(baseline.read_text(encoding="utf-8"))
+    data["Лента"]["queries"] -= 1
+    baseline.write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(CommandError, match="Лента: запросов"):
+        call_command(
+            "benchmark_views", iterations=2, warmup=0, only="^Лента$",
+            baseline=str(baseline), stdout=io.StringIO(),
+        )
+
+
+def _database_state():
+    return {
+        "posts": list(Post.objects.order_by("pk").values()),
+        "comments": list(Comment.objects.order_by("pk").values()),
+        "users": list(User.objects.order_by("pk").values_list("pk")),
+        "sessions": Session.objects.count(),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_writes_like_production(benchmark_data, monkeypatch):
+    in_atomic_block = []
+    retry_on_lock = db.retry_on_lock
+
+    def record(func, *args, **kwargs):
+        in_atomic_block.append(connection.in_atomic_block)
+        return retry_on_lock(func, *args, **kwargs)
+
+    monkeypatch.setattr(db, "retry_on_lock", record)
+    before = _database_state()
+    stdout = io.StringIO()
+    call_command(
+        "benchmark_views", iterations=2, warmup=0, depth=2,
+        only="^(Новый пост|Правка поста|Удаление поста|Комментарий"
+             "|Правка комментария|Удаление комментария)$",
+        stdout=stdout,
+    )
+    rows = stdout.getvalue().splitlines()[1:]
+    assert len(rows) == 6
+    assert all(row.split()[-7] == "302" for row in rows), (
+        "Убедитесь, что каждый повтор запроса на запись выполняется "
+        "успешно."
+    )
+    assert in_atomic_block and not any(in_atomic_block), (
+        "Убедитесь, что запросы на запись замеряются вне общей "
+        "транзакции, как на сайте."
+    )
+    assert _database_state() == before, (
+        "Убедитесь, что замер без общей транзакции возвращает базу "
+        "в исходное состояние."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_preparation_leaves_nothing(benchmark_data, monkeypatch):
+    before = _database_state()
+
+    def broken(self, path, *args, **kwargs):
+        raise RuntimeError("профилирование недоступно")
+
+    monkeypatch.setattr(Client, "get", broken)
+    with pytest.raises(RuntimeError):
+        call_command(
+            "benchmark_views", iterations=1, warmup=0, stdout=io.StringIO(),
+        )
+    assert _database_state() == before, (
+        "Убедитесь, что при ошибке подготовки замера созданные объекты "
+        "удаляются."
+    )
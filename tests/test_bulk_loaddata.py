@@ -0,0 +1,136 @@
+import io
+import json
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.db import bulk_insert
+from blog.management.commands.bulk_loaddata import iter_json_array
+from blog.models import Category, Comment, Location, Post
+
+DB_JSON = Path(__file__).resolve().parent.parent / "db.json"
+
+
+def test_iter_json_array_streams_small_chunks():
+    data = [{"model": "blog.category", "pk": i, "fields": {"title": "[,]"}}
+            for i in range(5)]
+    source = io.StringIO(json.dumps(data, indent=2))
+    assert list(iter_json_array(source, read_size=7)) == data, (
+        "Убедитесь, что фикстура разбирается верно при чтении"
+        " небольшими порциями."
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("command", ["bulk_loaddata", "loaddata"])
+def test_loaded_repo_fixture_is_visible(command):
+    objects = json.loads(DB_JSON.read_text(encoding="utf-8"))
+    call_command(command, str(DB_JSON), verbosity=0)
+
+    posts = [obj for obj in objects if obj["model"] == "blog.post"]
+    assert Post.objects.count() == len(posts)
+    published_categories = {
+        obj["pk"] for obj in objects
+        if obj["model"] == "blog.category" and obj["fields"]["is_published"]
+    }
+    now = timezone.now().isoformat()
+    expected = {
+        obj["pk"] for obj in posts
+        if obj["fields"]["is_published"]
+        and obj["fields"]["category"] in published_categories
+        and obj["fields"]["pub_date"] <= now
+    }
+    assert set(
+        Post.objects.published().values_list("pk", flat=True)
+    ) == expected, (
+        "Убедитесь, что после загрузки у постов пересчитана видимость."
+    )
+
+
+@pytest.mark.django_db
+def test_loaded_rows_keep_created_at():
+    objects = json.loads(DB_JSON.read_text(encoding="utf-8"))
+    call_command("bulk_loaddata", str(DB_JSON), verbosity=0)
+    models = {
+        "blog.post": Post, "blog.category": Category,
+        "blog.location": Location, "blog.comment": Comment,
+    }
+    checked = 0
+    for obj in objects:
+        model = models.get(obj["model"])
+        if model is None:
+            continue
+        created_at = model.objects.values_list(
+            "created_at", flat=True
+        ).get(pk=obj["pk"])
+        assert created_at == parse_datetime(obj["fields"]["created_at"]), (
+            "Убедитесь, что `created_at` из фикстуры не заменяется"
+            " временем загрузки."
+        )
+        checked += 1
+    assert checked
+
+
+@pytest.mark.django_db
+def test_bulk_loaddata_orders_models_by_dependencies(tmp_path, user):
+    fields = {"created_at": "2024-01-01T00:00:00Z", "is_published": True}
+    fixture = [
+        *({"model": "blog.comment", "pk": pk, "fields": {
+            "text": "Комментарий", "post": 1, "author": user.pk,
+            "created_at": "2024-01-02T00:00:00Z"}} for pk in (1, 2)),
+        {"model": "blog.post", "pk": 1, "fields": {
+            **fields, "title": "Пост", "text": "Текст",
+            "pub_date": "2024-01-01T00:00:00Z", "author": user.pk,
+            "category": 1, "location": None, "image": ""}},
+        {"model": "blog.category", "pk": 1, "fields": {
+            **fields, "title": "Категория", "slug": "category",
+            "description": "Описание"}},
+    ]
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(fixture), encoding="utf-8")
+    call_command("bulk_loaddata", str(path), batch_size=1)
+    # Повторная загрузка обновляет уже существующие объекты.
+    call_command("bulk_loaddata", str(path))
+
+    assert Category.objects.count() == 1
+    assert Comment.objects.count() == 2
+    post = Post.objects.get()
+    assert post.comment_count == 2, (
+        "Убедитесь, что после загрузки комментариев пересчитывается"
+        " `Post.comment_count`."
+    )
+    assert post.is_visible
+
+
+@pytest.mark.django_db
+def test_bulk_insert_keeps_created_at_without_touching_fields(
+        monkeypatch, user, post_with_published_location):
+    field = Comment._meta.get_field("created_at")
+    auto_now_add = []
+    insert = QuerySet._insert
+
+    def record(self, *args, **kwargs):
+        auto_now_add.append(field.auto_now_add)
+        return insert(self, *args, **kwargs)
+
+    monkeypatch.setattr(QuerySet, "_insert", record)
+    created_at = timezone.now() - timedelta(days=30)
+    bulk_insert(Comment.objects, [
+        Comment(
+            post=post_with_published_location, author=user, text="Текст",
+            created_at=created_at,
+        )
+        for _ in range(3)
+    ], batch_size=2)
+    assert auto_now_add == [True, True], (
+        "Убедитесь, что вставка не меняет общие объекты полей модели: "
+        "их в это время используют другие потоки."
+    )
+    assert list(Comment.objects.values_list("created_at", flat=True)) == [
+        created_at
+    ] * 3
@@ -0,0 +1,45 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+        mixer, user, another_user, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post, author=another_user
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что при создании комментария увеличивается"
+        " `Post.comment_count`."
+    )
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при удалении комментария уменьшается"
+        " `Post.comment_count`."
+    )
+
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        "Убедитесь, что `Post.comment_count` учитывает каскадное удаление"
+        " комментариев."
+    )
+
+
+@pytest.mark.django_db
+def test_reconcile_comment_counts(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post, author=user)
+    type(post).objects.filter(pk=post.pk).update(comment_count=7)
+
+    call_command("reconcile_comment_counts", chunk_size=1)
+
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что команда `reconcile_comment_counts` исправляет"
+        " расхождения счётчика комментариев."
+    )
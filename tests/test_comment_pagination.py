@@ -0,0 +1,69 @@
+import pytest
+from django.urls import reverse
+
+from blog.views import NUM_COMMENTS
+
+
+@pytest.fixture
+def many_comments(mixer, another_user, post_with_published_location):
+    return mixer.cycle(NUM_COMMENTS * 2 + 3).blend(
+        "blog.Comment", post=post_with_published_location,
+        author=another_user, text=mixer.sequence("Комментарий {0}"),
+    )
+
+
+@pytest.mark.django_db
+def test_comments_are_paginated(
+        client, post_with_published_location, many_comments):
+    post = post_with_published_location
+    response = client.get(f"/posts/{post.id}/")
+    page = response.context["comments_page"]
+    assert [c.id for c in page] == [c.id for c in many_comments][
+        :NUM_COMMENTS], (
+        "Убедитесь, что на странице поста выводится только первая"
+        " страница комментариев в порядке их создания."
+    )
+    more_url = reverse("blog:post_comments", args=(post.id,))
+    assert more_url in response.content.decode(), (
+        "Убедитесь, что на странице поста есть ссылка на следующую"
+        " страницу комментариев."
+    )
+
+    seen = [c.id for c in page]
+    while page.has_next():
+        response = client.get(more_url, {"after": page.next_cursor})
+        assert response.status_code == 200
+        assert "<html" not in response.content.decode(), (
+            "Убедитесь, что следующие страницы комментариев отдаются"
+            " фрагментом без обёртки страницы."
+        )
+        page = response.context["comments_page"]
+        seen.extend(c.id for c in page)
+    assert seen == [c.id for c in many_comments], (
+        "Убедитесь, что страницы комментариев выдают каждый комментарий"
+        " ровно один раз."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_fragment_respects_post_visibility(
+        another_user_client, post_with_published_location, many_comments):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = another_user_client.get(
+        reverse("blog:post_comments", args=(post.id,))
+    )
+    assert response.status_code == 404, (
+        "Убедитесь, что комментарии скрытого поста недоступны"
+        " посторонним."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_fragment_invalid_cursor(client, post_with_published_location):
+    response = client.get(
+        reverse("blog:post_comments", args=(post_with_published_location.id,)),
+        {"after": "мусор"},
+    )
+    assert response.status_code == 404
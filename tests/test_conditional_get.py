@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog.views import PostDetailView
+
+
+@pytest.mark.django_db
+def test_unchanged_pages_answer_not_modified(
+        client, django_assert_num_queries, post_with_published_location):
+    post = post_with_published_location
+    for url in (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/posts/{post.id}/",
+    ):
+        response = client.get(url)
+        assert response.has_header("ETag") and response.has_header(
+            "Last-Modified"
+        ), f"Убедитесь, что страница `{url}` отдаёт ETag и Last-Modified."
+        with django_assert_num_queries(0):
+            not_modified = client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        not_modified = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_changed_pages_are_rendered_again(
+        client, mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    etag = client.get(url)["ETag"]
+
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что новый комментарий меняет ETag страницы поста."
+    )
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_validators_differ_per_user(
+        client, user_client, post_with_published_location):
+    etag = client.get("/")["ETag"]
+    response = user_client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+def test_page_changed_while_rendering_gets_no_validators(
+        client, monkeypatch, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    get_context_data = PostDetailView.get_context_data
+
+    def edit_after_loading(self, **kwargs):
+        context = get_context_data(self, **kwargs)
+        # Пост уже прочитан, и тут его меняет другой запрос.
+        monkeypatch.setattr(
+            PostDetailView, "get_context_data", get_context_data
+        )
+        post.title = "Заголовок после правки"
+        post.save()
+        return context
+
+    monkeypatch.setattr(
+        PostDetailView, "get_context_data", edit_after_loading
+    )
+    stale = client.get(url)
+    assert "Заголовок после правки" not in stale.content.decode()
+    assert not stale.has_header("ETag"), (
+        "Убедитесь, что ответ, построенный по данным до записи, не "
+        "получает ETag версий после неё."
+    )
+    assert client.get(url).has_header("ETag")
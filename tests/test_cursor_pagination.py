@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from conftest import N_PER_PAGE
+
+
+def _walk_forward(client, url):
+    seen = []
+    response = client.get(url)
+    pages = 0
+    while True:
+        assert response.status_code == HTTPStatus.OK
+        page = response.context["page_obj"]
+        seen.extend(post.id for post in page)
+        pages += 1
+        if not page.has_next():
+            return seen, pages, page
+        response = client.get(url, {"after": page.next_cursor})
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_cursor_pagination_walks_feed(
+        user_client, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations
+    for url in (
+        "/",
+        f"/category/{posts[0].category.slug}/",
+        f"/profile/{posts[0].author.username}/",
+    ):
+        seen, pages, last_page = _walk_forward(user_client, url)
+        expected = [
+            post.id for post in
+            sorted(posts, key=lambda p: (p.pub_date, p.id), reverse=True)
+        ]
+        assert seen == expected, (
+            "Убедитесь, что курсорная пагинация по адресу"
+            f" `{url}` выдаёт каждую публикацию ровно один раз"
+            " в порядке «от новых к старым»."
+        )
+        assert pages == -(-len(posts) // N_PER_PAGE)
+
+        response = user_client.get(
+            url, {"before": last_page.previous_cursor}
+        )
+        previous = [post.id for post in response.context["page_obj"]]
+        assert previous == expected[-len(last_page) - N_PER_PAGE:
+                                    -len(last_page)], (
+            "Убедитесь, что параметр `before` возвращает предыдущую"
+            " страницу."
+        )
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_enabled_by_parameter(
+        user_client, many_posts_with_published_locations):
+    page = user_client.get("/").context["page_obj"]
+    assert not getattr(page, "is_keyset", False)
+
+    first = [post.id for post in page]
+    cursor = user_client.get("/", {"after": ""}).context["page_obj"]
+    assert [post.id for post in cursor] == first
+    assert cursor.next_cursor
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_rejects_broken_cursor(user_client):
+    response = user_client.get("/", {"after": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
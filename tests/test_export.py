@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from blog import export
+
+
+@pytest.fixture
+def exported_posts(mixer, another_user, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations
+    mixer.cycle(3).blend("blog.Comment", post=posts[0], author=another_user)
+    return posts
+
+
+@pytest.mark.django_db
+def test_export_jsonl_in_chunks(
+        exported_posts, django_assert_num_queries):
+    posts = exported_posts
+    # Порции по 4 строки и один пустой запрос в конце.
+    with django_assert_num_queries(-(-len(posts) // 4) + 1):
+        rows = [
+            json.loads(line)
+            for line in export.export_lines("posts", "jsonl", chunk_size=4)
+        ]
+    assert [row["id"] for row in rows] == sorted(post.id for post in posts), (
+        "Убедитесь, что выгрузка содержит каждый пост ровно один раз"
+        " в порядке id."
+    )
+    first = next(row for row in rows if row["id"] == posts[0].id)
+    assert first["author"] == posts[0].author.username
+    assert first["category"] == posts[0].category.slug
+    assert first["location"] == posts[0].location.name
+    assert first["comment_count"] == 3
+
+
+@pytest.mark.django_db
+def test_export_command_csv(tmp_path, exported_posts):
+    output = tmp_path / "comments.csv"
+    call_command(
+        "export_blog", "comments", fmt="csv", output=str(output),
+        stderr=io.StringIO(),
+    )
+    with open(output, encoding="utf-8", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 3
+    assert {row["post_id"] for row in rows} == {str(exported_posts[0].id)}
+
+
+@pytest.mark.django_db
+def test_export_endpoint_is_staff_only(
+        client, user_client, admin_client, exported_posts):
+    url = "/export/posts/?format=csv"
+    assert client.get(url).status_code == 302
+    assert user_client.get(url).status_code == 403, (
+        "Убедитесь, что выгрузка недоступна обычным пользователям."
+    )
+    response = admin_client.get(url)
+    assert response.status_code == 200 and response.streaming, (
+        "Убедитесь, что выгрузка отдаётся потоком (StreamingHttpResponse)."
+    )
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert len(lines) == len(exported_posts) + 1
+    assert admin_client.get("/export/users/").status_code == 404
@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from blog.feeds import PostFeed
+from blog.models import EXCERPT_LENGTH
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def long_post(post_with_published_location):
+    post = post_with_published_location
+    post.text = "слово " * 500 + "КОНЕЦ"
+    post.save()
+    return post
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", [
+    "/feed/rss/",
+    "/feed/atom/",
+    "/category/{category}/feed/rss/",
+    "/profile/{author}/feed/atom/",
+])
+def test_feed_lists_published_posts(
+        client, mixer, long_post, url):
+    hidden = mixer.blend(
+        "blog.Post", author=long_post.author, category=long_post.category,
+        is_published=False, title="Скрытый пост",
+    )
+    url = url.format(
+        category=long_post.category.slug, author=long_post.author.username
+    )
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode()
+    assert long_post.title in content, (
+        f"Убедитесь, что лента `{url}` содержит опубликованные посты."
+    )
+    assert hidden.title not in content, (
+        f"Убедитесь, что лента `{url}` не содержит скрытые посты."
+    )
+    assert "КОНЕЦ" not in content and long_post.excerpt[:50] in content, (
+        "Убедитесь, что в ленту попадает анонс поста, а не полный текст."
+    )
+    assert len(long_post.excerpt) <= EXCERPT_LENGTH
+
+
+@pytest.mark.django_db
+def test_feed_of_hidden_category_is_not_found(client, long_post):
+    category = long_post.category
+    category.is_published = False
+    category.save()
+    response = client.get(f"/category/{category.slug}/feed/rss/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_feed_cache_and_conditional_get(
+        client, long_post, django_assert_num_queries):
+    first = client.get("/feed/rss/")
+    with django_assert_num_queries(0):
+        cached = client.get("/feed/rss/")
+        not_modified = client.get(
+            "/feed/rss/", HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+    assert cached.content == first.content, (
+        "Убедитесь, что повторный запрос ленты отдаётся из кэша."
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что лента поддерживает условные запросы."
+    )
+    assert "Last-Modified" in first
+
+    long_post.title = "Новый заголовок"
+    long_post.save()
+    response = client.get("/feed/rss/", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == HTTPStatus.OK
+    assert "Новый заголовок" in response.content.decode(), (
+        "Убедитесь, что кэш ленты сбрасывается при изменении поста."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_cache_is_per_host(client, long_post):
+    client.get("/feed/rss/", HTTP_HOST="localhost")
+    for host, secure, base in (
+        ("127.0.0.1", False, "http://127.0.0.1/"),
+        ("localhost", True, "https://localhost/"),
+    ):
+        content = client.get(
+            "/feed/rss/", HTTP_HOST=host, secure=secure
+        ).content.decode()
+        assert f"{base}posts/{long_post.id}/" in content, (
+            "Убедитесь, что лента из кэша содержит ссылки на хост "
+            "и схему запроса."
+        )
+        assert "http://localhost/" not in content
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_changed_while_rendering_is_not_cached(
+        client, monkeypatch, long_post):
+    item_title = PostFeed.item_title
+
+    def edit_after_loading(self, post):
+        # Посты ленты уже прочитаны, и тут пост меняет другой запрос.
+        monkeypatch.setattr(PostFeed, "item_title", item_title)
+        long_post.title = "Заголовок после правки"
+        long_post.save()
+        return item_title(self, post)
+
+    monkeypatch.setattr(PostFeed, "item_title", edit_after_loading)
+    stale = client.get("/feed/rss/")
+    assert "Заголовок после правки" not in stale.content.decode()
+    assert "ETag" not in stale
+    assert "Заголовок после правки" in client.get(
+        "/feed/rss/"
+    ).content.decode(), (
+        "Убедитесь, что лента, данные которой изменились во время "
+        "построения, не сохраняется в кэш."
+    )
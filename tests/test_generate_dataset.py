@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import (
+    Category, Comment, Location, Post, User, make_excerpt,
+)
+
+SIZES = {
+    "users": 20,
+    "categories": 5,
+    "locations": 10,
+    "posts": 300,
+    "comments": 1000,
+    "now": "2024-01-01T12:00:00+00:00",
+    "batch_size": 64,
+    "verbosity": 0,
+}
+
+
+def snapshot():
+    return (
+        list(User.objects.order_by("id").values_list("id", "username")),
+        list(Category.objects.order_by("id").values()),
+        list(Location.objects.order_by("id").values()),
+        list(Post.objects.order_by("id").values()),
+        list(Comment.objects.order_by("id").values()),
+    )
+
+
+@pytest.mark.django_db
+def test_generate_dataset_is_deterministic():
+    call_command("generate_dataset", seed=7, **SIZES)
+    first = snapshot()
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+    Location.objects.all().delete()
+    User.objects.all().delete()
+    call_command("generate_dataset", seed=7, **SIZES)
+    assert snapshot() == first, (
+        "Убедитесь, что при одинаковом --seed данные совпадают."
+    )
+
+
+@pytest.mark.django_db
+def test_generated_dataset_is_consistent():
+    call_command("generate_dataset", seed=1, **SIZES)
+    assert Post.objects.count() == SIZES["posts"]
+    assert Comment.objects.count() == SIZES["comments"]
+
+    posts = Post.objects.select_related("category")
+    mismatched = [
+        post.pk for post in posts
+        if post.is_visible != bool(
+            post.is_published
+            and post.category.is_published
+            and post.pub_date.isoformat() <= SIZES["now"]
+        )
+    ]
+    assert not mismatched, (
+        "Убедитесь, что видимость сгенерированных постов вычислена верно."
+    )
+    assert all(post.excerpt == make_excerpt(post.text) for post in posts), (
+        "Убедитесь, что анонсы сгенерированных постов заполнены."
+    )
+    assert not Comment.objects.filter(post__is_visible=False).exists(), (
+        "Убедитесь, что комментарии достаются только видимым постам."
+    )
+    counts = Post.objects.with_actual_comment_count().values_list(
+        "comment_count", "actual_comment_count"
+    )
+    assert all(stored == actual for stored, actual in counts), (
+        "Убедитесь, что счётчики комментариев пересчитаны."
+    )
+    top = sorted((actual for _, actual in counts), reverse=True)
+    assert sum(top[:len(top) // 10]) > SIZES["comments"] / 2, (
+        "Убедитесь, что комментарии распределены с перекосом."
+    )
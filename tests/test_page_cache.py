@@ -0,0 +1,186 @@
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import override_settings
+
+from blog import cache as blog_cache
+from blog.checks import check_shared_cache
+from blog.views import PostDetailView
+
+
+@pytest.fixture(autouse=True)
+def page_cache():
+    cache.clear()
+    with override_settings(BLOG_PAGE_CACHE_TIMEOUT=600):
+        yield
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_served_from_cache(
+        client, django_assert_num_queries, post_with_published_location):
+    post = post_with_published_location
+    for url in (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/posts/{post.id}/",
+        "/pages/",
+        "/pages/rules/",
+    ):
+        first = client.get(url)
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second.content == first.content, (
+            f"Убедитесь, что страница `{url}` повторно отдаётся из кэша."
+        )
+
+
+@pytest.mark.django_db
+def test_page_cache_invalidated_by_models(
+        client, mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    detail_url = f"/posts/{post.id}/"
+    category_url = f"/category/{post.category.slug}/"
+    client.get("/")
+    client.get(detail_url)
+    client.get(category_url)
+
+    mixer.blend(
+        "blog.Comment", post=post, author=another_user,
+        text="Текст нового комментария",
+    )
+    assert "Комментарии (1)" in client.get("/").content.decode()
+    assert "Текст нового комментария" in (
+        client.get(detail_url).content.decode()
+    )
+
+    post.category.description = "Новое описание категории"
+    post.category.save()
+    assert "Новое описание" in client.get(category_url).content.decode()
+
+    new_post = mixer.blend(
+        "blog.Post", author=another_user, category=post.category
+    )
+    assert new_post.title in client.get("/").content.decode(), (
+        "Убедитесь, что новая публикация сбрасывает кэш ленты."
+    )
+
+
+@pytest.mark.django_db
+def test_header_is_rendered_per_user(
+        client, user_client, post_with_published_location):
+    anonymous = client.get("/").content.decode()
+    personal = user_client.get("/").content.decode()
+    assert "Регистрация" in anonymous and "Выйти" not in anonymous
+    assert "Выйти" in personal and "Регистрация" not in personal, (
+        "Убедитесь, что шапка закэшированной страницы отрисовывается"
+        " для текущего пользователя."
+    )
+    assert "page-cache-hole" not in personal
+
+
+@pytest.mark.django_db
+def test_detail_page_not_shared_with_users(
+        client, user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    client.get(url)
+    assert "Оставить комментарий" in user_client.get(url).content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bump_published_after_commit():
+    tag = blog_cache.post_tag(1)
+    key = blog_cache.VERSION_KEY.format(tag)
+    old = blog_cache.get_versions([tag])[tag]
+    with transaction.atomic():
+        blog_cache.bump(tag)
+        new = blog_cache.get_versions([tag])[tag]
+        assert new != old, (
+            "Убедитесь, что транзакция видит свои изменения версий."
+        )
+        assert cache.get(key) == old, (
+            "Убедитесь, что до фиксации транзакции другие процессы видят "
+            "прежнюю версию."
+        )
+    published = cache.get(key)
+    assert published not in (old, new), (
+        "Убедитесь, что после фиксации публикуется версия со временем "
+        "фиксации."
+    )
+    assert blog_cache.get_versions([tag])[tag] == published
+    new = published
+
+    try:
+        with transaction.atomic():
+            blog_cache.bump(tag)
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert blog_cache.get_versions([tag])[tag] == new, (
+        "Убедитесь, что откаченная транзакция не меняет версии."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bump_from_another_process_invalidates_page(
+        tmp_path, monkeypatch, rf):
+    # Два экземпляра файлового кэша с общим каталогом — как кэш двух
+    # процессов.
+    worker, command = (
+        FileBasedCache(str(tmp_path), {}) for _ in range(2)
+    )
+    tag = blog_cache.post_tag(1)
+    monkeypatch.setattr(blog_cache, "cache", worker)
+    key = blog_cache.page_key(rf.get("/"))
+    blog_cache.store_page(key, HttpResponse("страница"), [tag], 600)
+    assert blog_cache.cached_page(key) is not None
+
+    monkeypatch.setattr(blog_cache, "cache", command)
+    blog_cache.bump(tag)
+
+    monkeypatch.setattr(blog_cache, "cache", worker)
+    assert blog_cache.cached_page(key) is None, (
+        "Убедитесь, что изменение версии в другом процессе сбрасывает "
+        "закэшированную страницу."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_page_changed_while_rendering_is_not_cached(
+        client, monkeypatch, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    get_context_data = PostDetailView.get_context_data
+
+    def edit_after_loading(self, **kwargs):
+        context = get_context_data(self, **kwargs)
+        # Пост уже прочитан, и тут его меняет другой запрос.
+        monkeypatch.setattr(
+            PostDetailView, "get_context_data", get_context_data
+        )
+        post.title = "Заголовок после правки"
+        post.save()
+        return context
+
+    monkeypatch.setattr(
+        PostDetailView, "get_context_data", edit_after_loading
+    )
+    assert "Заголовок после правки" not in client.get(url).content.decode()
+    assert "Заголовок после правки" in client.get(url).content.decode(), (
+        "Убедитесь, что страница, данные которой изменились во время "
+        "отрисовки, не сохраняется в кэш под новыми версиями."
+    )
+
+
+def test_process_local_cache_warning(tmp_path):
+    with override_settings(DEBUG=False):
+        assert [
+            error.id for error in check_shared_cache(None)
+        ] == ["blog.W001"]
+    with override_settings(DEBUG=False, CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(tmp_path),
+    }}):
+        assert check_shared_cache(None) == []
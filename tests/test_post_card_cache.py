@@ -0,0 +1,50 @@
+import pytest
+
+from blog import cache
+
+
+@pytest.mark.django_db
+def test_post_card_is_cached_until_version_changes(
+        client, mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    assert post.title in client.get("/").content.decode()
+
+    # Изменение в обход сигналов не меняет версию карточки.
+    type(post).objects.filter(pk=post.pk).update(title="Новый заголовок")
+    assert "Новый заголовок" not in client.get("/").content.decode(), (
+        "Убедитесь, что карточка поста берётся из кэша, пока версия"
+        " поста не изменилась."
+    )
+
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    content = client.get("/").content.decode()
+    assert "Новый заголовок" in content and "Комментарии (1)" in content, (
+        "Убедитесь, что новый комментарий сбрасывает кэш карточки поста."
+    )
+
+    post.category.title = "Переименованная категория"
+    post.category.save()
+    assert "Переименованная категория" in client.get("/").content.decode(), (
+        "Убедитесь, что изменение категории сбрасывает кэш карточки поста."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_card_changed_while_rendering_is_not_cached(
+        client, monkeypatch, post_with_published_location):
+    post = post_with_published_location
+    page_posts_tags = cache.page_posts_tags
+
+    def edit_after_loading(posts):
+        # Посты страницы уже прочитаны, и тут пост меняет другой запрос.
+        monkeypatch.setattr(cache, "page_posts_tags", page_posts_tags)
+        post.title = "Заголовок после правки"
+        post.save()
+        return page_posts_tags(posts)
+
+    monkeypatch.setattr(cache, "page_posts_tags", edit_after_loading)
+    assert "Заголовок после правки" not in client.get("/").content.decode()
+    assert "Заголовок после правки" in client.get("/").content.decode(), (
+        "Убедитесь, что карточка поста, изменённого во время отрисовки, "
+        "не сохраняется в кэш под новой версией."
+    )
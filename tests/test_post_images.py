@@ -0,0 +1,153 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import (
+    ORIENTATION_TAG, VARIANT_WIDTHS, process_image, strip_metadata,
+    variant_name,
+)
+
+
+@pytest.fixture
+def image_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_IMAGE_BACKGROUND = False
+    return settings
+
+
+def _jpeg(width, height):
+    image = Image.new("RGB", (width, height), color=(73, 109, 137))
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"  # Make
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return ContentFile(buffer.getvalue(), name="photo.jpg")
+
+
+@pytest.fixture
+def post_with_large_image(
+        image_settings, django_capture_on_commit_callbacks,
+        post_with_published_location):
+    post = post_with_published_location
+    post.image = _jpeg(1000, 500)
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    post.refresh_from_db()
+    return post
+
+
+@pytest.mark.django_db
+def test_upload_creates_variants(post_with_large_image):
+    post = post_with_large_image
+    assert post.image_size == {
+        "width": 1000, "height": 500,
+        "variants": {
+            str(width): variant_name(post.image.name, width)
+            for width in (320, 640, 960)
+        },
+    }, (
+        "Убедитесь, что после обработки у поста записаны размеры"
+        " изображения и имена копий."
+    )
+    for width in VARIANT_WIDTHS:
+        name = variant_name(post.image.name, width)
+        if width >= 1000:
+            assert not default_storage.exists(name), (
+                "Убедитесь, что копии не бывают шире оригинала."
+            )
+            continue
+        with default_storage.open(name) as file:
+            variant = Image.open(file)
+            assert variant.size == (width, width // 2)
+            assert not variant.getexif(), (
+                "Убедитесь, что из копий удаляются метаданные."
+            )
+
+
+@pytest.mark.django_db
+def test_card_has_responsive_image(client, post_with_large_image):
+    post = post_with_large_image
+    content = client.get("/").content.decode()
+    variant = default_storage.url(variant_name(post.image.name, 640))
+    for fragment in (
+        f"{variant} 640w",
+        f"{post.image.url} 1000w",
+        'width="1000" height="500"',
+        'loading="lazy"',
+    ):
+        assert fragment in content, (
+            "Убедитесь, что карточка поста выводит `srcset`, размеры"
+            f" и ленивую загрузку изображения: нет `{fragment}`."
+        )
+
+
+@pytest.mark.django_db
+def test_process_post_images_command(post_with_large_image):
+    post = post_with_large_image
+    name = variant_name(post.image.name, 320)
+    default_storage.delete(name)
+    type(post).objects.filter(pk=post.pk).update(image_size={})
+
+    call_command("process_post_images", workers=2)
+
+    post.refresh_from_db()
+    assert default_storage.exists(name), (
+        "Убедитесь, что команда `process_post_images` создаёт"
+        " недостающие копии."
+    )
+    assert post.image_size["width"] == 1000
+    assert post.image_size["variants"]["320"] == name
+
+
+@pytest.mark.django_db
+def test_uploaded_original_has_no_metadata(post_with_large_image):
+    post = post_with_large_image
+    with default_storage.open(post.image.name) as file:
+        original = Image.open(file)
+        assert original.size == (1000, 500)
+        assert not original.getexif(), (
+            "Убедитесь, что из загруженного оригинала удаляются метаданные."
+        )
+
+
+def test_rotated_original_is_transposed():
+    image = Image.new("RGB", (40, 20))
+    exif = Image.Exif()
+    exif[ORIENTATION_TAG] = 6  # Поворот на 90° по часовой стрелке.
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    stripped = strip_metadata(ContentFile(buffer.getvalue(), name="a.jpg"))
+    result = Image.open(stripped)
+    assert result.size == (20, 40)
+    assert not result.getexif()
+
+
+def test_variant_names_differ_by_extension():
+    assert variant_name("post_images/a.png", 640) != variant_name(
+        "post_images/a.jpg", 640
+    ), "Убедитесь, что у `a.png` и `a.jpg` разные копии."
+
+
+class RenamingStorage(FileSystemStorage):
+    """Сохраняет файлы под другим именем, как при совпадении имён."""
+
+    def get_available_name(self, name, max_length=None):
+        return super().get_available_name(
+            name.replace(".jpg-", "-renamed-"), max_length
+        )
+
+
+def test_renamed_variant_is_recorded(tmp_path):
+    storage = RenamingStorage(location=tmp_path)
+    name = storage.save("post_images/photo.jpg", _jpeg(700, 350))
+    image_size = process_image(name, storage=storage)
+    assert image_size["variants"]
+    for variant in image_size["variants"].values():
+        assert "-renamed-" in variant
+        assert storage.exists(variant), (
+            "Убедитесь, что записывается имя, под которым копия сохранена."
+        )
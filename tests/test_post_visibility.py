@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from blog import cache as blog_cache
+
+
+def _visible(post):
+    post.refresh_from_db()
+    return post.is_visible
+
+
+@pytest.mark.django_db
+def test_post_visibility_follows_post_and_category(
+        post_with_published_location):
+    post = post_with_published_location
+    assert _visible(post)
+
+    post.is_published = False
+    post.save()
+    assert not _visible(post), (
+        "Убедитесь, что снятый с публикации пост перестаёт быть видимым."
+    )
+    post.is_published = True
+    post.save()
+
+    category = post.category
+    category.is_published = False
+    category.save()
+    assert not _visible(post), (
+        "Убедитесь, что при скрытии категории скрываются её посты."
+    )
+    category.is_published = True
+    category.save()
+    assert _visible(post), (
+        "Убедитесь, что при публикации категории её посты снова видны."
+    )
+
+    category.delete()
+    assert not _visible(post), (
+        "Убедитесь, что посты удалённой категории скрываются."
+    )
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_posts(client, post_with_published_location):
+    post = post_with_published_location
+    post.pub_date = timezone.now() + timedelta(hours=1)
+    post.save()
+    assert not _visible(post)
+    assert post.id not in [p.id for p in client.get("/").context["page_obj"]]
+
+    # Время публикации наступило, но пост не сохраняли.
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    assert not _visible(post)
+
+    call_command("publish_scheduled_posts")
+    assert _visible(post), (
+        "Убедитесь, что команда `publish_scheduled_posts` открывает"
+        " посты, время публикации которых наступило."
+    )
+    assert post.id in [p.id for p in client.get("/").context["page_obj"]], (
+        "Убедитесь, что опубликованный по расписанию пост появляется"
+        " в ленте."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scheduled_post_reaches_cached_pages_of_other_processes(
+        client, tmp_path, monkeypatch, post_with_published_location):
+    post = post_with_published_location
+    post.pub_date = timezone.now() + timedelta(hours=1)
+    post.save()
+    # Кэш веб-процесса и кэш процесса команды — разные экземпляры
+    # с общим хранилищем.
+    worker, command = (
+        FileBasedCache(str(tmp_path), {}) for _ in range(2)
+    )
+    monkeypatch.setattr(blog_cache, "cache", worker)
+    with override_settings(BLOG_PAGE_CACHE_TIMEOUT=600):
+        assert post.title not in client.get("/").content.decode()
+        type(post).objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(minutes=1)
+        )
+
+        monkeypatch.setattr(blog_cache, "cache", command)
+        call_command("publish_scheduled_posts")
+
+        monkeypatch.setattr(blog_cache, "cache", worker)
+        assert post.title in client.get("/").content.decode(), (
+            "Убедитесь, что пост, опубликованный командой, появляется"
+            " в закэшированной ленте других процессов."
+        )
@@ -0,0 +1,72 @@
+import pytest
+from django.test import override_settings
+
+from blog import profiling
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path):
+    with override_settings(BLOG_PROFILE_DIR=tmp_path, BLOG_PROFILE_KEEP=2):
+        yield tmp_path
+
+
+@pytest.mark.django_db
+def test_staff_request_is_profiled(
+        admin_client, profile_dir, post_with_published_location):
+    post = post_with_published_location
+    response = admin_client.get(f"/posts/{post.id}/", {"_profile": "all"})
+    assert response.status_code == 200
+    capture_id = response["X-Profile-Id"]
+    assert (profile_dir / f"{capture_id}.prof").is_file(), (
+        "Убедитесь, что дамп pstats сохраняется на диск."
+    )
+    capture = profiling.load_capture(capture_id)
+    assert capture["view"] == "blog:post_detail"
+    assert capture["allocations"], (
+        "Убедитесь, что сохраняются крупнейшие выделения памяти."
+    )
+
+    listing = admin_client.get("/profiling/")
+    assert capture_id in listing.content.decode()
+    detail = admin_client.get(f"/profiling/{capture_id}/")
+    assert "cumulative" in detail.content.decode()
+    download = admin_client.get(f"/profiling/{capture_id}/download/")
+    assert download.status_code == 200
+
+
+@pytest.mark.django_db
+def test_memory_only_capture(admin_client, profile_dir):
+    response = admin_client.get("/", HTTP_X_PROFILE="memory")
+    capture = profiling.load_capture(response["X-Profile-Id"])
+    assert not capture["cpu"] and capture["peak_memory"]
+    assert admin_client.get(
+        f"/profiling/{capture['id']}/download/"
+    ).status_code == 404
+
+
+@pytest.mark.django_db
+def test_regular_requests_are_not_profiled(
+        client, user_client, profile_dir):
+    for http_client in (client, user_client):
+        response = http_client.get("/", {"_profile": "cpu"})
+        assert not response.has_header("X-Profile-Id"), (
+            "Убедитесь, что профилируются только запросы сотрудников."
+        )
+    assert not list(profile_dir.iterdir())
+    assert user_client.get("/profiling/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_old_captures_are_removed(admin_client, profile_dir):
+    for _ in range(3):
+        admin_client.get("/", {"_profile": "cpu"})
+    assert len(profiling.list_captures()) == 2
+    assert len(list(profile_dir.glob("*.prof"))) == 2
+
+
+@pytest.mark.django_db
+def test_unknown_capture(admin_client):
+    assert admin_client.get("/profiling/../etc/").status_code == 404
+    assert admin_client.get(
+        "/profiling/20240101-000000000000-abcdef/"
+    ).status_code == 404
@@ -0,0 +1,177 @@
+import pytest
+from django.http import HttpResponse
+from django.test import override_settings
+from django.urls import get_resolver
+
+from blog import profiling
+
+
+@pytest.mark.django_db
+def test_post_detail_queries_anonymous(
+        client, django_assert_num_queries, mixer, another_user,
+        post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(5).blend("blog.Comment", post=post, author=another_user)
+    # Пост со связанными объектами и комментарии с авторами.
+    with django_assert_num_queries(2):
+        response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    assert len(response.context["comments"]) == 5
+
+
+@pytest.mark.django_db
+def test_post_detail_queries_author(
+        user_client, django_assert_num_queries, mixer, another_user,
+        post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    mixer.cycle(5).blend("blog.Comment", post=post, author=another_user)
+    # Сессия и пользователь, затем пост и комментарии.
+    with django_assert_num_queries(4):
+        response = user_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200, (
+        "Убедитесь, что автор видит свою снятую с публикации запись."
+    )
+
+
+@pytest.mark.django_db
+def test_post_detail_hidden_from_others(
+        another_user_client, post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = another_user_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def query_count_setup(
+        rf, mixer, user, another_user, admin_user, tmp_path,
+        many_posts_with_published_locations, post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    with override_settings(BLOG_PROFILE_DIR=tmp_path):
+        request = rf.get("/")
+        request.user = admin_user
+        request.resolver_match = None
+        capture = profiling.run_profiled(
+            request, lambda request: HttpResponse(), ("cpu",)
+        )["X-Profile-Id"]
+        yield {
+            "post": post.id,
+            "comment": comment.id,
+            "category": post.category.slug,
+            "username": user.username,
+            "capture": capture,
+        }
+
+
+# Адрес (шаблон), клиент, метод, данные формы и ожидаемое число
+# запросов. Для авторизованного клиента два запроса из них — сессия
+# и пользователь.
+VIEW_QUERY_BUDGETS = {
+    "blog:index": (
+        "/", "client", "get", None, 2),
+    "blog:index (авторизован)": (
+        "/", "user_client", "get", None, 4),
+    "blog:category_posts": (
+        "/category/{category}/", "client", "get", None, 3),
+    "blog:edit_profile": (
+        "/profile/edit/", "user_client", "get", None, 2),
+    "blog:profile": (
+        "/profile/{username}/", "client", "get", None, 3),
+    "blog:profile (автор)": (
+        "/profile/{username}/", "user_client", "get", None, 5),
+    "blog:search": (
+        "/search/?q=текст", "client", "get", None, 1),
+    "blog:post_detail": (
+        "/posts/{post}/", "client", "get", None, 2),
+    "blog:create_post": (
+        "/posts/create/", "user_client", "get", None, 4),
+    "blog:edit_post": (
+        "/posts/{post}/edit/", "user_client", "get", None, 5),
+    "blog:edit_post (не автор)": (
+        "/posts/{post}/edit/", "another_user_client", "get", None, 3),
+    "blog:delete_post": (
+        "/posts/{post}/delete/", "user_client", "get", None, 3),
+    "blog:post_comments": (
+        "/posts/{post}/comments/", "client", "get", None, 2),
+    "blog:add_comment": (
+        "/posts/{post}/comment/", "user_client", "post", {"text": "Текст"},
+        7),
+    "blog:edit_comment": (
+        "/posts/{post}/edit_comment/{comment}/", "user_client", "get",
+        None, 3),
+    "blog:edit_comment (не автор)": (
+        "/posts/{post}/edit_comment/{comment}/", "another_user_client",
+        "get", None, 3),
+    "blog:delete_comment": (
+        "/posts/{post}/delete_comment/{comment}/", "user_client", "get",
+        None, 3),
+    "blog:feed_rss": (
+        "/feed/rss/", "client", "get", None, 1),
+    "blog:feed_atom": (
+        "/feed/atom/", "client", "get", None, 1),
+    "blog:category_feed_rss": (
+        "/category/{category}/feed/rss/", "client", "get", None, 2),
+    "blog:category_feed_atom": (
+        "/category/{category}/feed/atom/", "client", "get", None, 2),
+    "blog:profile_feed_rss": (
+        "/profile/{username}/feed/rss/", "client", "get", None, 2),
+    "blog:profile_feed_atom": (
+        "/profile/{username}/feed/atom/", "client", "get", None, 2),
+    "blog:export": (
+        "/export/posts/", "admin_client", "get", None, 4),
+    "blog:query_stats": (
+        "/stats/", "admin_client", "get", None, 2),
+    "blog:profiling": (
+        "/profiling/", "admin_client", "get", None, 2),
+    "blog:profiling_detail": (
+        "/profiling/{capture}/", "admin_client", "get", None, 2),
+    "blog:profiling_download": (
+        "/profiling/{capture}/download/", "admin_client", "get", None, 2),
+    "blog:api_posts": (
+        "/api/posts/", "client", "get", None, 1),
+    "blog:api_post": (
+        "/api/posts/{post}/", "client", "get", None, 1),
+    "blog:api_post_comments": (
+        "/api/posts/{post}/comments/", "client", "get", None, 2),
+    "blog:api_categories": (
+        "/api/categories/", "client", "get", None, 1),
+    "blog:api_profile": (
+        "/api/profiles/{username}/", "client", "get", None, 1),
+    "blog:api_profile_posts": (
+        "/api/profiles/{username}/posts/", "client", "get", None, 2),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", VIEW_QUERY_BUDGETS)
+def test_view_query_budget(
+        request, view_name, query_count_setup, django_assert_num_queries):
+    url, client_name, method, data, expected = VIEW_QUERY_BUDGETS[view_name]
+    client = request.getfixturevalue(client_name)
+    url = url.format(**query_count_setup)
+    args = (url, data) if data else (url,)
+    with django_assert_num_queries(expected):
+        response = getattr(client, method)(*args)
+        if response.streaming:
+            # Потоковый ответ читает базу по мере отдачи.
+            b"".join(response.streaming_content)
+    assert response.status_code < 400, (
+        f"Убедитесь, что страница `{view_name}` открывается без ошибок."
+    )
+
+
+def test_every_view_has_query_budget():
+    blog_urls = get_resolver().namespace_dict["blog"][1]
+    names = {
+        f"blog:{name}" for name in blog_urls.reverse_dict
+        if isinstance(name, str)
+    }
+    budgeted = {name.split(" (")[0] for name in VIEW_QUERY_BUDGETS}
+    assert names - budgeted == set(), (
+        "Убедитесь, что для каждого адреса `blog:` задан бюджет запросов."
+    )
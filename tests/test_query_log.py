@@ -0,0 +1,79 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from blog.management.commands.analyze_query_log import aggregate
+
+
+@pytest.fixture
+def query_log(tmp_path):
+    path = tmp_path / "query_log.jsonl"
+    with override_settings(
+        BLOG_QUERY_LOG=path, BLOG_QUERY_LOG_RATE=1, BLOG_QUERY_STATS_RATE=0
+    ):
+        yield path
+
+
+@pytest.mark.django_db
+def test_sampled_queries_are_logged(
+        client, query_log, post_with_published_location):
+    response = client.get("/")
+    assert not response.has_header("Server-Timing"), (
+        "Убедитесь, что журнал не включает замеры для Server-Timing."
+    )
+    client.get(f"/posts/{post_with_published_location.id}/")
+    entries = [
+        json.loads(line)
+        for line in query_log.read_text(encoding="utf-8").splitlines()
+    ]
+    assert {entry["view"] for entry in entries} == {
+        "blog:index", "blog:post_detail"
+    }
+    for entry in entries:
+        assert entry["duration_ms"] >= 0
+        assert "'" not in entry["fingerprint"]
+        assert "params" not in entry, (
+            "Убедитесь, что значения параметров не попадают в журнал."
+        )
+        assert entry["param_count"] is not None
+
+    out = io.StringIO()
+    call_command("analyze_query_log", str(query_log), stdout=out)
+    report = out.getvalue()
+    assert "blog:index" in report and "blog:post_detail" in report
+    assert "SEARCH" in report or "SCAN" in report, (
+        "Убедитесь, что в отчёт попадают планы запросов."
+    )
+
+
+@pytest.mark.django_db
+def test_query_log_has_no_param_values(user_client, user, query_log):
+    user_client.get("/")
+    text = query_log.read_text(encoding="utf-8")
+    session_key = user_client.session.session_key
+    assert "django_session" in text and session_key not in text, (
+        "Убедитесь, что ключи сессий не попадают в журнал запросов."
+    )
+    assert user.password not in text
+
+
+def test_aggregate_ranks_by_fingerprint():
+    lines = [
+        json.dumps({
+            "view": view, "fingerprint": fingerprint,
+            "duration_ms": duration, "sql": "SELECT 1",
+            "param_count": 0,
+        })
+        for view, fingerprint, duration in [
+            ("a", "SELECT ?", 1.0),
+            ("b", "SELECT ?", 5.0),
+            ("a", "SELECT * FROM t", 2.0),
+        ]
+    ]
+    groups = aggregate(lines)
+    assert groups["SELECT ?"]["durations"] == [1.0, 5.0]
+    assert groups["SELECT ?"]["example"]["view"] == "b"
+    assert set(aggregate(lines, view="a")) == {"SELECT ?", "SELECT * FROM t"}
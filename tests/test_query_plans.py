@@ -0,0 +1,7 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_hot_queries_use_indexes(post_with_published_location, comment):
+    call_command("check_query_plans")
@@ -0,0 +1,83 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+from blog import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    instrumentation.STATS.reset()
+    yield
+    instrumentation.STATS.reset()
+
+
+def test_fingerprint_strips_literals():
+    first = instrumentation.fingerprint(
+        "SELECT * FROM t WHERE a = 'x' AND id IN (%s, %s) LIMIT 21"
+    )
+    second = instrumentation.fingerprint(
+        "SELECT  * FROM t WHERE a = 'it''s' AND id IN (%s) LIMIT 5"
+    )
+    assert first == second == (
+        "SELECT * FROM t WHERE a = ? AND id IN (...) LIMIT ?"
+    )
+
+
+@pytest.mark.django_db
+def test_recorder_counts_repeated_queries():
+    with instrumentation.record() as recorder:
+        for pk in range(3):
+            list(get_user_model().objects.filter(pk=pk))
+    assert recorder.queries == 3
+    assert recorder.duplicates == 2, (
+        "Убедитесь, что одинаковые запросы с разными параметрами "
+        "считаются повторами."
+    )
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_QUERY_STATS_RATE=1)
+def test_sampled_request_is_reported(
+        client, admin_client, post_with_published_location):
+    response = client.get("/")
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert "sql;dur=" in timing and "tpl;dur=" in timing, (
+        "Убедитесь, что замеренный запрос отдаёт заголовок Server-Timing."
+    )
+
+    stats = admin_client.get("/stats/").json()["views"]
+    index = stats["blog:index"]
+    assert index["requests"] == 1
+    assert index["queries"] > 0
+    assert index["template_ms"] > 0
+    assert index["size"] == len(response.content)
+
+    admin_client.post("/stats/")
+    assert admin_client.get("/stats/").json()["views"].keys() == {
+        "blog:query_stats"
+    }
+
+
+@pytest.mark.django_db
+@override_settings(
+    BLOG_QUERY_STATS_RATE=0,
+    BLOG_QUERY_STATS_VIEW_RATES={"blog:post_detail": 1},
+)
+def test_sampling_rates(client, post_with_published_location):
+    post = post_with_published_location
+    response = client.get("/")
+    assert not response.has_header("Server-Timing"), (
+        "Убедитесь, что при нулевой доле запросы не замеряются."
+    )
+    response = client.get(f"/posts/{post.id}/")
+    assert response.has_header("Server-Timing"), (
+        "Убедитесь, что доля для представления важнее общей."
+    )
+    assert set(instrumentation.STATS.snapshot()) == {"blog:post_detail"}
+
+
+@pytest.mark.django_db
+def test_stats_are_staff_only(user_client):
+    assert user_client.get("/stats/").status_code == 403
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+
+@pytest.fixture
+def blend_post(mixer, user, published_category, published_location):
+    def blend(**kwargs):
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("pub_date", timezone.now() - timedelta(days=1))
+        kwargs.setdefault("category", published_category)
+        return mixer.blend(
+            "blog.Post", author=user, location=published_location, **kwargs
+        )
+    return blend
+
+
+def _found(client, query, **params):
+    response = client.get("/search/", {"q": query, **params})
+    return response, [post.id for post in response.context["page_obj"]]
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(client, blend_post):
+    in_text = blend_post(title="Заметки", text="Поход в горы летом")
+    in_title = blend_post(title="Горы Алтая", text="Путевые заметки")
+    blend_post(title="Рецепты", text="Пирог с яблоками")
+
+    _, found = _found(client, "горы")
+    assert found == [in_title.id, in_text.id], (
+        "Убедитесь, что поиск находит посты по заголовку и тексту"
+        " и ставит совпадения в заголовке выше."
+    )
+
+
+@pytest.mark.django_db
+def test_search_respects_visibility(client, mixer, blend_post):
+    visible = blend_post(title="Закат", text="текст")
+    blend_post(title="Закат", text="текст", is_published=False)
+    blend_post(
+        title="Закат", text="текст",
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    blend_post(
+        title="Закат", text="текст",
+        category=mixer.blend("blog.Category", is_published=False),
+    )
+
+    _, found = _found(client, "закат")
+    assert found == [visible.id], (
+        "Убедитесь, что поиск не показывает снятые с публикации,"
+        " отложенные посты и посты из скрытых категорий."
+    )
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(client, blend_post):
+    post = blend_post(title="Старый заголовок", text="текст")
+    post.title = "Новый заголовок"
+    post.save()
+
+    assert _found(client, "старый")[1] == []
+    assert _found(client, "новый")[1] == [post.id], (
+        "Убедитесь, что индекс обновляется при изменении поста."
+    )
+
+    post.delete()
+    assert _found(client, "новый")[1] == [], (
+        "Убедитесь, что удалённый пост пропадает из индекса."
+    )
+
+
+@pytest.mark.django_db
+def test_search_snippet_is_escaped_and_highlighted(client, blend_post):
+    blend_post(title="Пост", text="<script>alert(1)</script> про котиков")
+
+    response, _ = _found(client, "котиков")
+    content = response.content.decode()
+    assert "<mark>котиков</mark>" in content, (
+        "Убедитесь, что найденные слова выделяются тегом `<mark>`."
+    )
+    assert "<script>alert(1)</script>" not in content, (
+        "Убедитесь, что текст фрагмента экранируется."
+    )
+
+
+@pytest.mark.django_db
+def test_search_cursor_pagination(client, blend_post):
+    posts = [
+        blend_post(title=f"Пост {i}", text="общий текст")
+        for i in range(N_PER_PAGE + 3)
+    ]
+    response, first = _found(client, "общий")
+    page = response.context["page_obj"]
+    assert len(first) == N_PER_PAGE and page.has_next()
+    assert "q=%D0%BE%D0%B1%D1%89%D0%B8%D0%B9&amp;after=" in (
+        response.content.decode()
+    ), "Убедитесь, что ссылки пагинации сохраняют поисковый запрос."
+
+    _, second = _found(client, "общий", after=page.next_cursor)
+    assert sorted(first + second) == sorted(post.id for post in posts), (
+        "Убедитесь, что курсорная пагинация поиска выдаёт каждый"
+        " найденный пост ровно один раз."
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index(client, blend_post):
+    post = blend_post(title="Маяк", text="текст")
+    call_command("rebuild_search_index", batch_size=1)
+    assert _found(client, "маяк")[1] == [post.id], (
+        "Убедитесь, что команда `rebuild_search_index` восстанавливает"
+        " индекс."
+    )
+
+
+@pytest.mark.django_db
+def test_search_empty_query(client, blend_post):
+    blend_post(title="Пост", text="текст")
+    response, found = _found(client, " !! ")
+    assert response.status_code == 200 and found == []
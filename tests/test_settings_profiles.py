@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / "blogicum"
+SCRIPT = """
+import json
+from django.conf import settings
+print(json.dumps({
+    "debug": settings.DEBUG,
+    "apps": settings.INSTALLED_APPS,
+    "middleware": settings.MIDDLEWARE,
+    "templates": settings.TEMPLATES[0],
+    "conn_max_age": settings.DATABASES["default"]["CONN_MAX_AGE"],
+    "cache": settings.CACHES["default"]["BACKEND"],
+    "secret_key": settings.SECRET_KEY,
+}, default=str))
+"""
+
+
+def load_settings(profile, secret_key="secret"):
+    env = dict(
+        os.environ,
+        BLOGICUM_PROFILE=profile,
+        DJANGO_SETTINGS_MODULE="blogicum.settings",
+    )
+    env.pop("DJANGO_SECRET_KEY", None)
+    if secret_key is not None:
+        env["DJANGO_SECRET_KEY"] = secret_key
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=PROJECT_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def test_production_profile():
+    config = load_settings("production")
+    assert not config["debug"]
+    assert "debug_toolbar" not in config["apps"]
+    assert not any("debug_toolbar" in name for name in config["middleware"])
+    assert not config["templates"]["APP_DIRS"]
+    loader, = config["templates"]["OPTIONS"]["loaders"]
+    assert loader[0] == "django.template.loaders.cached.Loader", (
+        "Убедитесь, что в production шаблоны кэшируются."
+    )
+    assert config["conn_max_age"] > 0
+    assert "locmem" not in config["cache"], (
+        "Убедитесь, что в production кэш общий для всех процессов."
+    )
+
+
+def test_production_requires_secret_key():
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        load_settings("production", secret_key=None)
+    assert "ImproperlyConfigured" in error.value.stderr, (
+        "Убедитесь, что production не запускается с ключом из репозитория."
+    )
+    assert load_settings("production")["secret_key"] == "secret"
+
+
+def test_development_profile():
+    config = load_settings("development", secret_key=None)
+    assert config["secret_key"].startswith("django-insecure-")
+    assert config["debug"]
+    assert "debug_toolbar" in config["apps"]
+    assert config["conn_max_age"] == 0
+
+
+def test_unknown_profile():
+    with pytest.raises(subprocess.CalledProcessError):
+        load_settings("staging")
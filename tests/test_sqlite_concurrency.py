@@ -0,0 +1,259 @@
+import json
+import os
+import subprocess
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection
+from django.db.models.signals import post_save
+from PIL import Image
+
+from blog import db
+from blog.models import Post
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / "blogicum"
+WRITERS = 16
+WRITES = 10
+READERS = 4
+# Тестовая база pytest-django живёт в памяти, где нет ни WAL, ни
+# блокировок файла, поэтому нагрузка запускается в отдельном процессе
+# с базой-файлом.
+SCRIPT = """
+import json
+import sys
+import threading
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post, User
+
+writers, writes, readers = map(int, sys.argv[1:])
+setup_test_environment()
+call_command("migrate", verbosity=0)
+category = Category.objects.create(
+    title="Категория", description="Описание", slug="stress"
+)
+author = User.objects.create(username="author")
+post = Post.objects.create(
+    title="Пост", text="Текст", author=author, category=category,
+    pub_date=timezone.now(),
+)
+clients = []
+for number in range(writers):
+    # Исключения запросов передаются сигналом всем клиентам во всех
+    # потоках, поэтому ошибки считаются по кодам ответов.
+    client = Client(raise_request_exception=False)
+    client.force_login(User.objects.create(username=f"writer{number}"))
+    clients.append(client)
+statuses = []
+errors = []
+barrier = threading.Barrier(writers + readers)
+
+
+def write(client, number):
+    try:
+        barrier.wait()
+        for index in range(writes):
+            if index % 2:
+                response = client.post(
+                    f"/posts/{post.id}/comment/", {"text": "Комментарий"}
+                )
+            else:
+                response = client.post("/posts/create/", {
+                    "title": f"Пост {number}-{index}", "text": "Текст",
+                    "category": category.id,
+                    "pub_date": "2020-01-01 00:00",
+                })
+            statuses.append(response.status_code)
+    except Exception as error:
+        errors.append(repr(error))
+    finally:
+        connections.close_all()
+
+
+def read():
+    try:
+        barrier.wait()
+        for _ in range(writes):
+            statuses.append(Client(raise_request_exception=False).get(
+                f"/posts/{post.id}/"
+            ).status_code)
+    except Exception as error:
+        errors.append(repr(error))
+    finally:
+        connections.close_all()
+
+
+threads = [
+    threading.Thread(target=write, args=(client, number))
+    for number, client in enumerate(clients)
+] + [threading.Thread(target=read) for _ in range(readers)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+post.refresh_from_db()
+with connection.cursor() as cursor:
+    cursor.execute("PRAGMA journal_mode")
+    journal_mode = cursor.fetchone()[0]
+print(json.dumps({
+    "statuses": statuses,
+    "errors": errors,
+    "posts": Post.objects.exclude(pk=post.pk).count(),
+    "comments": Comment.objects.count(),
+    "comment_count": post.comment_count,
+    "journal_mode": journal_mode,
+}))
+"""
+
+
+def test_concurrent_writers_get_no_lock_errors(tmp_path):
+    env = dict(
+        os.environ,
+        BLOGICUM_PROFILE="production",
+        DJANGO_CACHE_DIR=str(tmp_path / "cache"),
+        DJANGO_SECRET_KEY="stress",
+        DJANGO_SETTINGS_MODULE="blogicum.settings",
+        DJANGO_SQLITE_PATH=str(tmp_path / "db.sqlite3"),
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT, str(WRITERS), str(WRITES),
+         str(READERS)],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True,
+        check=True, timeout=300,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    assert result["errors"] == []
+    assert result["statuses"].count(302) == WRITERS * WRITES, (
+        "Убедитесь, что при одновременной записи пользователи не получают "
+        "ошибку «database is locked»."
+    )
+    assert result["statuses"].count(200) == READERS * WRITES
+    assert result["posts"] + result["comments"] == WRITERS * WRITES
+    assert result["comment_count"] == result["comments"], (
+        "Убедитесь, что повтор записи не нарушает счётчик комментариев."
+    )
+    assert result["journal_mode"] == "wal"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retry_on_lock(settings, monkeypatch):
+    settings.BLOG_WRITE_RETRIES = 2
+    monkeypatch.setattr(db.time, "sleep", lambda delay: None)
+    calls = []
+
+    def locked_twice():
+        calls.append(connection.in_atomic_block)
+        if len(calls) < 3:
+            raise OperationalError("database is locked")
+        return "ok"
+
+    assert db.retry_on_lock(locked_twice) == "ok"
+    assert calls == [True, True, True], (
+        "Убедитесь, что каждая попытка выполняется в своей транзакции."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retry_gives_up(settings, monkeypatch):
+    settings.BLOG_WRITE_RETRIES = 2
+    monkeypatch.setattr(db.time, "sleep", lambda delay: None)
+    calls = []
+
+    def always_locked():
+        calls.append(1)
+        raise OperationalError("database is locked")
+
+    with pytest.raises(OperationalError):
+        db.retry_on_lock(always_locked)
+    assert len(calls) == 3
+
+    calls.clear()
+
+    def broken():
+        calls.append(1)
+        raise OperationalError("no such table: blog_post")
+
+    with pytest.raises(OperationalError):
+        db.retry_on_lock(broken)
+    assert len(calls) == 1, (
+        "Убедитесь, что повторяются только ошибки блокировки базы."
+    )
+
+
+@pytest.fixture
+def locked_post_saves(settings, tmp_path, monkeypatch):
+    """Первые `count` сохранений поста падают с ошибкой блокировки.
+
+    Ошибка возникает уже после записи файла в хранилище.
+    """
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_WRITE_RETRIES = 2
+    monkeypatch.setattr(db.time, "sleep", lambda delay: None)
+    monkeypatch.setattr(
+        "blog.signals.images.schedule_processing", lambda pk: None
+    )
+    state = {"count": 0, "calls": 0}
+
+    def lock(sender, instance, **kwargs):
+        state["calls"] += 1
+        if state["calls"] <= state["count"]:
+            raise OperationalError("database is locked")
+
+    post_save.connect(lock, sender=Post)
+    yield state
+    post_save.disconnect(lock, sender=Post)
+
+
+def _create_post(client, category):
+    buffer = BytesIO()
+    Image.new("RGB", (40, 20)).save(buffer, "JPEG")
+    return client.post("/posts/create/", {
+        "title": "Пост", "text": "Текст", "category": category.id,
+        "pub_date": "2020-01-01 00:00",
+        "image": SimpleUploadedFile(
+            "photo.jpg", buffer.getvalue(), content_type="image/jpeg"
+        ),
+    })
+
+
+def _stored_files(root):
+    return [path for path in root.rglob("*") if path.is_file()]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retry_stores_upload_once(
+        user_client, published_category, locked_post_saves, tmp_path):
+    locked_post_saves["count"] = 2
+    response = _create_post(user_client, published_category)
+    assert response.status_code == 302
+    assert locked_post_saves["calls"] == 3
+    post = Post.objects.get()
+    assert [path.name for path in _stored_files(tmp_path)] == [
+        Path(post.image.name).name
+    ], (
+        "Убедитесь, что при повторах загруженный файл записывается "
+        "в хранилище один раз."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_save_removes_upload(
+        user_client, published_category, locked_post_saves, tmp_path):
+    locked_post_saves["count"] = 3
+    with pytest.raises(OperationalError):
+        _create_post(user_client, published_category)
+    assert not Post.objects.exists()
+    assert _stored_files(tmp_path) == [], (
+        "Убедитесь, что файл несохранённого поста удаляется из хранилища."
+    )
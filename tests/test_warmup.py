@@ -0,0 +1,98 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.template import engines
+
+from blog import warmup
+from blog.management.commands.warm_up import parse_importtime
+from blogicum.startup import StartupTimer
+
+
+def test_compile_templates():
+    compiled, skipped = warmup.compile_templates()
+    engine = engines["django"]
+    names = {
+        path.relative_to(directory).as_posix()
+        for directory in warmup.template_dirs(engine)
+        for path in directory.rglob("*.html")
+    }
+    assert "blog/detail.html" in names
+    assert compiled >= len(names) - skipped, (
+        "Убедитесь, что прогрев разбирает все шаблоны проекта и приложений."
+    )
+
+
+@pytest.mark.django_db
+def test_warm_up_steps(published_category):
+    timer = StartupTimer()
+    warmup.warm_up(timer)
+    steps = {name: detail for name, _, detail in timer.steps}
+    assert list(steps) == [
+        "шаблоны", "адреса", "модели", "соединения с БД", "кэш страниц",
+    ]
+    assert "ошибки" not in steps["кэш страниц"], (
+        "Убедитесь, что прогреваемые страницы отдаются без ошибок."
+    )
+    statuses = warmup.warm_pages()
+    assert statuses[f"/category/{published_category.slug}/"] == 200
+    assert timer.total > 0
+    assert "шаблоны" in timer.summary()
+
+
+@pytest.mark.django_db
+def test_warm_up_command_skip_pages():
+    stdout = StringIO()
+    call_command("warm_up", "--skip-pages", stdout=stdout)
+    output = stdout.getvalue()
+    assert "шаблоны" in output and "итого" in output
+    assert "кэш страниц" not in output
+
+
+def test_parse_importtime():
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   django.utils",
+        "import time:        30 |        150 | django",
+        "import time:        50 |         50 | sqlparse.keywords",
+        "посторонняя строка",
+    ]
+    packages = parse_importtime(lines)
+    assert packages == {"django": 150, "sqlparse": 50}, (
+        "Убедитесь, что время импорта суммируется по собственному времени "
+        "модулей пакета верхнего уровня."
+    )
+
+
+@pytest.mark.django_db
+def test_warm_up_command_imports():
+    stdout = StringIO()
+    call_command("warm_up", "--skip-pages", "--imports", "3", stdout=stdout)
+    output = stdout.getvalue()
+    assert "Импорт при django.setup()" in output
+    assert "django" in output.split("Импорт при django.setup()")[1]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("public_url", ["", "https://localhost"])
+def test_warmed_feed_has_links_of_each_host(
+        client, settings, public_url, post_with_published_location):
+    settings.BLOG_PUBLIC_URL = public_url
+    statuses = warmup.warm_pages()
+    assert ("/feed/rss/" in statuses) == bool(public_url), (
+        "Убедитесь, что ленты прогреваются только с адресом сайта."
+    )
+    assert set(statuses.values()) == {200}
+    content = client.get(
+        "/feed/rss/", HTTP_HOST="127.0.0.1"
+    ).content.decode()
+    post_url = f"posts/{post_with_published_location.id}/"
+    assert f"http://127.0.0.1/{post_url}" in content, (
+        "Убедитесь, что прогретая лента не отдаётся с чужими ссылками."
+    )
+    assert "localhost" not in content
+    if public_url:
+        content = client.get(
+            "/feed/rss/", HTTP_HOST="localhost", secure=True
+        ).content.decode()
+        assert f"https://localhost/{post_url}" in content